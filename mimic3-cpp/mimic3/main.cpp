@@ -22,7 +22,76 @@
 using namespace std;
 
 void printHelp() {
-    std::cout << "mimic3 <model> [output_dir]" << std::endl;
+    std::cout << "mimic3 [--binary] <model> [output_dir]" << std::endl;
+    std::cout << "mimic3 --capabilities" << std::endl;
+}
+
+// Optional features that a client may check for before use (one per line)
+const std::vector<std::string> CAPABILITIES{"pcm-response", "binary-request"};
+
+const int sampleRate = 22050;
+
+// Synthesize audio for a request and write it out.
+// Returns true if the audio was written to stdout.
+bool processRequest(mimic3::mimic3_Session& session,
+                    mimic3::mimic3_Request& request,
+                    std::optional<mimic3::PhonemeIdMap>& idMap,
+                    std::optional<std::filesystem::path>& outputDirectory,
+                    std::size_t lineIndex) {
+    mimic3::phonemize(request);
+    mimic3::phonemes2ids(request, idMap);
+
+    if ((!request.streamAudio) && (!request.outputPath)) {
+        // Path to output WAV file
+        std::stringstream outputName;
+        outputName << lineIndex << ".wav";
+
+        if (outputDirectory.has_value()) {
+            // Relative to output directory
+            request.outputPath = outputDirectory;
+            request.outputPath.value().append(outputName.str());
+        } else {
+            // Relative to current directory
+            request.outputPath = std::filesystem::path(outputName.str());
+        }
+    }
+
+    auto phonemeIds = &request.phonemeIds.value();
+    if (phonemeIds->empty()) {
+        throw std::runtime_error("Empty phoneme ids");
+    }
+
+    spdlog::debug("Synthesizing audio with {} phoneme id(s)", phonemeIds->size());
+    std::vector<int16_t> audio;
+    auto result = synthesize(
+        session,
+        phonemeIds,
+        request.noiseScale,
+        request.lengthScale,
+        request.noiseW,
+        sampleRate,
+        audio);
+
+    spdlog::info("Real-time factor: {} (infer={}, audio={})",
+                 result.realTimeFactor,
+                 result.inferSeconds,
+                 result.audioSeconds);
+
+    if (request.streamAudio) {
+        // Audio goes straight back over stdout
+        mimic3::writeAudioFrame(std::cout, request.id, audio, sampleRate);
+        spdlog::info("Wrote {} sample(s) to stdout", audio.size());
+        return true;
+    }
+
+    if (!request.outputPath) {
+        throw std::runtime_error("No output path for audio");
+    }
+
+    mimic3::writeWav(request.outputPath.value(), audio, sampleRate);
+    spdlog::info("Wrote {}", request.outputPath.value().string());
+
+    return false;
 }
 
 int main(int argc, char *argv[]) {
@@ -30,17 +99,34 @@ int main(int argc, char *argv[]) {
     spdlog::set_default_logger(spdlog::stderr_color_st("mimic3"));
     spdlog::set_level(spdlog::level::debug);
 
-    if (argc < 2) {
+    bool binaryRequests = false;
+    std::vector<std::string> positionalArgs;
+    for (int i = 1; i < argc; i++) {
+        std::string arg(argv[i]);
+        if (arg == "--capabilities") {
+            for (auto const& capability : CAPABILITIES) {
+                std::cout << capability << std::endl;
+            }
+
+            return EXIT_SUCCESS;
+        } else if (arg == "--binary") {
+            binaryRequests = true;
+        } else {
+            positionalArgs.push_back(arg);
+        }
+    }
+
+    if (positionalArgs.empty()) {
         printHelp();
         return EXIT_SUCCESS;
     }
 
-    std::filesystem::path modelPath(argv[1]);
+    std::filesystem::path modelPath(positionalArgs[0]);
     std::optional<std::filesystem::path> outputDirectory;
 
-    if (argc > 2) {
+    if (positionalArgs.size() > 1) {
         // Output directory for WAV files
-        outputDirectory = std::filesystem::path(argv[2]);
+        outputDirectory = std::filesystem::path(positionalArgs[1]);
         spdlog::debug("Creating output directory: {}", outputDirectory.value().string());
         std::filesystem::create_directories(outputDirectory.value());
     }
@@ -72,62 +158,42 @@ int main(int argc, char *argv[]) {
 
     // -----------
 
-    // Read lines of JSON from standard input.
-    // Format:
-    // { "text": "Text to synthesize", "mimic3": { "output_path": "/optional/path/to/file.wav" } }
-    //
     std::size_t lineIndex = 0;
-    std::string line;
-    while (getline(std::cin, line)) {
-        std::stringstream lineStream(line);
-        mimic3::mimic3_Request request;
-        mimic3::parseRequest(lineStream, request);
-        mimic3::phonemize(request);
-        mimic3::phonemes2ids(request, idMap);
-
-        if (!request.outputPath) {
-            // Path to output WAV file
-            std::stringstream outputName;
-            outputName << lineIndex << ".wav";
-
-            if (outputDirectory.has_value()) {
-                // Relative to output directory
-                request.outputPath = outputDirectory;
-                request.outputPath.value().append(outputName.str());
-            } else {
-                // Relative to current directory
-                request.outputPath = std::filesystem::path(outputName.str());
+
+    if (binaryRequests) {
+        // Read binary request frames from standard input (see readBinaryRequest).
+        // Each response is an audio frame on stdout (see writeAudioFrame).
+        while (true) {
+            mimic3::mimic3_Request request;
+            if (!mimic3::readBinaryRequest(std::cin, request)) {
+                break;
             }
-        }
 
-        if (!request.outputPath) {
-            throw std::runtime_error("No output path for audio");
+            processRequest(session, request, idMap, outputDirectory, lineIndex);
+            lineIndex++;
         }
-
-        auto phonemeIds = &request.phonemeIds.value();
-        if (phonemeIds->empty()) {
-            throw std::runtime_error("Empty phoneme ids");
+    } else {
+        // Read lines of JSON from standard input.
+        // Format:
+        // { "text": "Text to synthesize", "mimic3": { "output_path": "/optional/path/to/file.wav" } }
+        //
+        // If "stream_audio" is true, a binary audio frame is written to stdout
+        // instead of a WAV file (see writeAudioFrame). Otherwise, the request line
+        // is echoed back once the WAV file has been written.
+        //
+        std::string line;
+        while (getline(std::cin, line)) {
+            std::stringstream lineStream(line);
+            mimic3::mimic3_Request request;
+            mimic3::parseRequest(lineStream, request);
+
+            bool wroteAudio = processRequest(session, request, idMap, outputDirectory, lineIndex);
+            lineIndex++;
+
+            if (!wroteAudio) {
+                std::cout << line << std::endl;
+            }
         }
-
-        spdlog::debug("Synthesizing audio with {} phoneme id(s)", phonemeIds->size());
-        auto result = synthesize(
-            session,
-            request.outputPath.value(),
-            phonemeIds,
-            request.noiseScale,
-            request.lengthScale,
-            request.noiseW,
-            /*sampleRate*/ 22050);
-
-        spdlog::info("Real-time factor: {} (infer={}, audio={})",
-                     result.realTimeFactor,
-                     result.inferSeconds,
-                     result.audioSeconds);
-
-        spdlog::info("Wrote {}", request.outputPath.value().string());
-        lineIndex++;
-
-        std::cout << line << std::endl;
     }
 
     mimic3::terminateEspeak();
@@ -1,6 +1,7 @@
 #ifndef PHONEMIZE_H_
 #define PHONEMIZE_H_
 
+#include <algorithm>
 #include <filesystem>
 #include <iostream>
 #include <map>
@@ -76,6 +77,8 @@ namespace mimic3 {
     std::optional<std::vector<char32_t>> phonemes;
     std::optional<std::vector<int64_t>> phonemeIds;
     std::optional<std::filesystem::path> outputPath;
+    uint32_t id = 0;
+    bool streamAudio = false;
     float noiseScale = 0.667f;
     float lengthScale = 1.0f;
     float noiseW = 0.8f;
@@ -90,6 +93,8 @@ namespace mimic3 {
     //   "phonemes": [...],       (optional list of strings)
     //   "phoneme_ids": [...],    (optional list of integers)
     //   "output_path": "...",    (optional WAV path)
+    //   "id": 0,                 (optional request id, echoed in audio frame)
+    //   "stream_audio": false,   (write PCM audio frame to stdout instead of WAV)
     //   "espeak": {
     //      "voice": "en-us"      (override voice)
     //    },
@@ -114,6 +119,9 @@ namespace mimic3 {
       request.outputPath = std::filesystem::path(root["output_path"].asString());
     }
 
+    request.id = root.get("id", 0).asUInt();
+    request.streamAudio = root.get("stream_audio", false).asBool();
+
     if (root.isMember("phonemes")) {
       // TODO
     }
@@ -165,6 +173,60 @@ namespace mimic3 {
 
   }  /* parseRequest */
 
+  // Binary request frame (little-endian):
+  //   char[4] magic ("M3RQ")
+  //   uint32  request id (echoed in audio frame)
+  //   uint32  number of phoneme ids
+  //   int64   speaker id
+  //   float32 noise scale, length scale, noise w
+  //   int64[] phoneme ids
+  //
+  // Audio is always returned over stdout (see writeAudioFrame).
+  const char REQUEST_MAGIC[4] = {'M', '3', 'R', 'Q'};
+
+#pragma pack(push, 1)
+  struct mimic3_RequestHeader {
+    char magic[4];
+    uint32_t id;
+    uint32_t numIds;
+    int64_t speakerId;
+    float noiseScale;
+    float lengthScale;
+    float noiseW;
+  };
+#pragma pack(pop)
+
+  // Returns false at end of input
+  bool readBinaryRequest(std::istream& inputStream, mimic3_Request& request) {
+    mimic3_RequestHeader header;
+    if (!inputStream.read(reinterpret_cast<char*>(&header), sizeof(header))) {
+      return false;
+    }
+
+    if (!std::equal(std::begin(REQUEST_MAGIC), std::end(REQUEST_MAGIC), header.magic)) {
+      spdlog::critical("Bad request frame");
+      throw std::runtime_error("Bad request frame");
+    }
+
+    request.id = header.id;
+    request.streamAudio = true;
+    request.noiseScale = header.noiseScale;
+    request.lengthScale = header.lengthScale;
+    request.noiseW = header.noiseW;
+
+    request.phonemeIds.emplace(header.numIds);
+    auto phonemeIds = &request.phonemeIds.value();
+    if (!inputStream.read(reinterpret_cast<char*>(phonemeIds->data()),
+                          header.numIds * sizeof(int64_t))) {
+      spdlog::critical("Truncated request frame");
+      throw std::runtime_error("Truncated request frame");
+    }
+
+    spdlog::debug("Read {} phoneme id(s) from request", phonemeIds->size());
+
+    return true;
+  }  /* readBinaryRequest */
+
   void phonemize(mimic3_Request& request) {
     if (request.phonemes || request.phonemeIds) {
       spdlog::debug("Request phonemes or ids are already present");
@@ -64,12 +64,12 @@ namespace mimic3 {
     };
 
     mimic3_Result synthesize(mimic3_Session& session,
-                             std::filesystem::path outputPath,
                              std::vector<int64_t>* phonemeIds,
                              float noiseScale,
                              float lengthScale,
                              float noiseW,
-                             int sampleRate) {
+                             int sampleRate,
+                             std::vector<int16_t>& audioOut) {
         mimic3_Result result;
         spdlog::debug("Allocating tensors");
         auto memoryInfo = Ort::MemoryInfo::CreateCpu(OrtAllocatorType::OrtArenaAllocator,
@@ -126,8 +126,7 @@ namespace mimic3 {
             result.realTimeFactor = result.inferSeconds / result.audioSeconds;
         }
 
-        // Write WAV
-        spdlog::debug("Writing WAV file: {}", outputPath.string());
+        // Scale audio to fill range and convert to int16
         float maxAudioValue = 0.01f;
         for (int64_t i = 0; i < audioCount; i++) {
             float audioValue = std::abs(audio[i]);
@@ -136,26 +135,15 @@ namespace mimic3 {
             }
         }
 
-        SF_INFO sfInfo;
-        sfInfo.channels = 1;
-        sfInfo.samplerate = sampleRate;
-        sfInfo.format = SF_FORMAT_WAV | SF_FORMAT_PCM_16;
-
-        SNDFILE* outputFile = sf_open(outputPath.c_str(), SFM_WRITE, &sfInfo);
-
-        // Scale audio to fill range and convert to int16
         float audioScale = (MAX_WAV_VALUE / std::max(0.01f, maxAudioValue));
+        audioOut.resize(audioCount);
         for (int64_t i = 0; i < audioCount; i++) {
-            int16_t intAudioValue = static_cast<int16_t>(
+            audioOut[i] = static_cast<int16_t>(
                 std::clamp(audio[i] * audioScale,
                            static_cast<float>(std::numeric_limits<int16_t>::min()),
                            static_cast<float>(std::numeric_limits<int16_t>::max())));
-
-            sf_write_short(outputFile, &intAudioValue, /*items*/ 1);
         }
 
-        sf_close(outputFile);
-
         // Clean up
         spdlog::debug("Cleaning up");
         for (size_t i = 0; i < outputTensors.size(); i++) {
@@ -168,6 +156,42 @@ namespace mimic3 {
 
         return result;
     }
+
+    void writeWav(std::filesystem::path outputPath,
+                  const std::vector<int16_t>& audio,
+                  int sampleRate) {
+        spdlog::debug("Writing WAV file: {}", outputPath.string());
+
+        SF_INFO sfInfo;
+        sfInfo.channels = 1;
+        sfInfo.samplerate = sampleRate;
+        sfInfo.format = SF_FORMAT_WAV | SF_FORMAT_PCM_16;
+
+        SNDFILE* outputFile = sf_open(outputPath.c_str(), SFM_WRITE, &sfInfo);
+        sf_write_short(outputFile, audio.data(), (sf_count_t)audio.size());
+        sf_close(outputFile);
+    }
+
+    // Response frame for audio written directly to stdout.
+    // All fields are little-endian uint32, followed by numBytes of 16-bit mono PCM.
+    const char AUDIO_MAGIC[4] = {'M', '3', 'A', 'U'};
+
+    void writeAudioFrame(std::ostream& outputStream,
+                         uint32_t requestId,
+                         const std::vector<int16_t>& audio,
+                         int sampleRate) {
+        uint32_t header[3] = {
+            requestId,
+            (uint32_t)sampleRate,
+            (uint32_t)(audio.size() * sizeof(int16_t))
+        };
+
+        outputStream.write(AUDIO_MAGIC, sizeof(AUDIO_MAGIC));
+        outputStream.write(reinterpret_cast<const char*>(header), sizeof(header));
+        outputStream.write(reinterpret_cast<const char*>(audio.data()),
+                           audio.size() * sizeof(int16_t));
+        outputStream.flush();
+    }
 }
 
 #endif // SYNTHESIZE_H_
@@ -18,12 +18,14 @@ import asyncio
 import logging
 import tempfile
 import threading
-from queue import Queue
 
 import hypercorn
 
+from mimic3_tts.registry import VoiceRegistry
+
 from .app import get_app
 from .args import get_args
+from .scheduler import SynthesisScheduler
 from .synthesis import do_synthesis_proc
 
 _LOGGER = logging.getLogger(__name__)
@@ -50,10 +52,20 @@ def main(argv=None):
 
     # Run Web Server
     _LOGGER.info("Starting web server")
-    request_queue = Queue()
+    scheduler = SynthesisScheduler(
+        max_queue_size=args.max_queue_size,
+        max_client_queue_size=args.max_client_queue_size,
+        bulk_interval=args.bulk_interval,
+    )
+
+    # Voices are loaded once and shared by all synthesis threads
+    voice_registry = VoiceRegistry()
+
     threads = [
         threading.Thread(
-            target=do_synthesis_proc, args=(args, request_queue), daemon=True
+            target=do_synthesis_proc,
+            args=(args, scheduler, voice_registry),
+            daemon=True,
         )
         for _ in range(args.num_threads)
     ]
@@ -65,20 +77,17 @@ def main(argv=None):
 
     try:
         with tempfile.TemporaryDirectory(prefix="mimic3") as temp_dir:
-            app = get_app(args, request_queue, temp_dir)
+            app = get_app(args, scheduler, temp_dir)
             asyncio.run(hypercorn.asyncio.serve(app, hyp_config))
     finally:
-        # Drain queue
-        while not request_queue.empty():
-            request_queue.get()
-
-        # Stop request threads
-        for _ in range(args.num_threads):
-            request_queue.put(None)
+        # Drop waiting requests and stop request threads
+        scheduler.close()
 
         for thread in threads:
             thread.join()
 
+        voice_registry.close()
+
 
 # -----------------------------------------------------------------------------
 
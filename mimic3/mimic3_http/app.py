@@ -15,6 +15,7 @@
 #
 import argparse
 import asyncio
+import base64
 import dataclasses
 import json
 import logging
@@ -22,8 +23,9 @@ import re
 import shlex
 import subprocess
 import typing
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from queue import Queue
 from urllib.parse import parse_qs
 from uuid import uuid4
 
@@ -38,21 +40,55 @@ from quart import (
 )
 from swagger_ui import api_doc
 
-from mimic3_tts import DEFAULT_VOICE, Mimic3Settings, Mimic3TextToSpeechSystem
+from mimic3_tts import (
+    DEFAULT_VOICE,
+    AudioResult,
+    Mimic3Settings,
+    Mimic3TextToSpeechSystem,
+)
 from mimic3_tts.download import is_voice_downloaded
+from mimic3_tts.model_process import ModelProcessPool
 from mimic3_tts.utils import LANG_NAMES, SAMPLE_SENTENCES
 
 from ._resources import _DIR, _PACKAGE
 from .args import _MISSING
-from .const import SynthesisRequest, TextToWavParams
+from .cache import WavCache
+from .const import Priority, SynthesisRequest, TextToWavParams
+from .encoding import MIMETYPES, AudioFormat, encode_wav, get_mimetype
+from .scheduler import SchedulerFullError, SynthesisScheduler
+from .synthesis import audio_results_to_wav, make_wav_header, wav_to_audio_result
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def get_app(args: argparse.Namespace, request_queue: Queue, temp_dir: str):
+@dataclass
+class _InFlight:
+    """Synthesis shared by identical concurrent requests"""
+
+    item: SynthesisRequest
+    """Request in the scheduler"""
+
+    num_waiters: int = 1
+    """Number of clients still waiting for the result"""
+
+    is_cached: bool = False
+    """True if the result has been written to the WAV cache"""
+
+
+def get_app(args: argparse.Namespace, scheduler: SynthesisScheduler, temp_dir: str):
     """Create and return Quart application for Mimic 3 HTTP server"""
 
     _TEMP_DIR: typing.Optional[Path] = None
+    _CACHE: typing.Optional[WavCache] = None
+
+    # cache key -> synthesis that identical requests can wait on
+    _IN_FLIGHT: typing.Dict[str, _InFlight] = {}
+    _NUM_COALESCED = 0
+
+    # Encodes compressed audio formats off the event loop
+    _ENCODE_EXECUTOR = ThreadPoolExecutor(
+        max_workers=max(1, args.encode_threads), thread_name_prefix="mimic3_encode"
+    )
 
     _MIMIC3 = Mimic3TextToSpeechSystem(
         Mimic3Settings(voices_directories=args.voices_dir)
@@ -70,11 +106,17 @@ def get_app(args: argparse.Namespace, request_queue: Queue, temp_dir: str):
     if _TEMP_DIR:
         _LOGGER.debug("Cache directory: %s", _TEMP_DIR)
 
-    async def text_to_wav(params: TextToWavParams, no_cache: bool = False) -> bytes:
-        """Synthesize text into audio.
+        max_cache_bytes: typing.Optional[int] = None
+        if args.cache_size is not None:
+            max_cache_bytes = int(args.cache_size * 1024 * 1024)
 
-        Returns: WAV bytes
-        """
+        _CACHE = WavCache(
+            _TEMP_DIR,
+            max_size_bytes=max_cache_bytes,
+            max_memory_bytes=int(args.cache_memory_size * 1024 * 1024),
+        )
+
+    def prepare_params(params: TextToWavParams):
         if args.deterministic:
             # Disable noise
             _LOGGER.debug("Disabling noise in deterministic mode")
@@ -83,35 +125,314 @@ def get_app(args: argparse.Namespace, request_queue: Queue, temp_dir: str):
 
         _LOGGER.debug(params)
 
-        if _TEMP_DIR and (not no_cache):
-            # Look up in cache
-            maybe_wav_path = _TEMP_DIR / f"{params.cache_key}.wav"
-            if maybe_wav_path.is_file():
-                _LOGGER.debug("Loading WAV from cache: %s", maybe_wav_path)
-                wav_bytes = maybe_wav_path.read_bytes()
-                return wav_bytes
+    def get_priority(text: str, priority_str: typing.Optional[str] = None) -> Priority:
+        """Priority from request, or bulk for long texts"""
+        if priority_str:
+            return Priority.from_string(priority_str)
+
+        if (args.bulk_text_length is not None) and (len(text) >= args.bulk_text_length):
+            return Priority.BULK
+
+        return Priority.INTERACTIVE
+
+    def get_client_id() -> str:
+        """Id used to take turns between clients"""
+        return request.headers.get("X-Client-Id") or request.remote_addr or ""
+
+    def get_tts_args(
+        values: typing.Mapping[str, typing.Any],
+    ) -> typing.Dict[str, typing.Any]:
+        """Keyword arguments for TextToWavParams (except text) from request values.
+
+        Names are the same as /api/tts query arguments (noiseScale, etc.).
+        """
+
+        def get_value(name: str) -> typing.Any:
+            value = values.get(name)
+            if value == "":
+                # Empty query argument
+                return None
+
+            return value
+
+        tts_args: typing.Dict[str, typing.Any] = {
+            "length_scale": args.length_scale,
+            "noise_scale": args.noise_scale,
+            "noise_w": args.noise_w,
+            "output_sample_rate": args.output_sample_rate,
+        }
+
+        voice = get_value("voice") or args.voice or DEFAULT_VOICE
+        tts_args["voice"] = str(voice)
+
+        # TTS settings
+        noise_scale = get_value("noiseScale")
+        if noise_scale is not None:
+            tts_args["noise_scale"] = float(noise_scale)
+
+        noise_w = get_value("noiseW")
+        if noise_w is not None:
+            tts_args["noise_w"] = float(noise_w)
+
+        length_scale = get_value("lengthScale")
+        if length_scale is not None:
+            tts_args["length_scale"] = float(length_scale)
+
+        # Post-processing settings
+        volume = get_value("volume")
+        if volume is not None:
+            tts_args["volume"] = float(volume)
+
+        fade_in_ms = get_value("fadeInMs")
+        if fade_in_ms is not None:
+            tts_args["fade_in_ms"] = float(fade_in_ms)
+
+        fade_out_ms = get_value("fadeOutMs")
+        if fade_out_ms is not None:
+            tts_args["fade_out_ms"] = float(fade_out_ms)
+
+        output_sample_rate = get_value("sampleRate")
+        if output_sample_rate is not None:
+            tts_args["output_sample_rate"] = int(output_sample_rate)
+
+        ssml = get_value("ssml")
+        if ssml is not None:
+            tts_args["ssml"] = _to_bool(str(ssml))
+
+        text_language = get_value("textLanguage")
+        if text_language is not None:
+            tts_args["text_language"] = str(text_language)
+
+        # Id used for cache
+        cache_id = get_value("cacheId")
+        if cache_id is not None:
+            tts_args["cache_id"] = str(cache_id)
+
+        return tts_args
+
+    async def get_cached_wav(
+        params: TextToWavParams, suffix: str = ""
+    ) -> typing.Optional[bytes]:
+        """Look up WAV bytes in cache, reading from disk in a thread.
+
+        With a suffix (e.g., .flac), encoded audio is looked up instead.
+        """
+        if _CACHE is None:
+            return None
+
+        cache_key = params.cache_key + suffix
+        wav_bytes = _CACHE.get_from_memory(cache_key)
+        if wav_bytes is not None:
+            return wav_bytes
 
         loop = asyncio.get_running_loop()
-        future = loop.create_future()
-        request_queue.put_nowait(
-            SynthesisRequest(
-                params=params,
-                loop=loop,
-                future=future,
-            )
+        return await loop.run_in_executor(None, _CACHE.get, cache_key)
+
+    async def cache_wav(params: TextToWavParams, wav_bytes: bytes, suffix: str = ""):
+        """Store WAV bytes (or encoded audio) in cache, writing to disk in a thread"""
+        if _CACHE is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None, _CACHE.put, params.cache_key + suffix, wav_bytes
         )
-        wav_bytes = await future
 
-        if _TEMP_DIR and (not no_cache):
-            # Store in cache
-            wav_path = _TEMP_DIR / f"{params.cache_key}.wav"
-            wav_path.parent.mkdir(parents=True, exist_ok=True)
-            wav_path.write_bytes(wav_bytes)
+    async def text_to_wav(
+        params: TextToWavParams,
+        no_cache: bool = False,
+        priority: Priority = Priority.INTERACTIVE,
+        client_id: str = "",
+    ) -> bytes:
+        """Synthesize text into audio.
+
+        Identical requests that arrive while the first one is being
+        synthesized wait for the same result (unless no_cache is set).
 
-            _LOGGER.debug("Cached WAV at %s", wav_path.absolute())
+        Returns: WAV bytes
+        """
+        nonlocal _NUM_COALESCED
+
+        prepare_params(params)
+
+        if no_cache:
+            item = submit_wav_request(params, priority, client_id)
+            assert item.future is not None
+
+            try:
+                return await item.future
+            except asyncio.CancelledError:
+                # Client disconnected
+                scheduler.cancel(item)
+                raise
+
+        cache_key = params.cache_key
+        maybe_wav_bytes = await get_cached_wav(params)
+        if maybe_wav_bytes is not None:
+            return maybe_wav_bytes
+
+        in_flight = _IN_FLIGHT.get(cache_key)
+        if in_flight is None:
+            in_flight = _InFlight(item=submit_wav_request(params, priority, client_id))
+            _IN_FLIGHT[cache_key] = in_flight
+        else:
+            # Wait for identical request
+            in_flight.num_waiters += 1
+            _NUM_COALESCED += 1
+            _LOGGER.debug("Coalesced request: %s", cache_key)
+
+        future = in_flight.item.future
+        assert future is not None
+
+        def remove_in_flight():
+            # A newer synthesis may have replaced this one
+            if _IN_FLIGHT.get(cache_key) is in_flight:
+                _IN_FLIGHT.pop(cache_key)
+
+        try:
+            # Shielded so one client disconnecting doesn't cancel the others
+            wav_bytes = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            in_flight.num_waiters -= 1
+            if in_flight.num_waiters < 1:
+                # Last client disconnected
+                if not future.done():
+                    scheduler.cancel(in_flight.item)
+                    future.cancel()
+
+                remove_in_flight()
+
+            raise
+        except Exception:
+            remove_in_flight()
+            raise
+
+        if not in_flight.is_cached:
+            # First waiter to get the result caches it.
+            # Requests that arrive until then still share the result.
+            in_flight.is_cached = True
+            try:
+                await cache_wav(params, wav_bytes)
+            finally:
+                remove_in_flight()
 
         return wav_bytes
 
+    def submit_wav_request(
+        params: TextToWavParams, priority: Priority, client_id: str
+    ) -> SynthesisRequest:
+        """Add request for WAV bytes to the scheduler"""
+        loop = asyncio.get_running_loop()
+        item = SynthesisRequest(
+            params=params,
+            loop=loop,
+            future=loop.create_future(),
+            priority=priority,
+            client_id=client_id,
+        )
+        scheduler.submit(item)
+
+        return item
+
+    async def text_to_audio(
+        params: TextToWavParams,
+        audio_format: AudioFormat,
+        no_cache: bool = False,
+        priority: Priority = Priority.INTERACTIVE,
+        client_id: str = "",
+    ) -> typing.Tuple[bytes, str]:
+        """Synthesize text into audio of a given format.
+
+        Compressed audio is cached next to the WAV, so it's only encoded once.
+
+        Returns: (audio bytes, MIME type)
+        """
+        if audio_format.is_compressed and (not no_cache):
+            prepare_params(params)
+            maybe_audio_bytes = await get_cached_wav(params, audio_format.suffix)
+            if maybe_audio_bytes is not None:
+                return maybe_audio_bytes, get_mimetype(audio_format, b"")
+
+        wav_bytes = await text_to_wav(
+            params, no_cache=no_cache, priority=priority, client_id=client_id
+        )
+        mimetype = get_mimetype(audio_format, wav_bytes)
+
+        if not audio_format.is_compressed:
+            return encode_wav(wav_bytes, audio_format), mimetype
+
+        loop = asyncio.get_running_loop()
+        audio_bytes = await loop.run_in_executor(
+            _ENCODE_EXECUTOR, encode_wav, wav_bytes, audio_format, args.ffmpeg_program
+        )
+
+        if not no_cache:
+            await cache_wav(params, audio_bytes, audio_format.suffix)
+
+        return audio_bytes, mimetype
+
+    def get_audio_format() -> AudioFormat:
+        """Output format from ?format or Accept header (default: WAV)"""
+        format_str = request.args.get("format")
+        if format_str:
+            return AudioFormat.from_string(format_str)
+
+        best_mimetype = request.accept_mimetypes.best_match(
+            list(MIMETYPES), default="audio/wav"
+        )
+
+        return MIMETYPES.get(best_mimetype, AudioFormat.WAV)
+
+    async def text_to_audio_stream(
+        params: TextToWavParams,
+        no_cache: bool = False,
+        priority: Priority = Priority.INTERACTIVE,
+        client_id: str = "",
+    ) -> typing.AsyncGenerator[AudioResult, None]:
+        """Synthesize text into audio, yielding each sentence as it's ready"""
+        prepare_params(params)
+
+        if not no_cache:
+            maybe_wav_bytes = await get_cached_wav(params)
+            if maybe_wav_bytes is not None:
+                yield wav_to_audio_result(maybe_wav_bytes)
+                return
+
+        loop = asyncio.get_running_loop()
+        audio_queue: "asyncio.Queue[typing.Any]" = asyncio.Queue()
+        item = SynthesisRequest(
+            params=params,
+            loop=loop,
+            audio_queue=audio_queue,
+            priority=priority,
+            client_id=client_id,
+        )
+        scheduler.submit(item)
+
+        results: typing.List[AudioResult] = []
+        is_complete = False
+        try:
+            while True:
+                result = await audio_queue.get()
+                if result is None:
+                    # End of audio
+                    is_complete = True
+                    break
+
+                if isinstance(result, Exception):
+                    is_complete = True
+                    raise result
+
+                results.append(result)
+                yield result
+        finally:
+            if not is_complete:
+                # Client disconnected
+                scheduler.cancel(item)
+
+        if results and (not no_cache):
+            await cache_wav(params, audio_results_to_wav(results))
+
     # -----------------------------------------------------------------------------
 
     _TEMPLATES_DIR = _DIR / "templates"
@@ -132,6 +453,49 @@ def get_app(args: argparse.Namespace, request_queue: Queue, temp_dir: str):
     def _to_bool(s: str) -> bool:
         return s.strip().lower() in {"true", "1", "yes", "on"}
 
+    async def stream_response(
+        results: typing.AsyncGenerator[AudioResult, None], raw_pcm: bool = False
+    ) -> Response:
+        """Response that sends audio as it's synthesized (chunked transfer).
+
+        Waits for the first result so errors before any audio produce a 500.
+        """
+        first_result: typing.Optional[AudioResult] = None
+        async for first_result in results:
+            break
+
+        sample_rate = first_result.sample_rate_hz if first_result else 22050
+        sample_width = first_result.sample_width_bytes if first_result else 2
+        num_channels = first_result.num_channels if first_result else 1
+
+        async def audio_chunks():
+            if not raw_pcm:
+                yield make_wav_header(sample_rate, sample_width, num_channels)
+
+            if first_result is None:
+                return
+
+            yield first_result.audio_bytes
+
+            try:
+                async for result in results:
+                    yield result.audio_bytes
+            except Exception:
+                # Too late to change the status code
+                _LOGGER.exception("Error while streaming audio")
+            finally:
+                # Cancels synthesis if the client disconnected
+                await results.aclose()
+
+        if raw_pcm:
+            mimetype = (
+                f"audio/L{sample_width * 8};rate={sample_rate};channels={num_channels}"
+            )
+        else:
+            mimetype = "audio/wav"
+
+        return Response(audio_chunks(), mimetype=mimetype)
+
     class VoiceEncoder(json.JSONEncoder):
         """Encode a voice to JSON"""
 
@@ -168,46 +532,16 @@ def get_app(args: argparse.Namespace, request_queue: Queue, temp_dir: str):
     @app.route("/api/tts", methods=["GET", "POST"])
     async def app_tts() -> typing.Union[Response, str]:
         """Speak text to WAV."""
-        tts_args: typing.Dict[str, typing.Any] = {
-            "length_scale": args.length_scale,
-            "noise_scale": args.noise_scale,
-            "noise_w": args.noise_w,
-        }
-
         _LOGGER.debug("Request args: %s", request.args)
 
-        voice = request.args.get("voice") or args.voice or DEFAULT_VOICE
-        tts_args["voice"] = str(voice)
+        tts_args = get_tts_args(request.args)
 
-        # TTS settings
-        noise_scale = request.args.get("noiseScale")
-        if noise_scale:
-            tts_args["noise_scale"] = float(noise_scale)
-
-        noise_w = request.args.get("noiseW")
-        if noise_w:
-            tts_args["noise_w"] = float(noise_w)
-
-        length_scale = request.args.get("lengthScale")
-        if length_scale:
-            tts_args["length_scale"] = float(length_scale)
-
-        # Set SSML flag either from arg or content type
-        ssml_str = request.args.get("ssml")
-        if ssml_str:
-            tts_args["ssml"] = _to_bool(ssml_str)
-        elif request.content_type == "application/ssml+xml":
+        # Set SSML flag from content type if not in args
+        if ("ssml" not in tts_args) and (
+            request.content_type == "application/ssml+xml"
+        ):
             tts_args["ssml"] = True
 
-        text_language = request.args.get("textLanguage")
-        if text_language:
-            tts_args["text_language"] = str(text_language)
-
-        # Id used for cache
-        cache_id = request.args.get("cacheId")
-        if cache_id:
-            tts_args["cache_id"] = str(cache_id)
-
         # Text can come from POST body or GET ?text arg
         if request.method == "POST":
             text = (await request.data).decode()
@@ -223,13 +557,52 @@ def get_app(args: argparse.Namespace, request_queue: Queue, temp_dir: str):
         no_cache_str = request.args.get("noCache", "")
         no_cache = _to_bool(no_cache_str)
 
-        wav_bytes = await text_to_wav(
-            TextToWavParams(text=text, **tts_args), no_cache=no_cache
-        )
-
         audio_target = request.args.get("audioTarget", "client").strip().lower()
+
+        # Stream audio as each sentence is synthesized (wav or pcm)
+        stream_format = request.args.get("stream", "").strip().lower()
+        if stream_format and (stream_format not in ("wav", "pcm")):
+            stream_format = "wav" if _to_bool(stream_format) else ""
+
+        # Interactive or bulk (default: based on text length)
+        priority = get_priority(text, request.args.get("priority"))
+        client_id = get_client_id()
+
+        # Compressed formats are sent when complete
+        audio_format = get_audio_format()
+        if audio_format.is_compressed:
+            stream_format = ""
+        elif stream_format and (audio_format == AudioFormat.PCM):
+            stream_format = "pcm"
+
+        if stream_format and (audio_target == "client"):
+            return await stream_response(
+                text_to_audio_stream(
+                    TextToWavParams(text=text, **tts_args),
+                    no_cache=no_cache,
+                    priority=priority,
+                    client_id=client_id,
+                ),
+                raw_pcm=(stream_format == "pcm"),
+            )
+
         if audio_target == "client":
-            return Response(wav_bytes, mimetype="audio/wav")
+            audio_bytes, mimetype = await text_to_audio(
+                TextToWavParams(text=text, **tts_args),
+                audio_format,
+                no_cache=no_cache,
+                priority=priority,
+                client_id=client_id,
+            )
+
+            return Response(audio_bytes, mimetype=mimetype)
+
+        wav_bytes = await text_to_wav(
+            TextToWavParams(text=text, **tts_args),
+            no_cache=no_cache,
+            priority=priority,
+            client_id=client_id,
+        )
 
         # Play audio on server
         play_cmd = shlex.split(args.play_program)
@@ -237,6 +610,145 @@ def get_app(args: argparse.Namespace, request_queue: Queue, temp_dir: str):
 
         return "OK"
 
+    @app.route("/api/tts/batch", methods=["POST"])
+    async def app_tts_batch() -> Response:
+        """Speak a list of texts, sending each result as soon as it's ready.
+
+        Body is a JSON list of items, or an object with an "items" list. Items
+        are texts or objects with "text" and the same settings as /api/tts
+        query arguments (voice, lengthScale, etc.). Settings in the query and
+        outside of "items" apply to every item.
+        """
+        batch = await request.get_json(force=True)
+        defaults: typing.Dict[str, typing.Any] = dict(request.args)
+        if isinstance(batch, dict):
+            defaults.update((k, v) for k, v in batch.items() if k != "items")
+            batch = batch.get("items", [])
+
+        if not isinstance(batch, list):
+            raise ValueError("Expected a list of items")
+
+        if (args.max_batch_size is not None) and (len(batch) > args.max_batch_size):
+            raise ValueError(
+                f"Too many items in batch ({len(batch)} > {args.max_batch_size})"
+            )
+
+        items: typing.List[typing.Dict[str, typing.Any]] = []
+        for item in batch:
+            if not isinstance(item, dict):
+                item = {"text": item}
+
+            items.append({**defaults, **item})
+
+        # Validate all items before synthesizing any of them
+        batch_params: typing.List[TextToWavParams] = []
+        for item in items:
+            text = str(item.get("text", ""))
+            assert text, "No text provided"
+
+            if args.max_text_length is not None:
+                text = text[: args.max_text_length]
+
+            batch_params.append(TextToWavParams(text=text, **get_tts_args(item)))
+
+        no_cache = _to_bool(str(defaults.get("noCache", "")))
+        priority = Priority.from_string(str(defaults.get("priority") or "bulk"))
+        client_id = get_client_id()
+
+        # Multipart or NDJSON (default)
+        batch_format = str(request.args.get("format", "")).strip().lower()
+        if (not batch_format) and (
+            "multipart/mixed" in request.headers.get("Accept", "")
+        ):
+            batch_format = "multipart"
+
+        boundary = uuid4().hex
+
+        # Keep every synthesis thread busy without filling the scheduler queue
+        max_pending = asyncio.Semaphore(max(1, 2 * args.num_threads))
+        finished_queue: "asyncio.Queue[typing.Tuple[int, typing.Any]]" = asyncio.Queue()
+
+        async def synthesize_item(index: int, params: TextToWavParams):
+            async with max_pending:
+                try:
+                    wav_bytes = await text_to_wav(
+                        params,
+                        no_cache=no_cache,
+                        priority=priority,
+                        client_id=client_id,
+                    )
+                    finished_queue.put_nowait((index, wav_bytes))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    _LOGGER.exception("Error in batch item %s", index)
+                    finished_queue.put_nowait((index, e))
+
+        tasks = [
+            asyncio.ensure_future(synthesize_item(index, params))
+            for index, params in enumerate(batch_params)
+        ]
+
+        def item_id(index: int) -> typing.Any:
+            return items[index].get("id", index)
+
+        async def batch_chunks():
+            try:
+                for _ in range(len(tasks)):
+                    index, result = await finished_queue.get()
+                    if batch_format == "multipart":
+                        yield batch_part(index, result)
+                    else:
+                        yield batch_line(index, result)
+
+                if batch_format == "multipart":
+                    yield f"--{boundary}--\r\n".encode()
+            finally:
+                # Cancels synthesis if the client disconnected
+                for task in tasks:
+                    task.cancel()
+
+        def batch_line(index: int, result: typing.Any) -> bytes:
+            """JSON object with base64 PCM audio or error"""
+            line: typing.Dict[str, typing.Any] = {"index": index, "id": item_id(index)}
+            if isinstance(result, Exception):
+                line["error"] = f"{result.__class__.__name__}: {result}"
+            else:
+                audio_result = wav_to_audio_result(result)
+                line["sample_rate"] = audio_result.sample_rate_hz
+                line["sample_width"] = audio_result.sample_width_bytes
+                line["channels"] = audio_result.num_channels
+                line["audio"] = base64.b64encode(audio_result.audio_bytes).decode()
+
+            return (json.dumps(line) + "\n").encode()
+
+        def batch_part(index: int, result: typing.Any) -> bytes:
+            """Multipart part with WAV audio or error"""
+            if isinstance(result, Exception):
+                content_type = "text/plain"
+                body = f"{result.__class__.__name__}: {result}".encode()
+            else:
+                content_type = "audio/wav"
+                body = result
+
+            headers = (
+                f"--{boundary}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"X-Batch-Index: {index}\r\n"
+                f"X-Batch-Id: {item_id(index)}\r\n"
+                "\r\n"
+            )
+
+            return headers.encode() + body + b"\r\n"
+
+        if batch_format == "multipart":
+            mimetype = f"multipart/mixed; boundary={boundary}"
+        else:
+            mimetype = "application/x-ndjson"
+
+        return Response(batch_chunks(), mimetype=mimetype)
+
     @app.route("/api/voices", methods=["GET"])
     async def api_voices():
         voices_by_key = {v.key: v for v in _MIMIC3.get_voices()}
@@ -301,7 +813,10 @@ def get_app(args: argparse.Namespace, request_queue: Queue, temp_dir: str):
                 length_scale=args.length_scale,
                 noise_scale=args.noise_scale,
                 noise_w=args.noise_w,
-            )
+                output_sample_rate=args.output_sample_rate,
+            ),
+            priority=get_priority(text),
+            client_id=get_client_id(),
         )
 
         return Response(wav_bytes, mimetype="audio/wav")
@@ -332,6 +847,58 @@ def get_app(args: argparse.Namespace, request_queue: Queue, temp_dir: str):
 
         return "\n".join(lines)
 
+    @app.route("/api/metrics", methods=["GET"])
+    async def api_metrics():
+        """Restart counts and latency of loaded voice models"""
+        return jsonify(
+            [dataclasses.asdict(m) for m in ModelProcessPool.get_all_metrics()]
+        )
+
+    @app.route("/api/cache", methods=["GET"])
+    async def api_cache():
+        """Hit, miss, and eviction counts of the WAV cache and synthesis caches"""
+        cache_stats: typing.Dict[str, typing.Any] = {}
+        if _CACHE is not None:
+            wav_stats = _CACHE.stats
+            cache_stats["wav"] = {
+                **dataclasses.asdict(wav_stats),
+                "hit_rate": wav_stats.hit_rate,
+            }
+
+        for cache_name, stats in Mimic3TextToSpeechSystem.get_cache_stats().items():
+            cache_stats[cache_name] = {
+                **dataclasses.asdict(stats),
+                "hit_rate": stats.hit_rate,
+            }
+
+        cache_stats["phonemizers"] = {
+            stats.phonemizer: {
+                **dataclasses.asdict(stats),
+                "mean_phonemize_ms": stats.mean_phonemize_ms,
+            }
+            for stats in Mimic3TextToSpeechSystem.get_phonemizer_stats()
+        }
+
+        return jsonify(cache_stats)
+
+    @app.route("/api/scheduler", methods=["GET"])
+    async def api_scheduler():
+        """Queue depth, cancellations, and wait vs. synthesis time by priority"""
+        scheduler_stats: typing.Dict[str, typing.Any] = {
+            priority.name.lower(): {
+                **dataclasses.asdict(stats),
+                "mean_wait_ms": stats.mean_wait_ms,
+                "mean_synthesis_ms": stats.mean_synthesis_ms,
+            }
+            for priority, stats in scheduler.stats.items()
+        }
+
+        # Requests that shared an identical in-flight synthesis
+        scheduler_stats["coalesced"] = _NUM_COALESCED
+        scheduler_stats["in_flight"] = len(_IN_FLIGHT)
+
+        return jsonify(scheduler_stats)
+
     @app.route("/api/healthcheck", methods=["GET"])
     async def api_healthcheck():
         """Endpoint to check health status"""
@@ -352,6 +919,14 @@ def get_app(args: argparse.Namespace, request_queue: Queue, temp_dir: str):
             _LOGGER.exception("Error setting up swagger UI page")
             show_openapi = False
 
+    @app.errorhandler(SchedulerFullError)
+    async def handle_scheduler_full(
+        err,
+    ) -> typing.Tuple[str, int, typing.Dict[str, str]]:
+        """Tell client to try again later."""
+        _LOGGER.warning(err)
+        return (f"{err.__class__.__name__}: {err}", 503, {"Retry-After": "1"})
+
     @app.errorhandler(Exception)
     async def handle_error(err) -> typing.Tuple[str, int]:
         """Return error as text."""
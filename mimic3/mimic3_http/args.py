@@ -56,12 +56,28 @@ def get_args(argv=None) -> argparse.Namespace:
         type=float,
         help="Variation in cadence [0-1], default is 0.8",
     )
+    parser.add_argument(
+        "--output-sample-rate",
+        type=int,
+        help="Resample audio to this rate in Hertz, e.g. 48000 (default: voice sample rate)",
+    )
     parser.add_argument(
         "--cache-dir",
         nargs="?",
         default=_MISSING,
         help="Enable WAV cache with optional directory (default: no cache)",
     )
+    parser.add_argument(
+        "--cache-size",
+        type=float,
+        help="Maximum size of WAV cache in megabytes (default: no limit)",
+    )
+    parser.add_argument(
+        "--cache-memory-size",
+        type=float,
+        default=16,
+        help="Megabytes of recently used WAV cache entries to keep in memory (default: 16)",
+    )
     parser.add_argument(
         "--preload-voice", action="append", help="Preload voice when starting up"
     )
@@ -81,11 +97,73 @@ def get_args(argv=None) -> argparse.Namespace:
         default=1,
         help="Number of synthesis threads (default: 1)",
     )
+    parser.add_argument(
+        "--max-queue-size",
+        type=int,
+        default=64,
+        help="Maximum number of requests waiting for synthesis before responding with 503 (default: 64)",
+    )
+    parser.add_argument(
+        "--max-client-queue-size",
+        type=int,
+        help="Maximum number of waiting requests from a single client (default: no limit)",
+    )
+    parser.add_argument(
+        "--bulk-text-length",
+        type=int,
+        default=1000,
+        help="Requests with at least this many characters of text are bulk priority unless ?priority is given (default: 1000)",
+    )
+    parser.add_argument(
+        "--bulk-interval",
+        type=int,
+        default=4,
+        help="Let one bulk request through after this many interactive requests (default: 4)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=("subprocess", "onnx"),
+        default="subprocess",
+        help="Run voice models in the mimic3 program or in-process with onnxruntime (default: subprocess)",
+    )
+    parser.add_argument(
+        "--workers-per-voice",
+        type=int,
+        default=1,
+        help="Number of model processes per loaded voice (default: 1)",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        help="Maximum number of model processes across all voices (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--model-timeout",
+        type=float,
+        default=30.0,
+        help="Seconds without progress before a model process is restarted (default: 30)",
+    )
+    parser.add_argument(
+        "--phonemes-cache-size",
+        type=int,
+        default=1024,
+        help="Number of texts whose phonemes are cached in memory (default: 1024)",
+    )
+    parser.add_argument(
+        "--phonemes-cache-file",
+        help="JSON file to load cached phonemes from and save them to on exit",
+    )
     parser.add_argument(
         "--max-text-length",
         type=int,
         help="Maximum length of input text to process (default: no limit)",
     )
+    parser.add_argument(
+        "--max-batch-size",
+        type=int,
+        default=1000,
+        help="Maximum number of items in a /api/tts/batch request (default: 1000)",
+    )
     parser.add_argument(
         "--default-voice",
         help="Default voice key to select in web interface",
@@ -93,6 +171,17 @@ def get_args(argv=None) -> argparse.Namespace:
     parser.add_argument(
         "--play-program", default="aplay -q", help="Program to play WAV audio on server"
     )
+    parser.add_argument(
+        "--ffmpeg-program",
+        default="ffmpeg",
+        help="Program used to encode FLAC and Opus audio (default: ffmpeg)",
+    )
+    parser.add_argument(
+        "--encode-threads",
+        type=int,
+        default=2,
+        help="Number of threads encoding FLAC and Opus audio (default: 2)",
+    )
     parser.add_argument(
         "--no-show-openapi", action="store_true", help="Don't show OpenAPI link"
     )
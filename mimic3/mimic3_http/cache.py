@@ -0,0 +1,309 @@
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""Size-bounded cache of synthesized WAV files"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import typing
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+from mimic3_tts.cache import CacheStats
+
+_LOGGER = logging.getLogger(__name__)
+
+_WAV_SUFFIX = ".wav"
+_TEMP_SUFFIX = ".tmp"
+
+# Audio encoded in other formats is cached next to its WAV file.
+# Keys for these entries end with the suffix (e.g., <key>.flac).
+ENCODED_SUFFIXES = (".flac", ".ogg")
+
+# -----------------------------------------------------------------------------
+
+
+@dataclass
+class WavCacheStats(CacheStats):
+    """Counters for a WAV cache and its in-memory tier (sizes are in bytes)"""
+
+    memory_hits: int = 0
+    """Number of hits served from memory without reading from disk"""
+
+    memory_entries: int = 0
+    """Number of entries currently held in memory"""
+
+    memory_size: int = 0
+    """Total size of entries held in memory"""
+
+    max_memory_size: int = 0
+    """Size limit of entries held in memory"""
+
+
+@dataclass
+class _CacheEntry:
+    path: Path
+    size_bytes: int
+
+
+class WavCache:
+    """WAV files on disk, sharded into subdirectories and evicted LRU by size.
+
+    The index of cached files is loaded once at startup and kept in memory, so
+    lookups don't touch the file system unless there is a hit. Files are
+    written to a temporary file and renamed into place, so readers never see a
+    partial WAV.
+
+    Recently used WAV bytes are also kept in memory, up to max_memory_bytes,
+    and can be fetched with get_from_memory without any file I/O.
+    """
+
+    def __init__(
+        self,
+        cache_dir: typing.Union[str, Path],
+        max_size_bytes: typing.Optional[int] = None,
+        max_memory_bytes: int = 0,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = max_size_bytes
+        self.max_memory_bytes = max_memory_bytes
+
+        # key -> entry, least recently used first
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+
+        # key -> WAV bytes, least recently used first
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size_bytes = 0
+
+        self._stats = WavCacheStats(
+            max_size=max_size_bytes, max_memory_size=max_memory_bytes
+        )
+        self._lock = threading.Lock()
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+        with self._lock:
+            self._evict()
+
+    @property
+    def stats(self) -> WavCacheStats:
+        """Snapshot of cache counters"""
+        with self._lock:
+            return WavCacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                num_entries=len(self._entries),
+                size=self._stats.size,
+                max_size=self.max_size_bytes,
+                memory_hits=self._stats.memory_hits,
+                memory_entries=len(self._memory),
+                memory_size=self._memory_size_bytes,
+                max_memory_size=self.max_memory_bytes,
+            )
+
+    def get_from_memory(self, key: str) -> typing.Optional[bytes]:
+        """Return cached WAV bytes if they're in memory, without counting a miss"""
+        with self._lock:
+            wav_bytes = self._memory.get(key)
+            if wav_bytes is None:
+                return None
+
+            self._memory.move_to_end(key)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+            self._stats.hits += 1
+            self._stats.memory_hits += 1
+
+        return wav_bytes
+
+    def get(self, key: str) -> typing.Optional[bytes]:
+        """Return cached WAV bytes or None (may read from disk)"""
+        wav_bytes = self.get_from_memory(key)
+        if wav_bytes is not None:
+            return wav_bytes
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+
+        try:
+            wav_bytes = entry.path.read_bytes()
+        except OSError:
+            # Removed outside of the cache
+            _LOGGER.warning("Missing cache file: %s", entry.path)
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    self._remove(key)
+
+                self._stats.misses += 1
+
+            return None
+
+        with self._lock:
+            self._stats.hits += 1
+            if self._entries.get(key) is entry:
+                self._put_memory(key, wav_bytes)
+
+        _LOGGER.debug("Loaded WAV from cache: %s", entry.path)
+
+        return wav_bytes
+
+    def put(self, key: str, wav_bytes: bytes):
+        """Store WAV bytes in the cache, evicting old entries if needed"""
+        wav_path = self.get_path(key)
+        wav_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write atomically
+        temp_fd, temp_path = tempfile.mkstemp(dir=wav_path.parent, suffix=_TEMP_SUFFIX)
+        try:
+            with os.fdopen(temp_fd, "wb") as temp_file:
+                temp_file.write(wav_bytes)
+
+            os.replace(temp_path, wav_path)
+        except Exception:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+
+            raise
+
+        with self._lock:
+            old_entry = self._entries.get(key)
+            if old_entry is not None:
+                # Only delete the old file if it was somewhere else
+                self._remove(key, delete_file=(old_entry.path != wav_path))
+
+            self._entries[key] = _CacheEntry(path=wav_path, size_bytes=len(wav_bytes))
+            self._stats.size += len(wav_bytes)
+            self._put_memory(key, wav_bytes)
+            self._evict()
+
+        _LOGGER.debug("Cached WAV at %s", wav_path)
+
+    def get_path(self, key: str) -> Path:
+        """Path where a key's WAV file (or encoded audio) is stored.
+
+        Files are spread over 256 subdirectories so no directory gets large.
+        """
+        base_key, suffix = key, _WAV_SUFFIX
+        for encoded_suffix in ENCODED_SUFFIXES:
+            if key.endswith(encoded_suffix):
+                base_key, suffix = key[: -len(encoded_suffix)], encoded_suffix
+                break
+
+        # Same subdirectory as the WAV file
+        shard = hashlib.md5(base_key.encode()).hexdigest()[:2]
+        return self.cache_dir / shard / f"{base_key}{suffix}"
+
+    # -------------------------------------------------------------------------
+
+    def _load_index(self):
+        """Index existing WAV files, oldest first"""
+        found: typing.List[typing.Tuple[float, str, _CacheEntry]] = []
+        for file_path in self.cache_dir.rglob("*"):
+            if not file_path.is_file():
+                continue
+
+            if file_path.suffix == _TEMP_SUFFIX:
+                # Left over from an interrupted write
+                file_path.unlink()
+                continue
+
+            relative_path = file_path.relative_to(self.cache_dir)
+            if file_path.suffix in ENCODED_SUFFIXES:
+                # Strip shard directory, keep suffix
+                key = str(Path(*relative_path.parts[1:]))
+            elif file_path.suffix != _WAV_SUFFIX:
+                continue
+            elif relative_path.parent == Path("."):
+                # Unsharded file from an older version
+                key = file_path.stem
+            else:
+                # Strip shard directory
+                key = str(Path(*relative_path.parts[1:]).with_suffix(""))
+
+            file_stat = file_path.stat()
+            found.append(
+                (
+                    file_stat.st_mtime,
+                    key,
+                    _CacheEntry(path=file_path, size_bytes=file_stat.st_size),
+                )
+            )
+
+        found.sort(key=lambda f: f[0])
+
+        with self._lock:
+            for _mtime, key, entry in found:
+                self._entries[key] = entry
+                self._stats.size += entry.size_bytes
+
+        _LOGGER.debug(
+            "Loaded cache index from %s (%s file(s))", self.cache_dir, len(found)
+        )
+
+    def _evict(self):
+        """Remove least recently used entries until under size limit (_lock held)"""
+        if self.max_size_bytes is None:
+            return
+
+        while self._entries and (self._stats.size > self.max_size_bytes):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self._stats.evictions += 1
+
+    def _put_memory(self, key: str, wav_bytes: bytes):
+        """Keep WAV bytes in memory, evicting least recently used (_lock held)"""
+        self._remove_memory(key)
+
+        if len(wav_bytes) > self.max_memory_bytes:
+            # Too big to keep in memory
+            return
+
+        self._memory[key] = wav_bytes
+        self._memory_size_bytes += len(wav_bytes)
+
+        while self._memory_size_bytes > self.max_memory_bytes:
+            _old_key, old_wav_bytes = self._memory.popitem(last=False)
+            self._memory_size_bytes -= len(old_wav_bytes)
+
+    def _remove_memory(self, key: str):
+        """Remove WAV bytes from memory (_lock held)"""
+        wav_bytes = self._memory.pop(key, None)
+        if wav_bytes is not None:
+            self._memory_size_bytes -= len(wav_bytes)
+
+    def _remove(self, key: str, delete_file: bool = True):
+        """Remove an entry from the index (_lock held)"""
+        entry = self._entries.pop(key)
+        self._stats.size -= entry.size_bytes
+        self._remove_memory(key)
+
+        if delete_file:
+            try:
+                entry.path.unlink()
+            except OSError:
+                pass
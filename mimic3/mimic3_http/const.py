@@ -17,6 +17,28 @@ import asyncio
 import hashlib
 import typing
 from dataclasses import dataclass
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    """Priority of a synthesis request (lower is served first)"""
+
+    INTERACTIVE = 0
+    """Short prompts that someone is waiting to hear"""
+
+    BULK = 1
+    """Long documents or batch jobs"""
+
+    @staticmethod
+    def from_string(priority_str: str) -> "Priority":
+        """Parse priority name (interactive or bulk)"""
+        try:
+            return Priority[priority_str.strip().upper()]
+        except KeyError as e:
+            names = ", ".join(p.name.lower() for p in Priority)
+            raise ValueError(
+                f"Unknown priority: {priority_str!r} (expected one of: {names})"
+            ) from e
 
 
 @dataclass
@@ -31,6 +53,10 @@ class TextToWavParams:
     ssml: bool = False
     text_language: typing.Optional[str] = None
     cache_id: typing.Optional[str] = None
+    volume: float = 100.0
+    fade_in_ms: float = 0.0
+    fade_out_ms: float = 0.0
+    output_sample_rate: typing.Optional[int] = None
 
     @property
     def cache_key(self) -> str:
@@ -40,11 +66,34 @@ class TextToWavParams:
         return hashlib.md5(repr(self).encode()).hexdigest()
 
 
-@dataclass
+@dataclass(eq=False)
 class SynthesisRequest:
     """Request to synthesize audio from text"""
 
     params: TextToWavParams
 
     loop: asyncio.AbstractEventLoop
-    future: asyncio.Future
+
+    future: typing.Optional[asyncio.Future] = None
+    """Receives complete WAV bytes (when not streaming)"""
+
+    audio_queue: typing.Optional[asyncio.Queue] = None
+    """Receives each AudioResult as it is synthesized, then None or an exception"""
+
+    priority: Priority = Priority.INTERACTIVE
+    """Interactive requests are synthesized before bulk requests"""
+
+    client_id: str = ""
+    """Requests from different clients take turns within a priority"""
+
+    cancelled: bool = False
+    """True if the client is no longer waiting for audio"""
+
+    enqueue_time: typing.Optional[float] = None
+    """perf_counter() when request was added to the scheduler"""
+
+    start_time: typing.Optional[float] = None
+    """perf_counter() when synthesis started"""
+
+    end_time: typing.Optional[float] = None
+    """perf_counter() when synthesis finished"""
@@ -0,0 +1,164 @@
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""Conversion of synthesized WAV audio into other output formats"""
+import logging
+import shlex
+import subprocess
+import typing
+from enum import Enum
+
+from .synthesis import wav_to_audio_result
+
+_LOGGER = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+
+
+class AudioEncodingError(Exception):
+    """Raised when audio can't be converted to the requested format"""
+
+
+class AudioFormat(str, Enum):
+    """Output format of synthesized audio"""
+
+    WAV = "wav"
+    """16-bit mono WAV (no conversion)"""
+
+    PCM = "pcm"
+    """Raw 16-bit mono PCM without a header"""
+
+    FLAC = "flac"
+    """Lossless compression (requires ffmpeg)"""
+
+    OPUS = "opus"
+    """Lossy compression in an Ogg container (requires ffmpeg with libopus)"""
+
+    @property
+    def is_compressed(self) -> bool:
+        """True if audio must be encoded by an external program"""
+        return self in (AudioFormat.FLAC, AudioFormat.OPUS)
+
+    @property
+    def suffix(self) -> str:
+        """File extension"""
+        return _SUFFIXES[self]
+
+    @staticmethod
+    def from_string(format_str: str) -> "AudioFormat":
+        """Parse format name or file extension (e.g., ogg)"""
+        format_str = format_str.strip().lower().lstrip(".")
+        for audio_format, suffix in _SUFFIXES.items():
+            if format_str == suffix[1:]:
+                return audio_format
+
+        return AudioFormat(format_str)
+
+
+_SUFFIXES = {
+    AudioFormat.WAV: ".wav",
+    AudioFormat.PCM: ".pcm",
+    AudioFormat.FLAC: ".flac",
+    AudioFormat.OPUS: ".ogg",
+}
+
+# Accepted MIME types, most preferred first
+MIMETYPES: typing.Dict[str, AudioFormat] = {
+    "audio/wav": AudioFormat.WAV,
+    "audio/x-wav": AudioFormat.WAV,
+    "audio/ogg": AudioFormat.OPUS,
+    "audio/opus": AudioFormat.OPUS,
+    "audio/flac": AudioFormat.FLAC,
+    "audio/x-flac": AudioFormat.FLAC,
+    "audio/L16": AudioFormat.PCM,
+}
+
+# Arguments for ffmpeg after the input
+_FFMPEG_OUTPUT_ARGS = {
+    AudioFormat.FLAC: ["-f", "flac"],
+    # Opus only supports a few sample rates
+    AudioFormat.OPUS: ["-c:a", "libopus", "-b:a", "32k", "-ar", "48000", "-f", "ogg"],
+}
+
+# -----------------------------------------------------------------------------
+
+
+def get_mimetype(audio_format: AudioFormat, wav_bytes: bytes) -> str:
+    """MIME type of audio in a format"""
+    if audio_format == AudioFormat.PCM:
+        audio_result = wav_to_audio_result(wav_bytes)
+        return (
+            f"audio/L{audio_result.sample_width_bytes * 8};"
+            f"rate={audio_result.sample_rate_hz};"
+            f"channels={audio_result.num_channels}"
+        )
+
+    if audio_format == AudioFormat.FLAC:
+        return "audio/flac"
+
+    if audio_format == AudioFormat.OPUS:
+        return "audio/ogg"
+
+    return "audio/wav"
+
+
+def encode_wav(
+    wav_bytes: bytes, audio_format: AudioFormat, ffmpeg_program: str = "ffmpeg"
+) -> bytes:
+    """Convert WAV bytes to another format.
+
+    Compressed formats are encoded with ffmpeg, so this blocks and should be
+    run in a worker thread.
+    """
+    if audio_format == AudioFormat.WAV:
+        return wav_bytes
+
+    if audio_format == AudioFormat.PCM:
+        return wav_to_audio_result(wav_bytes).audio_bytes
+
+    encode_cmd = [
+        *shlex.split(ffmpeg_program),
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-f",
+        "wav",
+        "-i",
+        "pipe:0",
+        *_FFMPEG_OUTPUT_ARGS[audio_format],
+        "pipe:1",
+    ]
+    _LOGGER.debug(encode_cmd)
+
+    try:
+        proc = subprocess.run(
+            encode_cmd,
+            input=wav_bytes,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+    except FileNotFoundError as e:
+        raise AudioEncodingError(
+            f"Program to encode {audio_format.value} not found: {ffmpeg_program}"
+        ) from e
+
+    if proc.returncode != 0:
+        raise AudioEncodingError(
+            f"Failed to encode {audio_format.value}: "
+            + proc.stderr.decode(errors="replace").strip()
+        )
+
+    return proc.stdout
@@ -0,0 +1,293 @@
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""Priority and per-client fair scheduling of synthesis requests"""
+import logging
+import threading
+import time
+import typing
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+from .const import Priority, SynthesisRequest
+
+_LOGGER = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+
+
+class SchedulerFullError(Exception):
+    """Raised when too many requests are waiting for synthesis"""
+
+
+@dataclass
+class SchedulerStats:
+    """Counters for one priority of the synthesis scheduler"""
+
+    submitted: int = 0
+    """Number of requests accepted into the queue"""
+
+    rejected: int = 0
+    """Number of requests refused because the queue was full"""
+
+    cancelled: int = 0
+    """Number of requests cancelled before or during synthesis"""
+
+    completed: int = 0
+    """Number of requests whose synthesis finished (including errors)"""
+
+    queued: int = 0
+    """Number of requests currently waiting"""
+
+    running: int = 0
+    """Number of requests currently being synthesized"""
+
+    total_wait_sec: float = 0.0
+    """Total time that started requests spent in the queue"""
+
+    max_wait_sec: float = 0.0
+    """Longest time that a started request spent in the queue"""
+
+    total_synthesis_sec: float = 0.0
+    """Total time spent synthesizing completed requests"""
+
+    num_started: int = 0
+    """Number of requests taken from the queue by a synthesis thread"""
+
+    @property
+    def mean_wait_ms(self) -> float:
+        if self.num_started < 1:
+            return 0.0
+
+        return 1000 * (self.total_wait_sec / self.num_started)
+
+    @property
+    def mean_synthesis_ms(self) -> float:
+        if self.completed < 1:
+            return 0.0
+
+        return 1000 * (self.total_synthesis_sec / self.completed)
+
+
+class SynthesisScheduler:
+    """Hands synthesis requests from the web server to synthesis threads.
+
+    Interactive requests are served before bulk requests, but one bulk request
+    is let through after every bulk_interval interactive requests so bulk work
+    isn't starved. Within a priority, clients take turns (round robin), so one
+    client submitting many requests doesn't delay everyone else.
+
+    Requests are submitted from the event loop without blocking, and taken by
+    synthesis threads with get(). Cancelled requests are dropped from the queue,
+    or stop at the next sentence if they are already being synthesized.
+    """
+
+    def __init__(
+        self,
+        max_queue_size: typing.Optional[int] = None,
+        max_client_queue_size: typing.Optional[int] = None,
+        bulk_interval: int = 4,
+    ):
+        self.max_queue_size = max_queue_size
+        self.max_client_queue_size = max_client_queue_size
+        self.bulk_interval = max(1, bulk_interval)
+
+        # priority -> client id -> waiting requests.
+        # Clients are rotated to the end after each request is taken.
+        self._queues: typing.Dict[
+            Priority, "OrderedDict[str, typing.Deque[SynthesisRequest]]"
+        ] = {priority: OrderedDict() for priority in Priority}
+
+        self._stats: typing.Dict[Priority, SchedulerStats] = {
+            priority: SchedulerStats() for priority in Priority
+        }
+
+        self._num_queued = 0
+        self._interactive_streak = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @property
+    def stats(self) -> typing.Dict[Priority, SchedulerStats]:
+        """Copy of counters for each priority"""
+        with self._condition:
+            return {
+                priority: SchedulerStats(**vars(stats))
+                for priority, stats in self._stats.items()
+            }
+
+    def submit(self, request: SynthesisRequest):
+        """Add a request to the queue without blocking.
+
+        Raises SchedulerFullError if the queue (or the client's share of it) is
+        full.
+        """
+        with self._condition:
+            if self._closed:
+                raise SchedulerFullError("Server is shutting down")
+
+            stats = self._stats[request.priority]
+            client_queue = self._queues[request.priority].get(request.client_id)
+
+            if (self.max_queue_size is not None) and (
+                self._num_queued >= self.max_queue_size
+            ):
+                stats.rejected += 1
+                raise SchedulerFullError(
+                    f"Too many requests waiting ({self._num_queued})"
+                )
+
+            if (
+                (self.max_client_queue_size is not None)
+                and (client_queue is not None)
+                and (len(client_queue) >= self.max_client_queue_size)
+            ):
+                stats.rejected += 1
+                raise SchedulerFullError(
+                    f"Too many requests waiting for client {request.client_id}"
+                )
+
+            if client_queue is None:
+                client_queue = deque()
+                self._queues[request.priority][request.client_id] = client_queue
+
+            request.enqueue_time = time.perf_counter()
+            client_queue.append(request)
+            self._num_queued += 1
+            stats.submitted += 1
+            stats.queued += 1
+
+            self._condition.notify()
+
+    def cancel(self, request: SynthesisRequest):
+        """Cancel a request (e.g., because the client disconnected).
+
+        Waiting requests are removed from the queue. Running requests are marked
+        so synthesis can stop early.
+        """
+        with self._condition:
+            if request.cancelled or (request.end_time is not None):
+                # Already cancelled or finished
+                return
+
+            request.cancelled = True
+            stats = self._stats[request.priority]
+            stats.cancelled += 1
+
+            if request.start_time is not None:
+                # Synthesis thread will stop at the next sentence
+                return
+
+            client_queues = self._queues[request.priority]
+            client_queue = client_queues.get(request.client_id)
+            if client_queue is None:
+                return
+
+            try:
+                client_queue.remove(request)
+            except ValueError:
+                return
+
+            if not client_queue:
+                del client_queues[request.client_id]
+
+            self._num_queued -= 1
+            stats.queued -= 1
+
+        _LOGGER.debug("Cancelled waiting request from %s", request.client_id)
+
+    def get(self) -> typing.Optional[SynthesisRequest]:
+        """Wait for the next request to synthesize (called by synthesis threads).
+
+        Returns None when the scheduler is closed.
+        """
+        with self._condition:
+            while True:
+                if self._closed:
+                    return None
+
+                request = self._take_next()
+                if request is not None:
+                    request.start_time = time.perf_counter()
+
+                    assert request.enqueue_time is not None
+                    wait_sec = request.start_time - request.enqueue_time
+
+                    stats = self._stats[request.priority]
+                    stats.queued -= 1
+                    stats.running += 1
+                    stats.num_started += 1
+                    stats.total_wait_sec += wait_sec
+                    stats.max_wait_sec = max(stats.max_wait_sec, wait_sec)
+
+                    return request
+
+                self._condition.wait()
+
+    def finished(self, request: SynthesisRequest):
+        """Record that synthesis of a request is done (called by synthesis threads)"""
+        with self._condition:
+            request.end_time = time.perf_counter()
+
+            assert request.start_time is not None
+            stats = self._stats[request.priority]
+            stats.running -= 1
+            stats.completed += 1
+            stats.total_synthesis_sec += request.end_time - request.start_time
+
+    def close(self):
+        """Drop waiting requests and wake up all synthesis threads"""
+        with self._condition:
+            self._closed = True
+
+            for priority, client_queues in self._queues.items():
+                stats = self._stats[priority]
+                for client_queue in client_queues.values():
+                    for request in client_queue:
+                        request.cancelled = True
+                        stats.cancelled += 1
+                        stats.queued -= 1
+
+                client_queues.clear()
+
+            self._num_queued = 0
+            self._condition.notify_all()
+
+    def _take_next(self) -> typing.Optional[SynthesisRequest]:
+        """Remove and return the next request to run (lock must be held)"""
+        interactive = self._queues[Priority.INTERACTIVE]
+        bulk = self._queues[Priority.BULK]
+
+        if interactive and (
+            (not bulk) or (self._interactive_streak < self.bulk_interval)
+        ):
+            # Only count interactive requests that bulk requests waited behind
+            self._interactive_streak = (self._interactive_streak + 1) if bulk else 0
+            client_queues = interactive
+        elif bulk:
+            self._interactive_streak = 0
+            client_queues = bulk
+        else:
+            return None
+
+        # Round robin between clients
+        client_id, client_queue = client_queues.popitem(last=False)
+        request = client_queue.popleft()
+        if client_queue:
+            client_queues[client_id] = client_queue
+
+        self._num_queued -= 1
+
+        return request
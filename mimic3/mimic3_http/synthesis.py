@@ -14,12 +14,13 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 import argparse
+import asyncio
 import io
 import logging
+import struct
 import threading
 import typing
 import wave
-from queue import Queue
 
 from mimic3_tts import (
     AudioResult,
@@ -27,50 +28,77 @@ from mimic3_tts import (
     Mimic3TextToSpeechSystem,
     SSMLSpeaker,
 )
+from mimic3_tts.registry import VoiceRegistry
 
-from .const import SynthesisRequest
+from .const import SynthesisRequest, TextToWavParams
+from .scheduler import SynthesisScheduler
 
 _LOGGER = logging.getLogger(__name__)
 
 
+class SynthesisCancelledError(Exception):
+    """Raised when a request is cancelled during synthesis"""
+
+
+def synthesize_audio(
+    params: TextToWavParams,
+    mimic3: Mimic3TextToSpeechSystem,
+    item: typing.Optional[SynthesisRequest] = None,
+) -> typing.Iterable[AudioResult]:
+    """Synthesize text into audio, yielding each result as soon as it's ready.
+
+    If item is cancelled, synthesis stops before the next sentence.
+    """
+    # Request gets its own settings, so mimic3 is never modified
+    context = mimic3.create_context(
+        voice=params.voice,
+        speaker=None,
+        length_scale=params.length_scale,
+        noise_scale=params.noise_scale,
+        noise_w=params.noise_w,
+        volume=max(0, min(100, params.volume)),
+        fade_in_ms=params.fade_in_ms,
+        fade_out_ms=params.fade_out_ms,
+        output_sample_rate=params.output_sample_rate,
+    )
+
+    if params.ssml:
+        # SSML
+        results = SSMLSpeaker(context).speak(params.text)
+    else:
+        # Plain text
+        context.begin_utterance()
+        context.speak_text(params.text, text_language=params.text_language)
+        results = context.end_utterance()
+
+    for result in results:
+        if (item is not None) and item.cancelled:
+            raise SynthesisCancelledError()
+
+        if isinstance(result, AudioResult):
+            yield result
+
+
 def do_synthesis(item: SynthesisRequest, mimic3: Mimic3TextToSpeechSystem) -> bytes:
     """Synthesize text into audio.
 
     Returns: WAV bytes
     """
-    params = item.params
-    mimic3.speaker = None
-    mimic3.voice = params.voice
-
-    mimic3.settings.length_scale = params.length_scale
-    mimic3.settings.noise_scale = params.noise_scale
-    mimic3.settings.noise_w = params.noise_w
-
     with io.BytesIO() as wav_io:
         wav_file: wave.Wave_write = wave.open(wav_io, "wb")
         wav_params_set = False
 
         with wav_file:
             try:
-                if params.ssml:
-                    # SSML
-                    results = SSMLSpeaker(mimic3).speak(params.text)
-                else:
-                    # Plain text
-                    mimic3.begin_utterance()
-                    mimic3.speak_text(params.text, text_language=params.text_language)
-                    results = mimic3.end_utterance()
-
-                for result in results:
+                for result in synthesize_audio(item.params, mimic3, item):
                     # Add audio to existing WAV file
-                    if isinstance(result, AudioResult):
-                        if not wav_params_set:
-                            wav_file.setframerate(result.sample_rate_hz)
-                            wav_file.setsampwidth(result.sample_width_bytes)
-                            wav_file.setnchannels(result.num_channels)
-                            wav_params_set = True
-
-                        wav_file.writeframes(result.audio_bytes)
+                    if not wav_params_set:
+                        wav_file.setframerate(result.sample_rate_hz)
+                        wav_file.setsampwidth(result.sample_width_bytes)
+                        wav_file.setnchannels(result.num_channels)
+                        wav_params_set = True
+
+                    wav_file.writeframes(result.audio_bytes)
             except Exception as e:
                 if not wav_params_set:
                     # Set default parameters so exception can propagate
@@ -85,8 +113,108 @@ def do_synthesis(item: SynthesisRequest, mimic3: Mimic3TextToSpeechSystem) -> by
         return wav_bytes
 
 
-def do_synthesis_proc(args: argparse.Namespace, request_queue: Queue):
-    """Thread handler for synthesis requests"""
+def do_synthesis_stream(item: SynthesisRequest, mimic3: Mimic3TextToSpeechSystem):
+    """Synthesize text into audio, putting each result on the request's queue"""
+    assert item.audio_queue is not None
+    audio_queue = item.audio_queue
+
+    try:
+        for result in synthesize_audio(item.params, mimic3, item):
+            item.loop.call_soon_threadsafe(audio_queue.put_nowait, result)
+
+        # End of audio
+        item.loop.call_soon_threadsafe(audio_queue.put_nowait, None)
+    except SynthesisCancelledError:
+        _LOGGER.debug("Synthesis cancelled")
+    except Exception as e:
+        _LOGGER.exception("Error during inference")
+        item.loop.call_soon_threadsafe(audio_queue.put_nowait, e)
+
+
+def audio_results_to_wav(results: typing.Iterable[AudioResult]) -> bytes:
+    """Join audio results into a single WAV file"""
+    with io.BytesIO() as wav_io:
+        wav_file: wave.Wave_write = wave.open(wav_io, "wb")
+        wav_params_set = False
+
+        with wav_file:
+            for result in results:
+                if not wav_params_set:
+                    wav_file.setframerate(result.sample_rate_hz)
+                    wav_file.setsampwidth(result.sample_width_bytes)
+                    wav_file.setnchannels(result.num_channels)
+                    wav_params_set = True
+
+                wav_file.writeframes(result.audio_bytes)
+
+        return wav_io.getvalue()
+
+
+def wav_to_audio_result(wav_bytes: bytes) -> AudioResult:
+    """Load a WAV file as a single audio result"""
+    with io.BytesIO(wav_bytes) as wav_io:
+        wav_file: wave.Wave_read = wave.open(wav_io, "rb")
+        with wav_file:
+            return AudioResult(
+                sample_rate_hz=wav_file.getframerate(),
+                sample_width_bytes=wav_file.getsampwidth(),
+                num_channels=wav_file.getnchannels(),
+                audio_bytes=wav_file.readframes(wav_file.getnframes()),
+            )
+
+
+def make_wav_header(
+    sample_rate: int, sample_width: int = 2, num_channels: int = 1
+) -> bytes:
+    """WAV header for audio of unknown length.
+
+    The RIFF and data chunk sizes are set to the maximum, which most players
+    treat as "read until the end of the stream".
+    """
+    unknown_size = 0xFFFFFFFF
+    return b"".join(
+        (
+            b"RIFF",
+            struct.pack("<I", unknown_size),
+            b"WAVE",
+            b"fmt ",
+            struct.pack(
+                "<IHHIIHH",
+                16,  # chunk size
+                1,  # PCM
+                num_channels,
+                sample_rate,
+                sample_rate * sample_width * num_channels,  # byte rate
+                sample_width * num_channels,  # block align
+                sample_width * 8,  # bits per sample
+            ),
+            b"data",
+            struct.pack("<I", unknown_size),
+        )
+    )
+
+
+def _set_future_result(future: "asyncio.Future[bytes]", result: bytes):
+    """Set result unless the future was cancelled (called on main loop)"""
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_future_exception(future: "asyncio.Future[bytes]", exception: Exception):
+    """Set exception unless the future was cancelled (called on main loop)"""
+    if not future.done():
+        future.set_exception(exception)
+
+
+def do_synthesis_proc(
+    args: argparse.Namespace,
+    scheduler: SynthesisScheduler,
+    voice_registry: VoiceRegistry,
+):
+    """Thread handler for synthesis requests.
+
+    Voices are loaded once into voice_registry and shared by all threads.
+    """
     try:
         # Load Mimic 3
         mimic3 = Mimic3TextToSpeechSystem(
@@ -99,7 +227,14 @@ def do_synthesis_proc(args: argparse.Namespace, request_queue: Queue):
                 use_cuda=args.cuda,
                 voices_directories=args.voices_dir,
                 use_deterministic_compute=args.deterministic,
-            )
+                backend=args.backend,
+                workers_per_voice=args.workers_per_voice,
+                max_total_workers=args.max_workers,
+                model_timeout=args.model_timeout if args.model_timeout > 0 else None,
+                phonemes_cache_size=args.phonemes_cache_size,
+                phonemes_cache_path=args.phonemes_cache_file,
+            ),
+            voice_registry=voice_registry,
         )
 
         with mimic3:
@@ -114,23 +249,37 @@ def do_synthesis_proc(args: argparse.Namespace, request_queue: Queue):
             )
 
             while True:
-                item = request_queue.get()
+                item = scheduler.get()
                 if item is None:
-                    # Exit signal
+                    # Scheduler was closed
                     break
 
-                item = typing.cast(SynthesisRequest, item)
-
                 try:
-                    result = do_synthesis(item, mimic3)
+                    if item.audio_queue is not None:
+                        # Stream each audio result
+                        do_synthesis_stream(item, mimic3)
+                        continue
+
+                    assert item.future is not None
+
+                    try:
+                        result = do_synthesis(item, mimic3)
 
-                    # Set result on main loop
-                    item.loop.call_soon_threadsafe(item.future.set_result, result)
-                except Exception as e:
-                    _LOGGER.exception("Error during inference")
+                        # Set result on main loop
+                        item.loop.call_soon_threadsafe(
+                            _set_future_result, item.future, result
+                        )
+                    except SynthesisCancelledError:
+                        _LOGGER.debug("Synthesis cancelled")
+                    except Exception as e:
+                        _LOGGER.exception("Error during inference")
 
-                    # Signal error on main loop
-                    item.loop.call_soon_threadsafe(item.future.set_exception, e)
+                        # Signal error on main loop
+                        item.loop.call_soon_threadsafe(
+                            _set_future_exception, item.future, e
+                        )
+                finally:
+                    scheduler.finished(item)
 
     except Exception:
         _LOGGER.exception("Unexpected error in inference thread")
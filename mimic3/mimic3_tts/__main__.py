@@ -244,6 +244,11 @@ def initialize_tts(state: CommandLineInterfaceState):
                 voices_directories=args.voices_dir,
                 use_cuda=args.cuda,
                 use_deterministic_compute=args.deterministic,
+                backend=args.backend,
+                phonemize_threads=args.phonemize_threads,
+                fade_in_ms=args.fade_in_ms,
+                fade_out_ms=args.fade_out_ms,
+                output_sample_rate=args.output_sample_rate,
             )
         )
 
@@ -581,6 +586,15 @@ def get_remote_wav_bytes(
     if args.noise_w:
         params["noiseW"] = args.noise_w
 
+    if args.fade_in_ms:
+        params["fadeInMs"] = args.fade_in_ms
+
+    if args.fade_out_ms:
+        params["fadeOutMs"] = args.fade_out_ms
+
+    if args.output_sample_rate:
+        params["sampleRate"] = args.output_sample_rate
+
     url = f"{args.remote}/api/tts"
     _LOGGER.debug("Synthesizing text remotely at %s", url)
 
@@ -674,6 +688,23 @@ def get_args(argv=None):
         type=float,
         help="Variation in cadence [0-1], default is 0.8",
     )
+    parser.add_argument(
+        "--fade-in-ms",
+        type=float,
+        default=0.0,
+        help="Milliseconds to fade in each sentence (default: 0)",
+    )
+    parser.add_argument(
+        "--fade-out-ms",
+        type=float,
+        default=0.0,
+        help="Milliseconds to fade out each sentence (default: 0)",
+    )
+    parser.add_argument(
+        "--output-sample-rate",
+        type=int,
+        help="Resample audio to this rate in Hertz, e.g. 48000 (default: voice sample rate)",
+    )
 
     # Miscellaneous
     parser.add_argument(
@@ -711,6 +742,18 @@ def get_args(argv=None):
         action="store_true",
         help="Ensure that the same audio is always synthesized from the same text",
     )
+    parser.add_argument(
+        "--backend",
+        choices=("subprocess", "onnx"),
+        default="subprocess",
+        help="Run voice models in the mimic3 program or in-process with onnxruntime",
+    )
+    parser.add_argument(
+        "--phonemize-threads",
+        type=int,
+        default=0,
+        help="Split text into sentences and phonemize them with this many threads while synthesizing (useful with --stdin-format document)",
+    )
     parser.add_argument("--seed", type=int, help="Set random seed (default: not set)")
     parser.add_argument("--version", action="store_true", help="Print version and exit")
     parser.add_argument(
@@ -0,0 +1,127 @@
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""Post-processing of synthesized 16-bit mono audio"""
+import functools
+import typing
+
+import numpy as np
+
+_INT16_MIN = -32768
+_INT16_MAX = 32767
+
+# Low-pass filter applied before downsampling
+_LOWPASS_TAPS = 101
+_LOWPASS_CUTOFF = 0.92  # fraction of the new Nyquist frequency
+
+# -----------------------------------------------------------------------------
+
+
+def postprocess_audio(
+    audio_bytes: bytes,
+    sample_rate: int,
+    gain: float = 1.0,
+    fade_in_ms: float = 0.0,
+    fade_out_ms: float = 0.0,
+    output_sample_rate: typing.Optional[int] = None,
+) -> typing.Tuple[bytes, int]:
+    """Apply resampling, gain, fades, and clipping to 16-bit mono audio.
+
+    All steps work in place on a single float32 buffer, which is converted back
+    to int16 at the end. If there is nothing to do, audio_bytes is returned
+    as-is without copying.
+
+    Returns: (audio bytes, sample rate)
+    """
+    needs_resample = (output_sample_rate is not None) and (
+        output_sample_rate != sample_rate
+    )
+    if (
+        (gain == 1.0)
+        and (fade_in_ms <= 0)
+        and (fade_out_ms <= 0)
+        and (not needs_resample)
+    ):
+        return audio_bytes, sample_rate
+
+    samples = np.frombuffer(audio_bytes, dtype=np.int16)
+
+    if needs_resample:
+        assert output_sample_rate is not None
+        audio = resample(samples, sample_rate, output_sample_rate)
+        sample_rate = output_sample_rate
+    else:
+        audio = samples.astype(np.float32)
+
+    if gain != 1.0:
+        np.multiply(audio, gain, out=audio)
+
+    if fade_in_ms > 0:
+        fade_in_samples = min(len(audio), int(sample_rate * (fade_in_ms / 1000.0)))
+        if fade_in_samples > 0:
+            audio[:fade_in_samples] *= np.linspace(
+                0.0, 1.0, num=fade_in_samples, endpoint=False, dtype=np.float32
+            )
+
+    if fade_out_ms > 0:
+        fade_out_samples = min(len(audio), int(sample_rate * (fade_out_ms / 1000.0)))
+        if fade_out_samples > 0:
+            audio[-fade_out_samples:] *= np.linspace(
+                1.0, 0.0, num=fade_out_samples, endpoint=False, dtype=np.float32
+            )
+
+    np.clip(audio, _INT16_MIN, _INT16_MAX, out=audio)
+
+    return audio.astype(np.int16).tobytes(), sample_rate
+
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """Resample audio with linear interpolation.
+
+    When downsampling, frequencies above the new Nyquist frequency are first
+    removed with a windowed-sinc low-pass filter to avoid aliasing.
+
+    Returns: float32 samples at the new rate
+    """
+    if len(samples) == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    audio = samples.astype(np.float32)
+    if (to_rate < from_rate) and (len(audio) >= _LOWPASS_TAPS):
+        # Convolving a buffer shorter than the filter would lengthen it
+        audio = np.convolve(audio, _lowpass_filter(from_rate, to_rate), mode="same")
+
+    num_output = max(1, int(round(len(audio) * (to_rate / from_rate))))
+
+    # Position of each output sample in input samples
+    positions = np.arange(num_output, dtype=np.float64)
+    positions *= from_rate / to_rate
+
+    return np.interp(positions, np.arange(len(audio), dtype=np.float64), audio).astype(
+        np.float32
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def _lowpass_filter(from_rate: int, to_rate: int) -> np.ndarray:
+    """Blackman-windowed sinc filter that keeps frequencies below to_rate / 2"""
+    cutoff = _LOWPASS_CUTOFF * (to_rate / 2) / from_rate  # cycles per sample
+    offsets = np.arange(_LOWPASS_TAPS) - ((_LOWPASS_TAPS - 1) / 2)
+    taps = 2 * cutoff * np.sinc(2 * cutoff * offsets) * np.blackman(_LOWPASS_TAPS)
+
+    # Unity gain at 0 Hz
+    taps /= np.sum(taps)
+
+    return taps.astype(np.float32)
@@ -0,0 +1,320 @@
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""Inference backends that turn phoneme ids into audio"""
+import dataclasses
+import logging
+import platform
+import threading
+import time
+import typing
+from abc import ABCMeta, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+
+import numpy as np
+
+from .utils import audio_float_to_int16
+
+if typing.TYPE_CHECKING:
+    # Only imported when the onnx backend is used
+    import onnxruntime
+
+PROVIDERS_TYPE = typing.Sequence[
+    typing.Union[str, typing.Tuple[str, typing.Dict[str, typing.Any]]]
+]
+
+# Number of recent request latencies kept for percentiles
+MAX_LATENCIES = 1000
+
+_LOGGER = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+
+
+class InferenceBackendType(str, Enum):
+    """Available inference backends"""
+
+    SUBPROCESS = "subprocess"
+    """Model runs in the external mimic3 program (see ModelProcessPool)"""
+
+    ONNX = "onnx"
+    """Model runs in this process with onnxruntime (see OnnxBackend)"""
+
+
+@dataclass
+class ModelPoolMetrics:
+    """Health and latency of an inference backend"""
+
+    generator_path: str
+    """Path to voice model"""
+
+    num_workers: int
+    """Number of model processes or inference threads"""
+
+    num_requests: int = 0
+    """Number of requests that completed successfully"""
+
+    num_failures: int = 0
+    """Number of requests that failed after all retries"""
+
+    num_restarts: int = 0
+    """Number of times a dead or hung model process was restarted"""
+
+    num_timeouts: int = 0
+    """Number of times a model process was killed for making no progress"""
+
+    num_retries: int = 0
+    """Number of requests that were resent after their model process failed"""
+
+    p50_latency_ms: float = 0.0
+    """Median time from submission to audio for recent requests"""
+
+    p99_latency_ms: float = 0.0
+    """99th percentile time from submission to audio for recent requests"""
+
+    def with_latencies(self, latencies: typing.Iterable[float]) -> "ModelPoolMetrics":
+        """Copy of metrics with percentiles computed from latencies (seconds)"""
+        metrics = dataclasses.replace(self)
+        sorted_latencies = sorted(latencies)
+        if sorted_latencies:
+            last_index = len(sorted_latencies) - 1
+            metrics.p50_latency_ms = 1000 * sorted_latencies[int(0.5 * last_index)]
+            metrics.p99_latency_ms = 1000 * sorted_latencies[int(0.99 * last_index)]
+
+        return metrics
+
+
+class InferenceBackend(metaclass=ABCMeta):
+    """Runs a voice model, turning phoneme ids into 16-bit mono PCM audio"""
+
+    @abstractmethod
+    def submit(
+        self,
+        phoneme_ids: typing.Sequence[int],
+        speaker_id: int,
+        noise_scale: float,
+        length_scale: float,
+        noise_w: float,
+    ) -> "Future[bytes]":
+        """Start synthesizing audio without waiting for it.
+
+        Several requests may be submitted back-to-back. The future's result is
+        raw 16-bit mono PCM audio.
+        """
+
+    @property
+    @abstractmethod
+    def metrics(self) -> ModelPoolMetrics:
+        """Snapshot of request counts and latency percentiles"""
+
+    def close(self):
+        """Release the voice model"""
+
+
+# -----------------------------------------------------------------------------
+
+
+class OnnxBackend(InferenceBackend):
+    """Runs a voice model in this process with onnxruntime.
+
+    Sessions are shared between backends for the same model path and load
+    options (and thus between threads), since InferenceSession.run is
+    thread-safe. Requests run on a small thread pool so they can overlap with
+    phonemization.
+    """
+
+    _SHARED_MODELS: typing.Dict[
+        typing.Tuple[typing.Any, ...], "onnxruntime.InferenceSession"
+    ] = {}
+    _SHARED_MODELS_LOCK = threading.Lock()
+
+    def __init__(
+        self,
+        generator_path: typing.Union[str, Path],
+        is_multispeaker: bool = False,
+        num_threads: int = 1,
+        session_options: typing.Optional["onnxruntime.SessionOptions"] = None,
+        providers: typing.Optional[PROVIDERS_TYPE] = None,
+        share_models: bool = True,
+        use_deterministic_compute: bool = False,
+        intra_op_num_threads: int = 1,
+        inter_op_num_threads: int = 1,
+        enable_mem_arena: bool = False,
+    ):
+        self.generator_path = Path(generator_path)
+        self.is_multispeaker = is_multispeaker
+
+        load_args: typing.Dict[str, typing.Any] = {
+            "session_options": session_options,
+            "providers": providers,
+            "use_deterministic_compute": use_deterministic_compute,
+            "intra_op_num_threads": intra_op_num_threads,
+            "inter_op_num_threads": inter_op_num_threads,
+            "enable_mem_arena": enable_mem_arena,
+        }
+
+        if share_models:
+            # Different options need a different session. SessionOptions are
+            # compared by identity.
+            model_key = (
+                str(self.generator_path.absolute()),
+                session_options,
+                repr(providers),
+                use_deterministic_compute,
+                intra_op_num_threads,
+                inter_op_num_threads,
+                enable_mem_arena,
+            )
+
+            with OnnxBackend._SHARED_MODELS_LOCK:
+                onnx_model = OnnxBackend._SHARED_MODELS.get(model_key)
+
+                if onnx_model is None:
+                    onnx_model = OnnxBackend._load_model(
+                        self.generator_path, **load_args
+                    )
+                    OnnxBackend._SHARED_MODELS[model_key] = onnx_model
+                else:
+                    _LOGGER.debug("Using shared Onnx model (%s)", model_key[0])
+        else:
+            onnx_model = OnnxBackend._load_model(self.generator_path, **load_args)
+
+        self.onnx_model = onnx_model
+
+        self._metrics = ModelPoolMetrics(
+            generator_path=str(self.generator_path), num_workers=max(1, num_threads)
+        )
+        self._latencies: "typing.Deque[float]" = deque(maxlen=MAX_LATENCIES)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._metrics.num_workers, thread_name_prefix="mimic3_onnx"
+        )
+
+    @property
+    def metrics(self) -> ModelPoolMetrics:
+        with self._lock:
+            return self._metrics.with_latencies(self._latencies)
+
+    def submit(
+        self,
+        phoneme_ids: typing.Sequence[int],
+        speaker_id: int,
+        noise_scale: float,
+        length_scale: float,
+        noise_w: float,
+    ) -> "Future[bytes]":
+        return self._executor.submit(
+            self._synthesize,
+            phoneme_ids,
+            speaker_id,
+            noise_scale,
+            length_scale,
+            noise_w,
+            time.monotonic(),
+        )
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    # -------------------------------------------------------------------------
+
+    def _synthesize(
+        self,
+        phoneme_ids: typing.Sequence[int],
+        speaker_id: int,
+        noise_scale: float,
+        length_scale: float,
+        noise_w: float,
+        start_time: float,
+    ) -> bytes:
+        # Create model inputs
+        text_array = np.expand_dims(np.array(phoneme_ids, dtype=np.int64), 0)
+        text_lengths_array = np.array([text_array.shape[1]], dtype=np.int64)
+        scales_array = np.array(
+            [
+                noise_scale,
+                length_scale,
+                noise_w,
+            ],
+            dtype=np.float32,
+        )
+
+        inputs = {
+            "input": text_array,
+            "input_lengths": text_lengths_array,
+            "scales": scales_array,
+        }
+
+        if self.is_multispeaker:
+            inputs["sid"] = np.array([speaker_id], dtype=np.int64)
+
+        try:
+            audio = self.onnx_model.run(None, inputs)[0]
+            audio_bytes = audio_float_to_int16(audio.squeeze()).tobytes()
+        except Exception:
+            with self._lock:
+                self._metrics.num_failures += 1
+
+            raise
+
+        with self._lock:
+            self._metrics.num_requests += 1
+            self._latencies.append(time.monotonic() - start_time)
+
+        return audio_bytes
+
+    @staticmethod
+    def _load_model(
+        generator_path: Path,
+        session_options: typing.Optional["onnxruntime.SessionOptions"] = None,
+        providers: typing.Optional[PROVIDERS_TYPE] = None,
+        use_deterministic_compute: bool = False,
+        intra_op_num_threads: int = 1,
+        inter_op_num_threads: int = 1,
+        enable_mem_arena: bool = False,
+    ) -> "onnxruntime.InferenceSession":
+        import onnxruntime
+
+        _LOGGER.debug("Loading model from %s", generator_path)
+
+        # Load onnx model
+        if session_options is None:
+            session_options = onnxruntime.SessionOptions()
+
+            if platform.machine() == "armv7l":
+                # Enabling optimizations on 32-bit ARM crashes
+                session_options.graph_optimization_level = (
+                    onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+                )
+
+            # Memory arena is faster, but keeps memory usage higher
+            session_options.enable_cpu_mem_arena = enable_mem_arena
+            session_options.enable_mem_pattern = enable_mem_arena
+            session_options.enable_mem_reuse = enable_mem_arena
+            session_options.enable_profiling = False
+            session_options.inter_op_num_threads = inter_op_num_threads
+            session_options.intra_op_num_threads = intra_op_num_threads
+
+        session_options.use_deterministic_compute = use_deterministic_compute
+
+        onnx_model = onnxruntime.InferenceSession(
+            str(generator_path), sess_options=session_options, providers=providers
+        )
+
+        return onnx_model
@@ -0,0 +1,133 @@
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""Bounded in-memory caches shared between threads"""
+import threading
+import typing
+from collections import OrderedDict
+from dataclasses import dataclass
+
+KeyType = typing.TypeVar("KeyType", bound=typing.Hashable)
+ValueType = typing.TypeVar("ValueType")
+
+# -----------------------------------------------------------------------------
+
+
+@dataclass
+class CacheStats:
+    """Counters for a cache"""
+
+    hits: int = 0
+    """Number of lookups that found an entry"""
+
+    misses: int = 0
+    """Number of lookups that did not find an entry"""
+
+    evictions: int = 0
+    """Number of entries removed to stay under the size limit"""
+
+    num_entries: int = 0
+    """Number of entries currently in the cache"""
+
+    size: int = 0
+    """Total size of all entries (see LRUCache.get_size)"""
+
+    max_size: typing.Optional[int] = 0
+    """Size limit of the cache (None = no limit)"""
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were hits"""
+        lookups = self.hits + self.misses
+        return (self.hits / lookups) if lookups > 0 else 0.0
+
+
+class LRUCache(typing.Generic[KeyType, ValueType]):
+    """Thread-safe cache that evicts the least recently used entries.
+
+    Entries count as size 1 unless get_size is given (e.g., len for bytes). A
+    max_size of 0 disables the cache.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        get_size: typing.Optional[typing.Callable[[ValueType], int]] = None,
+    ):
+        self.max_size = max_size
+        self.get_size = get_size
+
+        self._entries: "OrderedDict[KeyType, typing.Tuple[ValueType, int]]" = (
+            OrderedDict()
+        )
+        self._stats = CacheStats(max_size=max_size)
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> CacheStats:
+        """Snapshot of cache counters"""
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                num_entries=len(self._entries),
+                size=self._stats.size,
+                max_size=self.max_size,
+            )
+
+    def get(self, key: KeyType) -> typing.Optional[ValueType]:
+        """Return cached value or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+
+            return entry[0]
+
+    def put(self, key: KeyType, value: ValueType):
+        """Store a value, evicting least recently used entries if needed"""
+        size = self.get_size(value) if self.get_size is not None else 1
+        if size > self.max_size:
+            # Too big to cache (or cache is disabled)
+            return
+
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self._stats.size -= old_entry[1]
+
+            self._entries[key] = (value, size)
+            self._stats.size += size
+
+            while self._stats.size > self.max_size:
+                _old_key, (_old_value, old_size) = self._entries.popitem(last=False)
+                self._stats.size -= old_size
+                self._stats.evictions += 1
+
+    def items(self) -> typing.List[typing.Tuple[KeyType, ValueType]]:
+        """Snapshot of entries, least recently used first"""
+        with self._lock:
+            return [(key, entry[0]) for key, entry in self._entries.items()]
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._stats.size = 0
@@ -0,0 +1,431 @@
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""Index of installed and downloadable voices"""
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import typing
+from dataclasses import dataclass
+from pathlib import Path
+
+from opentts_abc import Voice
+
+from ._resources import get_voices_info
+from .config import VoiceConfig
+from .const import DEFAULT_VOICES_URL_FORMAT
+
+_LOGGER = logging.getLogger(__name__)
+
+# Files in a voice directory whose modification times are tracked
+_VOICE_FILES = ("config.json", "speakers.txt", "ALIASES")
+
+# Bump when the format of the cache file changes
+_CACHE_VERSION = 1
+
+MTIMES_TYPE = typing.Dict[str, int]
+
+# -----------------------------------------------------------------------------
+
+
+@dataclass
+class _CatalogEntry:
+    """Installed voice directory with the modification times it was read at"""
+
+    location: str
+    """Absolute path to voice directory"""
+
+    language: str
+    """Name of language directory"""
+
+    name: str
+    """Name of voice directory"""
+
+    mtimes: MTIMES_TYPE
+    """Modification times of voice files (ns) when this entry was read"""
+
+    properties: typing.Dict[str, typing.Any]
+    """Default inference settings from config.json"""
+
+    speakers: typing.Optional[typing.List[str]] = None
+    """Speaker names from speakers.txt"""
+
+    aliases: typing.Optional[typing.List[str]] = None
+    """Alternative voice keys from ALIASES"""
+
+    def to_voice(self) -> Voice:
+        """Convert to an OpenTTS voice"""
+        return Voice(
+            key=f"{self.language}/{self.name}",
+            name=self.name,
+            language=self.language,
+            description="",
+            speakers=self.speakers,
+            location=self.location,
+            properties=self.properties,
+            aliases=set(self.aliases) if self.aliases is not None else None,
+        )
+
+
+class VoiceCatalog:
+    """Voices in voices directories (<lang>/<voice>) plus voices from voices.json.
+
+    The directories are scanned once and voices are indexed by key and alias,
+    so lookups are dictionary accesses. The directories are listed again and
+    the modification times of each voice's config.json, speakers.txt, and
+    ALIASES are re-checked at most every check_seconds. Only voices that are new
+    or whose files changed are read again.
+
+    If cache_path is given, the parsed voices are saved there and reused by
+    the next process as long as their modification times still match.
+    """
+
+    def __init__(
+        self,
+        voices_dirs: typing.Iterable[typing.Union[str, Path]],
+        voices_url_format: typing.Optional[str] = DEFAULT_VOICES_URL_FORMAT,
+        cache_path: typing.Optional[typing.Union[str, Path]] = None,
+        check_seconds: float = 5.0,
+    ):
+        self.voices_dirs = [Path(d) for d in voices_dirs]
+        self.voices_url_format = voices_url_format or DEFAULT_VOICES_URL_FORMAT
+        self.cache_path = Path(cache_path) if cache_path is not None else None
+        self.check_seconds = check_seconds
+
+        # location -> entry, in search order
+        self._entries: typing.Dict[str, _CatalogEntry] = {}
+
+        self._voices: typing.List[Voice] = []
+        self._voices_by_key: typing.Dict[str, Voice] = {}
+        self._voices_by_alias: typing.Dict[str, Voice] = {}
+
+        self._last_check: typing.Optional[float] = None
+
+        # Unknown keys force a check, but not more often than check_seconds
+        self._last_forced_check: typing.Optional[float] = None
+        self._num_scans = 0
+        self._num_reads = 0
+        self._lock = threading.Lock()
+
+        if self.cache_path is not None:
+            self._load_cache()
+
+    @property
+    def num_scans(self) -> int:
+        """Number of times the voices directories were checked for changes"""
+        return self._num_scans
+
+    @property
+    def num_reads(self) -> int:
+        """Number of times a voice's files were read"""
+        return self._num_reads
+
+    def voices(self) -> typing.List[Voice]:
+        """All voices: installed voices first, then voices that can be downloaded"""
+        self.refresh()
+        return list(self._voices)
+
+    def find(self, key_or_alias: str) -> typing.Optional[Voice]:
+        """Look up a voice by key or alias.
+
+        Installed voices are preferred over ones that need to be downloaded. If
+        the voice isn't found, the voices directories are checked again before
+        giving up (at most once every check_seconds).
+        """
+        self.refresh()
+        voice = self._find(key_or_alias)
+        if voice is None:
+            with self._lock:
+                now = time.monotonic()
+                force = (self._last_forced_check is None) or (
+                    (now - self._last_forced_check) >= self.check_seconds
+                )
+                if force:
+                    self._last_forced_check = now
+
+            if force:
+                # May have been installed since the last check
+                self.refresh(force=True)
+                voice = self._find(key_or_alias)
+
+        return voice
+
+    def invalidate(self):
+        """Check the voices directories for changes on next access"""
+        with self._lock:
+            self._last_check = None
+
+    def refresh(self, force: bool = False):
+        """Update the index if files have changed since the last check"""
+        with self._lock:
+            now = time.monotonic()
+            if (
+                (not force)
+                and (self._last_check is not None)
+                and ((now - self._last_check) < self.check_seconds)
+            ):
+                return
+
+            self._last_check = now
+            self._num_scans += 1
+
+            voice_mtimes = self._scan()
+            if (
+                (voice_mtimes.keys() == self._entries.keys())
+                and all(
+                    self._entries[location].mtimes == mtimes
+                    for location, mtimes in voice_mtimes.items()
+                )
+                and self._voices
+            ):
+                # No changes
+                return
+
+            entries: typing.Dict[str, _CatalogEntry] = {}
+            for location, mtimes in voice_mtimes.items():
+                entry = self._entries.get(location)
+                if (entry is None) or (entry.mtimes != mtimes):
+                    try:
+                        entry = self._read_entry(Path(location), mtimes)
+                    except Exception:
+                        _LOGGER.exception("Failed to read voice from %s", location)
+                        continue
+
+                entries[location] = entry
+
+            changed = entries != self._entries
+            self._entries = entries
+            self._index()
+
+        if changed and (self.cache_path is not None):
+            self._save_cache()
+
+    # -------------------------------------------------------------------------
+
+    def _find(self, key_or_alias: str) -> typing.Optional[Voice]:
+        voice = self._voices_by_key.get(key_or_alias)
+        if voice is None:
+            voice = self._voices_by_alias.get(key_or_alias)
+
+        return voice
+
+    def _scan(self) -> typing.Dict[str, MTIMES_TYPE]:
+        """Modification times of each voice's files, in search order"""
+        voice_mtimes: typing.Dict[str, MTIMES_TYPE] = {}
+
+        # voices/<language>/<voice>/
+        for voices_dir in self.voices_dirs:
+            if voices_dir.name.startswith(".") or (not voices_dir.is_dir()):
+                _LOGGER.debug("Skipping voice directory %s", voices_dir)
+                continue
+
+            for lang_entry in os.scandir(voices_dir):
+                if lang_entry.name.startswith(".") or (not lang_entry.is_dir()):
+                    continue
+
+                for voice_entry in os.scandir(lang_entry.path):
+                    if voice_entry.name.startswith(".") or (not voice_entry.is_dir()):
+                        continue
+
+                    mtimes: MTIMES_TYPE = {}
+                    for file_name in _VOICE_FILES:
+                        try:
+                            mtimes[file_name] = os.stat(
+                                os.path.join(voice_entry.path, file_name)
+                            ).st_mtime_ns
+                        except OSError:
+                            pass
+
+                    if "config.json" not in mtimes:
+                        continue
+
+                    location = str(Path(voice_entry.path).absolute())
+                    voice_mtimes.setdefault(location, mtimes)
+
+        return voice_mtimes
+
+    def _read_entry(self, voice_dir: Path, mtimes: MTIMES_TYPE) -> _CatalogEntry:
+        """Read config, speakers, and aliases of a voice"""
+        _LOGGER.debug("Loading config from %s", voice_dir / "config.json")
+        self._num_reads += 1
+
+        config = VoiceConfig.load_path(voice_dir / "config.json")
+
+        properties: typing.Dict[str, typing.Any] = {
+            "length_scale": config.inference.length_scale,
+            "noise_scale": config.inference.noise_scale,
+            "noise_w": config.inference.noise_w,
+        }
+
+        # Load speaker names
+        speakers: typing.Optional[typing.List[str]] = None
+        speakers_path = voice_dir / "speakers.txt"
+        if "speakers.txt" in mtimes:
+            speakers = []
+            with open(speakers_path, "r", encoding="utf-8") as speakers_file:
+                for line in speakers_file:
+                    line = line.strip()
+                    if line:
+                        speakers.append(line)
+
+        # Load aliases
+        aliases: typing.Optional[typing.List[str]] = None
+        aliases_path = voice_dir / "ALIASES"
+        if "ALIASES" in mtimes:
+            aliases = []
+            with open(aliases_path, "r", encoding="utf-8") as aliases_file:
+                for line in aliases_file:
+                    line = line.strip()
+                    if line and (line not in aliases):
+                        aliases.append(line)
+
+        return _CatalogEntry(
+            location=str(voice_dir),
+            language=voice_dir.parent.name,
+            name=voice_dir.name,
+            mtimes=mtimes,
+            properties=properties,
+            speakers=speakers,
+            aliases=aliases,
+        )
+
+    def _index(self):
+        """Rebuild voice list and lookup tables (_lock held)"""
+        voices: typing.List[Voice] = []
+        voices_by_key: typing.Dict[str, Voice] = {}
+        voices_by_alias: typing.Dict[str, Voice] = {}
+
+        for entry in self._entries.values():
+            voice = entry.to_voice()
+            voices.append(voice)
+
+            # First directory wins
+            voices_by_key.setdefault(voice.key, voice)
+            for alias in voice.aliases or []:
+                voices_by_alias.setdefault(alias, voice)
+
+        # Voices that haven't yet been downloaded
+        for voice_key, voice_info in get_voices_info().items():
+            if voice_key in voices_by_key:
+                continue
+
+            voice_lang, voice_name = voice_key.split("/", maxsplit=1)
+            voice = Voice(
+                key=voice_key,
+                name=voice_name,
+                language=voice_lang,
+                description="",
+                speakers=voice_info.get("speakers", []),
+                location=str.format(
+                    self.voices_url_format,
+                    lang=voice_lang,
+                    name=voice_name,
+                    key=voice_key,
+                ),
+                properties=voice_info.get("properties", {}),
+            )
+            voices.append(voice)
+            voices_by_key[voice_key] = voice
+
+        # Replace all at once so readers without the lock see a consistent index
+        self._voices = voices
+        self._voices_by_key = voices_by_key
+        self._voices_by_alias = voices_by_alias
+
+        _LOGGER.debug(
+            "Indexed %s installed voice(s) and %s voice(s) in total",
+            len(self._entries),
+            len(voices),
+        )
+
+    def _load_cache(self):
+        """Load voice entries saved by a previous process"""
+        assert self.cache_path is not None
+
+        if not self.cache_path.is_file():
+            return
+
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as cache_file:
+                cache_dict = json.load(cache_file)
+
+            if cache_dict.get("version") != _CACHE_VERSION:
+                _LOGGER.debug("Ignoring old voice catalog at %s", self.cache_path)
+                return
+
+            entries = [
+                _CatalogEntry(**entry_dict) for entry_dict in cache_dict["voices"]
+            ]
+        except Exception:
+            _LOGGER.exception("Failed to load voice catalog from %s", self.cache_path)
+            return
+
+        # Entries are only used if their modification times match on refresh
+        with self._lock:
+            self._entries = {entry.location: entry for entry in entries}
+
+        _LOGGER.debug(
+            "Loaded %s voice(s) from catalog at %s", len(entries), self.cache_path
+        )
+
+    def _save_cache(self):
+        """Write voice entries atomically"""
+        assert self.cache_path is not None
+
+        with self._lock:
+            cache_dict = {
+                "version": _CACHE_VERSION,
+                "voices": [
+                    dataclasses.asdict(entry) for entry in self._entries.values()
+                ],
+            }
+
+        temp_path: typing.Optional[str] = None
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_fd, temp_path = tempfile.mkstemp(
+                dir=self.cache_path.parent, suffix=".tmp"
+            )
+            with os.fdopen(temp_fd, "w", encoding="utf-8") as temp_file:
+                json.dump(cache_dict, temp_file, ensure_ascii=False)
+
+            os.replace(temp_path, self.cache_path)
+            temp_path = None
+
+            _LOGGER.debug("Saved voice catalog to %s", self.cache_path)
+        except OSError:
+            _LOGGER.warning("Failed to save voice catalog to %s", self.cache_path)
+        finally:
+            if temp_path is not None:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+
+
+def get_catalog_path(
+    cache_dir: typing.Union[str, Path], voices_dirs: typing.Iterable[Path]
+) -> Path:
+    """Path of the catalog cache file for a list of voices directories"""
+    dirs_hash = hashlib.md5(
+        "\n".join(str(d) for d in voices_dirs).encode("utf-8")
+    ).hexdigest()
+
+    return Path(cache_dir) / f"voices_{dirs_hash[:16]}.json"
@@ -16,8 +16,9 @@
 """Configuration classes"""
 import collections
 import json
+import threading
 import typing
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from enum import Enum
 from pathlib import Path
 
@@ -361,3 +362,107 @@ class TrainingConfig(DataClassJsonMixin):
                 TrainingConfig.recursive_update(base_dict[key], value)
             else:
                 base_dict[key] = value
+
+
+# -----------------------------------------------------------------------------
+
+
+@dataclass
+class VoiceConfig:
+    """Parts of a training config needed for inference.
+
+    Only the audio, phonemes, and inference sections plus a few top-level
+    values are decoded, so loading is much faster than TrainingConfig.load.
+    Everything else in the file (training hyperparameters, datasets, etc.) is
+    skipped.
+    """
+
+    audio: AudioConfig = field(default_factory=AudioConfig)
+    phonemes: PhonemesConfig = field(default_factory=PhonemesConfig)
+    inference: InferenceConfig = field(default_factory=InferenceConfig)
+    text_language: typing.Optional[str] = None
+    phonemizer: typing.Optional[Phonemizer] = None
+
+    n_speakers: int = 1
+    """Number of speakers the model was trained with"""
+
+    has_multispeaker_dataset: bool = False
+    """True if any training dataset was multispeaker"""
+
+    @property
+    def is_multispeaker(self):
+        return (self.n_speakers > 1) or self.has_multispeaker_dataset
+
+    @staticmethod
+    def load(config_file: typing.TextIO) -> "VoiceConfig":
+        """Load inference config from a training config JSON file"""
+        return VoiceConfig.from_dict(json.load(config_file))
+
+    @staticmethod
+    def from_dict(config_dict: typing.Mapping[str, typing.Any]) -> "VoiceConfig":
+        """Decode inference config from a training config dictionary"""
+        phonemizer = config_dict.get("phonemizer")
+        if phonemizer is not None:
+            phonemizer = Phonemizer(phonemizer)
+
+        model_dict = config_dict.get("model") or {}
+
+        return VoiceConfig(
+            audio=_fields_from_dict(AudioConfig, config_dict.get("audio")),
+            phonemes=_fields_from_dict(PhonemesConfig, config_dict.get("phonemes")),
+            inference=_fields_from_dict(InferenceConfig, config_dict.get("inference")),
+            text_language=config_dict.get("text_language"),
+            phonemizer=phonemizer,
+            n_speakers=model_dict.get("n_speakers", ModelConfig.n_speakers),
+            has_multispeaker_dataset=any(
+                dataset_dict.get("multispeaker", False)
+                for dataset_dict in (config_dict.get("datasets") or [])
+            ),
+        )
+
+    @staticmethod
+    def load_path(config_path: typing.Union[str, Path]) -> "VoiceConfig":
+        """Load inference config from a file, reusing the last result if the file hasn't changed.
+
+        The returned config is shared, and must not be modified.
+        """
+        config_path = Path(config_path).absolute()
+        config_stat = config_path.stat()
+        stat_key = (config_stat.st_mtime_ns, config_stat.st_size)
+
+        with _VOICE_CONFIG_CACHE_LOCK:
+            cached = _VOICE_CONFIG_CACHE.get(config_path)
+            if (cached is not None) and (cached[0] == stat_key):
+                return cached[1]
+
+        with open(config_path, "r", encoding="utf-8") as config_file:
+            config = VoiceConfig.load(config_file)
+
+        with _VOICE_CONFIG_CACHE_LOCK:
+            _VOICE_CONFIG_CACHE[config_path] = (stat_key, config)
+
+        return config
+
+
+_DataclassType = typing.TypeVar("_DataclassType")
+
+# config path -> ((mtime, size), config)
+_VOICE_CONFIG_CACHE: typing.Dict[
+    Path, typing.Tuple[typing.Tuple[int, int], VoiceConfig]
+] = {}
+_VOICE_CONFIG_CACHE_LOCK = threading.Lock()
+
+
+def _fields_from_dict(
+    config_class: typing.Type[_DataclassType],
+    config_dict: typing.Optional[typing.Mapping[str, typing.Any]],
+) -> _DataclassType:
+    """Create a flat config dataclass from known keys, using defaults for missing keys"""
+    if not config_dict:
+        return config_class()
+
+    field_names = {f.name for f in fields(config_class)}
+
+    return config_class(
+        **{key: value for key, value in config_dict.items() if key in field_names}
+    )
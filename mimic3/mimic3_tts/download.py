@@ -26,7 +26,7 @@ from dataclasses import dataclass
 from pathlib import Path
 from urllib.error import HTTPError
 
-from ._resources import _PACKAGE, _VOICES
+from ._resources import _PACKAGE, get_voices_info
 from .const import DEFAULT_VOICES_DOWNLOAD_DIR, DEFAULT_VOICES_URL_FORMAT
 from .utils import WILDCARD, file_sha256_sum, wildcard_to_regex
 
@@ -191,10 +191,11 @@ def main(argv=None):
 
     args.output_dir = Path(args.output_dir)
     args.key = args.key or []
+    voices_info = get_voices_info()
 
     if not args.key:
         # Print available voices and exit
-        json.dump(_VOICES, sys.stdout, indent=4, ensure_ascii=False)
+        json.dump(voices_info, sys.stdout, indent=4, ensure_ascii=False)
         sys.exit(0)
 
     args.key = [
@@ -208,7 +209,7 @@ def main(argv=None):
         if isinstance(key_or_pattern, re.Pattern):
             # Wildcards
             voice_keys = []
-            for maybe_key in _VOICES.keys():
+            for maybe_key in voices_info.keys():
                 if key_or_pattern.match(maybe_key):
                     voice_keys.append(maybe_key)
 
@@ -216,7 +217,7 @@ def main(argv=None):
         else:
             # No wildcards.
             # Resolve aliases.
-            for maybe_key, maybe_info in _VOICES.items():
+            for maybe_key, maybe_info in voices_info.items():
                 for alias in maybe_info.get("aliases", []):
                     if key_or_pattern == alias:
                         # Alias match
@@ -233,7 +234,7 @@ def main(argv=None):
                 continue
 
             voice_lang, voice_name = voice_key.split("/", maxsplit=1)
-            voice_info = _VOICES[voice_key]
+            voice_info = voices_info[voice_key]
             voice_url = str.format(
                 args.url_format, key=voice_key, lang=voice_lang, name=voice_name
             )
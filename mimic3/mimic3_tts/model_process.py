@@ -0,0 +1,788 @@
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""Communication with the external mimic3 model program"""
+import functools
+import io
+import json
+import logging
+import os
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+import typing
+import wave
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+
+import numpy as np
+
+from .backend import MAX_LATENCIES, InferenceBackend, ModelPoolMetrics
+
+# HACK: Hard-coded path
+MODEL_PROGRAM = "/opt/mycroft/bin/mimic3"
+
+# Audio frame written by the model program when "stream_audio" is set.
+# magic, request id, sample rate, number of PCM bytes (all little-endian).
+_AUDIO_MAGIC = b"M3AU"
+_AUDIO_HEADER = struct.Struct("<4sIII")
+
+# Binary request frame, followed by int64 phoneme ids (see mimic3 --binary).
+# magic, request id, number of ids, speaker id, noise scale, length scale, noise w
+_REQUEST_MAGIC = b"M3RQ"
+_REQUEST_HEADER = struct.Struct("<4sIIqfff")
+
+# Request ids are uint32 in the protocol
+_MAX_REQUEST_ID = 2**32
+
+_LOGGER = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+
+
+class ModelCapability(str, Enum):
+    """Optional features of the model program (mimic3 --capabilities)"""
+
+    PCM_RESPONSE = "pcm-response"
+    """Audio can be returned over stdout instead of through a WAV file"""
+
+    BINARY_REQUEST = "binary-request"
+    """Requests can be sent as binary frames instead of JSON lines"""
+
+
+@functools.lru_cache(maxsize=None)
+def get_model_capabilities(
+    model_program: str = MODEL_PROGRAM,
+) -> typing.FrozenSet[str]:
+    """Ask the model program which optional features it supports.
+
+    Older programs don't understand --capabilities and exit with an error, so
+    they are reported as having no capabilities.
+    """
+    try:
+        proc = subprocess.run(
+            [model_program, "--capabilities"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            timeout=10,
+            check=False,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        _LOGGER.exception("Unable to get capabilities of %s", model_program)
+        return frozenset()
+
+    if proc.returncode != 0:
+        return frozenset()
+
+    return frozenset(
+        line.strip() for line in proc.stdout.decode().splitlines() if line.strip()
+    )
+
+
+class ModelProcessError(Exception):
+    """Raised when the model program fails or exits unexpectedly"""
+
+
+@dataclass
+class _PendingRequest:
+    """Request that has been sent to the model program"""
+
+    future: "Future[bytes]"
+    output_path: typing.Optional[str] = None
+
+
+# -----------------------------------------------------------------------------
+
+
+class ModelProcess:
+    """Runs a voice model in the mimic3 program and pipelines requests to it.
+
+    Requests are written back-to-back to stdin and tagged with an id. A reader
+    thread completes each request's future as its audio arrives, so callers can
+    have several requests in flight at once.
+    """
+
+    def __init__(
+        self,
+        generator_path: typing.Union[str, Path],
+        stream_audio: bool = True,
+        binary_requests: bool = True,
+        model_program: typing.Optional[str] = None,
+    ):
+        self.generator_path = Path(generator_path)
+        self.model_program = model_program or MODEL_PROGRAM
+
+        capabilities = get_model_capabilities(self.model_program)
+        if stream_audio and (ModelCapability.PCM_RESPONSE not in capabilities):
+            _LOGGER.warning(
+                "%s can't stream audio. Falling back to WAV files.",
+                self.model_program,
+            )
+            stream_audio = False
+
+        # True if model audio comes back over stdout instead of a WAV file
+        self.stream_audio = stream_audio
+
+        # True if the model program was started with --binary (implies stream_audio)
+        self.binary_requests = (
+            binary_requests
+            and stream_audio
+            and (ModelCapability.BINARY_REQUEST in capabilities)
+        )
+
+        model_args = [self.model_program]
+        if self.binary_requests:
+            model_args.append("--binary")
+        else:
+            _LOGGER.debug("Using JSON requests for %s", self.model_program)
+
+        model_args.append(str(self.generator_path.absolute()))
+        self.proc = subprocess.Popen(
+            model_args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+        self._pending: typing.Dict[int, _PendingRequest] = {}
+        self._next_id = 0
+        self._exited = False
+        self._lock = threading.Lock()
+
+        # Last time a response arrived or the process went from idle to busy
+        self._last_progress = time.monotonic()
+
+        # Separate from _lock so the reader thread is never blocked on a full stdin
+        self._write_lock = threading.Lock()
+
+        self._reader_thread = threading.Thread(target=self._read_responses, daemon=True)
+        self._reader_thread.start()
+
+    @property
+    def num_pending(self) -> int:
+        """Number of requests waiting on audio"""
+        return len(self._pending)
+
+    @property
+    def is_alive(self) -> bool:
+        """True if the model program is running and accepting requests"""
+        return (not self._exited) and (self.proc.poll() is None)
+
+    @property
+    def stalled_seconds(self) -> float:
+        """Seconds since the model program last made progress on a request.
+
+        Always 0 when no requests are pending.
+        """
+        with self._lock:
+            if not self._pending:
+                return 0.0
+
+            return time.monotonic() - self._last_progress
+
+    def submit(
+        self,
+        phoneme_ids: typing.Sequence[int],
+        speaker_id: int,
+        noise_scale: float,
+        length_scale: float,
+        noise_w: float,
+    ) -> "Future[bytes]":
+        """Send a request to the model program without waiting for its audio.
+
+        The future's result is raw 16-bit mono PCM audio.
+        """
+        future: "Future[bytes]" = Future()
+        pending = _PendingRequest(future=future)
+
+        with self._lock:
+            request_id = self._next_id
+            self._next_id = (self._next_id + 1) % _MAX_REQUEST_ID
+
+        if self.binary_requests:
+            ids_bytes = np.asarray(phoneme_ids, dtype="<i8").tobytes()
+            request_bytes = (
+                _REQUEST_HEADER.pack(
+                    _REQUEST_MAGIC,
+                    request_id,
+                    len(ids_bytes) // 8,
+                    speaker_id,
+                    noise_scale,
+                    length_scale,
+                    noise_w,
+                )
+                + ids_bytes
+            )
+        else:
+            request: typing.Dict[str, typing.Any] = {
+                "id": request_id,
+                "phoneme_ids": [int(i) for i in phoneme_ids],
+                "speaker_id": speaker_id,
+                "mimic3": {
+                    "noise_scale": noise_scale,
+                    "length_scale": length_scale,
+                    "noise_w": noise_w,
+                },
+            }
+
+            if self.stream_audio:
+                request["stream_audio"] = True
+            else:
+                # Model program writes WAV file, and then echoes request
+                output_fd, pending.output_path = tempfile.mkstemp(suffix=".wav")
+                os.close(output_fd)
+                request["output_path"] = pending.output_path
+
+            request_bytes = json.dumps(request).encode() + b"\n"
+
+        with self._lock:
+            if self._exited:
+                self._remove_output(pending)
+                raise ModelProcessError("Model process has exited")
+
+            if not self._pending:
+                self._last_progress = time.monotonic()
+
+            self._pending[request_id] = pending
+
+        try:
+            with self._write_lock:
+                assert self.proc.stdin is not None
+                self.proc.stdin.write(request_bytes)
+                self.proc.stdin.flush()
+        except (OSError, ValueError) as e:
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+            self._remove_output(pending)
+            raise ModelProcessError("Failed to send request to model") from e
+
+        return future
+
+    def close(self):
+        """Stop the model program"""
+        try:
+            if self.proc.stdin is not None:
+                self.proc.stdin.close()
+        except OSError:
+            pass
+
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+        self._reader_thread.join(timeout=5)
+
+    def kill(self):
+        """Kill the model program, failing all pending requests"""
+        try:
+            self.proc.kill()
+        except OSError:
+            pass
+
+        self.close()
+
+    # -------------------------------------------------------------------------
+
+    def _read_responses(self):
+        """Complete pending requests as responses arrive (reader thread)"""
+        try:
+            while True:
+                if self.stream_audio:
+                    response = self._read_audio_frame()
+                else:
+                    response = self._read_wav_file()
+
+                if response is None:
+                    # End of output
+                    break
+
+                request_id, pending, audio_bytes = response
+                if pending is None:
+                    _LOGGER.warning("Response for unknown request: %s", request_id)
+                    continue
+
+                pending.future.set_result(audio_bytes)
+        except Exception:
+            _LOGGER.exception("Unexpected error reading from model process")
+        finally:
+            self._fail_pending(ModelProcessError("Model process exited unexpectedly"))
+
+    def _read_audio_frame(
+        self,
+    ) -> typing.Optional[typing.Tuple[int, typing.Optional[_PendingRequest], bytes]]:
+        """Read a single audio frame from the model program's stdout"""
+        assert self.proc.stdout is not None
+        header = self.proc.stdout.read(_AUDIO_HEADER.size)
+        if len(header) < _AUDIO_HEADER.size:
+            return None
+
+        magic, request_id, _sample_rate, num_bytes = _AUDIO_HEADER.unpack(header)
+        if magic != _AUDIO_MAGIC:
+            raise ModelProcessError(
+                f"Unexpected response from model process: {magic!r}"
+            )
+
+        audio_bytes = self.proc.stdout.read(num_bytes)
+        if len(audio_bytes) < num_bytes:
+            return None
+
+        with self._lock:
+            pending = self._pending.pop(request_id, None)
+            self._last_progress = time.monotonic()
+
+        return request_id, pending, audio_bytes
+
+    def _read_wav_file(
+        self,
+    ) -> typing.Optional[typing.Tuple[int, typing.Optional[_PendingRequest], bytes]]:
+        """Wait for an echoed request, then read back the WAV file it names"""
+        assert self.proc.stdout is not None
+        line = self.proc.stdout.readline()
+        if not line:
+            return None
+
+        request_id = int(json.loads(line).get("id", 0))
+        with self._lock:
+            pending = self._pending.pop(request_id, None)
+            self._last_progress = time.monotonic()
+
+        if pending is None:
+            return request_id, None, bytes()
+
+        try:
+            assert pending.output_path is not None
+            wav_bytes = Path(pending.output_path).read_bytes()
+        finally:
+            self._remove_output(pending)
+
+        with io.BytesIO(wav_bytes) as wav_io:
+            with wave.open(wav_io, "rb") as wav_file:
+                audio_bytes = wav_file.readframes(wav_file.getnframes())
+
+        return request_id, pending, audio_bytes
+
+    def _fail_pending(self, error: Exception):
+        """Stop accepting requests and fail all that are still waiting on audio"""
+        with self._lock:
+            self._exited = True
+            pending_requests = list(self._pending.values())
+            self._pending.clear()
+
+        for pending in pending_requests:
+            self._remove_output(pending)
+            if not pending.future.done():
+                pending.future.set_exception(error)
+
+    @staticmethod
+    def _remove_output(pending: _PendingRequest):
+        if pending.output_path:
+            try:
+                os.unlink(pending.output_path)
+            except OSError:
+                pass
+
+
+# -----------------------------------------------------------------------------
+
+
+@dataclass
+class _PoolRequest:
+    """Request submitted to a pool, which may be sent to several workers"""
+
+    future: "Future[bytes]"
+    phoneme_ids: typing.Sequence[int]
+    speaker_id: int
+    noise_scale: float
+    length_scale: float
+    noise_w: float
+    start_time: float
+    attempts: int = 0
+
+
+class ModelProcessPool(InferenceBackend):
+    """Several model processes for the same voice, watched by a supervisor.
+
+    Each request goes to the worker with the fewest requests in flight. The
+    total number of workers across all pools in this process is capped, so
+    loading more voices can't oversubscribe the CPU.
+
+    A supervisor thread restarts workers that exit or make no progress for
+    request_timeout seconds. Requests that were in flight on a failed worker
+    are resent up to max_retries times.
+    """
+
+    _TOTAL_WORKERS = 0
+    _TOTAL_WORKERS_LOCK = threading.Lock()
+    _POOLS: "typing.List[ModelProcessPool]" = []
+
+    def __init__(
+        self,
+        generator_path: typing.Union[str, Path],
+        num_workers: int = 1,
+        max_total_workers: typing.Optional[int] = None,
+        stream_audio: bool = True,
+        binary_requests: bool = True,
+        request_timeout: typing.Optional[float] = 30.0,
+        max_retries: int = 1,
+        check_interval: float = 1.0,
+    ):
+        self.generator_path = Path(generator_path)
+        self.stream_audio = stream_audio
+        self.binary_requests = binary_requests
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.check_interval = check_interval
+
+        self.num_workers = ModelProcessPool._reserve_workers(
+            num_workers, max_total_workers
+        )
+
+        if self.num_workers < num_workers:
+            _LOGGER.warning(
+                "Using %s worker(s) instead of %s for %s (max total workers reached)",
+                self.num_workers,
+                num_workers,
+                self.generator_path,
+            )
+
+        self.workers: typing.List[ModelProcess] = []
+        self._metrics = ModelPoolMetrics(
+            generator_path=str(self.generator_path), num_workers=self.num_workers
+        )
+        self._latencies: "typing.Deque[float]" = deque(maxlen=MAX_LATENCIES)
+        self._retry_requests: typing.List[_PoolRequest] = []
+        self._closed = False
+
+        # worker -> number of requests picked for it but not yet written
+        self._num_dispatching: typing.Dict[ModelProcess, int] = {}
+
+        # Protects workers and _num_dispatching. Never held while writing to a
+        # worker or taken on a worker's reader thread.
+        self._lock = threading.Lock()
+
+        # Protect metrics and retries, which are updated on reader threads
+        self._metrics_lock = threading.Lock()
+        self._retry_lock = threading.Lock()
+        self._wake_supervisor = threading.Event()
+
+        try:
+            for _ in range(self.num_workers):
+                self.workers.append(self._start_worker())
+        except Exception:
+            self.close()
+            raise
+
+        self._supervisor_thread = threading.Thread(target=self._supervise, daemon=True)
+        self._supervisor_thread.start()
+
+        with ModelProcessPool._TOTAL_WORKERS_LOCK:
+            ModelProcessPool._POOLS.append(self)
+
+    @property
+    def num_pending(self) -> int:
+        """Number of requests waiting on audio across all workers"""
+        return sum(worker.num_pending for worker in self.workers)
+
+    @property
+    def metrics(self) -> ModelPoolMetrics:
+        """Snapshot of restart counts and latency percentiles"""
+        with self._metrics_lock:
+            return self._metrics.with_latencies(self._latencies)
+
+    @staticmethod
+    def get_all_metrics() -> typing.List[ModelPoolMetrics]:
+        """Metrics for every open pool in this process"""
+        with ModelProcessPool._TOTAL_WORKERS_LOCK:
+            pools = list(ModelProcessPool._POOLS)
+
+        return [pool.metrics for pool in pools]
+
+    def submit(
+        self,
+        phoneme_ids: typing.Sequence[int],
+        speaker_id: int,
+        noise_scale: float,
+        length_scale: float,
+        noise_w: float,
+    ) -> "Future[bytes]":
+        """Send a request to the least loaded worker (see ModelProcess.submit)"""
+        if self._closed:
+            raise ModelProcessError("Model pool is closed")
+
+        request = _PoolRequest(
+            future=Future(),
+            phoneme_ids=phoneme_ids,
+            speaker_id=speaker_id,
+            noise_scale=noise_scale,
+            length_scale=length_scale,
+            noise_w=noise_w,
+            start_time=time.monotonic(),
+        )
+        self._dispatch(request)
+
+        return request.future
+
+    def close(self):
+        """Stop the supervisor and all workers"""
+        with self._lock:
+            if self._closed:
+                return
+
+            self._closed = True
+
+        with self._retry_lock:
+            retry_requests = self._retry_requests
+            self._retry_requests = []
+
+        self._wake_supervisor.set()
+        supervisor_thread = getattr(self, "_supervisor_thread", None)
+        if supervisor_thread is not None:
+            supervisor_thread.join()
+
+        for worker in self.workers:
+            worker.close()
+
+        for request in retry_requests:
+            self._fail_request(request, ModelProcessError("Model pool is closed"))
+
+        self.workers.clear()
+
+        with ModelProcessPool._TOTAL_WORKERS_LOCK:
+            if self in ModelProcessPool._POOLS:
+                ModelProcessPool._POOLS.remove(self)
+
+        ModelProcessPool._release_workers(self.num_workers)
+        self.num_workers = 0
+
+    # -------------------------------------------------------------------------
+
+    def _start_worker(self) -> ModelProcess:
+        return ModelProcess(
+            self.generator_path,
+            stream_audio=self.stream_audio,
+            binary_requests=self.binary_requests,
+        )
+
+    def _dispatch(self, request: _PoolRequest):
+        """Send request to the least loaded live worker, or queue it for retry"""
+        with self._lock:
+            live_workers = [w for w in self.workers if w.is_alive]
+            worker: typing.Optional[ModelProcess] = None
+            if live_workers:
+                # Count requests that are still being written to a worker's stdin
+                worker = min(
+                    live_workers,
+                    key=lambda w: w.num_pending + self._num_dispatching.get(w, 0),
+                )
+                self._num_dispatching[worker] = self._num_dispatching.get(worker, 0) + 1
+
+        if worker is None:
+            self._retry_later(request)
+            return
+
+        # Writing may block on a full pipe, so it must not hold up other workers
+        worker_future: "typing.Optional[Future[bytes]]" = None
+        try:
+            worker_future = worker.submit(
+                request.phoneme_ids,
+                speaker_id=request.speaker_id,
+                noise_scale=request.noise_scale,
+                length_scale=request.length_scale,
+                noise_w=request.noise_w,
+            )
+        except ModelProcessError:
+            # Worker died after the check above
+            pass
+        finally:
+            with self._lock:
+                num_dispatching = self._num_dispatching.pop(worker, 1) - 1
+                if num_dispatching > 0:
+                    self._num_dispatching[worker] = num_dispatching
+
+        if worker_future is None:
+            self._retry_later(request)
+            return
+
+        request.attempts += 1
+        worker_future.add_done_callback(
+            lambda f: self._request_done(request, f)  # type: ignore
+        )
+
+    def _request_done(self, request: _PoolRequest, worker_future: "Future[bytes]"):
+        """Complete the pool request or retry it (called on a reader thread)"""
+        error = worker_future.exception()
+        if error is None:
+            with self._metrics_lock:
+                self._metrics.num_requests += 1
+                self._latencies.append(time.monotonic() - request.start_time)
+
+            request.future.set_result(worker_future.result())
+            return
+
+        if (
+            isinstance(error, ModelProcessError)
+            and (request.attempts <= self.max_retries)
+            and (not self._closed)
+        ):
+            _LOGGER.warning(
+                "Retrying request for %s (attempt %s): %s",
+                self.generator_path,
+                request.attempts + 1,
+                error,
+            )
+
+            with self._metrics_lock:
+                self._metrics.num_retries += 1
+
+            self._retry_later(request)
+        else:
+            self._fail_request(request, error)
+
+    def _retry_later(self, request: _PoolRequest):
+        """Hand request to the supervisor"""
+        with self._retry_lock:
+            # close() sets _closed before taking the remaining retries
+            is_closed = self._closed
+            if not is_closed:
+                self._retry_requests.append(request)
+
+        if is_closed:
+            self._fail_request(request, ModelProcessError("Model pool is closed"))
+        else:
+            self._wake_supervisor.set()
+
+    def _fail_request(self, request: _PoolRequest, error: BaseException):
+        with self._metrics_lock:
+            self._metrics.num_failures += 1
+
+        if not request.future.done():
+            request.future.set_exception(error)
+
+    def _supervise(self):
+        """Restart dead or hung workers and resend their requests (supervisor thread)"""
+        while not self._closed:
+            self._wake_supervisor.wait(timeout=self.check_interval)
+            self._wake_supervisor.clear()
+
+            if self._closed:
+                break
+
+            try:
+                self._restart_workers()
+                self._retry_requests_now()
+            except Exception:
+                _LOGGER.exception("Unexpected error in model supervisor")
+
+    def _restart_workers(self):
+        for worker_index, worker in enumerate(list(self.workers)):
+            if worker.is_alive:
+                if (not self.request_timeout) or (
+                    worker.stalled_seconds < self.request_timeout
+                ):
+                    # Healthy
+                    continue
+
+                _LOGGER.warning(
+                    "Model process for %s made no progress in %s second(s)",
+                    self.generator_path,
+                    self.request_timeout,
+                )
+
+                with self._metrics_lock:
+                    self._metrics.num_timeouts += 1
+            else:
+                _LOGGER.warning(
+                    "Model process for %s exited with code %s",
+                    self.generator_path,
+                    worker.proc.poll(),
+                )
+
+            # Pending requests fail with ModelProcessError and are retried.
+            # The model file is still in the page cache, so the new process
+            # loads quickly.
+            worker.kill()
+
+            try:
+                new_worker = self._start_worker()
+            except Exception:
+                _LOGGER.exception("Failed to restart model for %s", self.generator_path)
+                continue
+
+            with self._lock:
+                is_closed = self._closed
+                if not is_closed:
+                    self.workers[worker_index] = new_worker
+
+            if is_closed:
+                new_worker.close()
+                return
+
+            with self._metrics_lock:
+                self._metrics.num_restarts += 1
+
+            _LOGGER.info("Restarted model process for %s", self.generator_path)
+
+    def _retry_requests_now(self):
+        with self._retry_lock:
+            retry_requests = self._retry_requests
+            self._retry_requests = []
+
+        for request in retry_requests:
+            elapsed = time.monotonic() - request.start_time
+            if self.request_timeout and (
+                elapsed > (self.request_timeout * (self.max_retries + 1))
+            ):
+                # Overall deadline
+                self._fail_request(
+                    request,
+                    ModelProcessError(
+                        f"No audio from model after {elapsed:.1f} second(s)"
+                    ),
+                )
+            else:
+                self._dispatch(request)
+
+    @staticmethod
+    def _reserve_workers(
+        num_workers: int, max_total_workers: typing.Optional[int] = None
+    ) -> int:
+        """Reserve up to num_workers from the process-wide budget.
+
+        Every voice gets at least one worker, even when over budget.
+        """
+        if max_total_workers is None:
+            max_total_workers = os.cpu_count() or 1
+
+        with ModelProcessPool._TOTAL_WORKERS_LOCK:
+            available = max_total_workers - ModelProcessPool._TOTAL_WORKERS
+            reserved = max(1, min(num_workers, available))
+            ModelProcessPool._TOTAL_WORKERS += reserved
+
+        return reserved
+
+    @staticmethod
+    def _release_workers(num_workers: int):
+        with ModelProcessPool._TOTAL_WORKERS_LOCK:
+            ModelProcessPool._TOTAL_WORKERS = max(
+                0, ModelProcessPool._TOTAL_WORKERS - num_workers
+            )
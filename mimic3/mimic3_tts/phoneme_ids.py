@@ -0,0 +1,231 @@
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""Conversion of phonemes to ids for voice models"""
+import itertools
+import typing
+import unicodedata
+
+import numpy as np
+from phonemes2ids.const import PUNCTUATION_MAP, BlankBetween
+
+from .config import PhonemesConfig
+
+# Maximum number of distinct phonemes whose ids are memoized per encoder.
+# Ids for phonemes in the model's phoneme table are always memoized.
+_MAX_MEMOIZED_PHONEMES = 4096
+
+IDS_TYPE = typing.Tuple[int, ...]
+
+# -----------------------------------------------------------------------------
+
+
+class PhonemeIdEncoder:
+    """Converts word phonemes to ids, giving the same result as phonemes2ids.
+
+    Everything that depends only on the voice (phoneme and punctuation maps,
+    stress/tone/grapheme separation, blanks, etc.) is resolved once when the
+    encoder is created. The ids for each distinct phoneme are memoized, so
+    encoding a sentence is mostly dictionary lookups.
+    """
+
+    def __init__(
+        self,
+        phoneme_to_id: typing.Mapping[str, int],
+        phonemes_config: PhonemesConfig,
+        phoneme_map: typing.Optional[typing.Mapping[str, typing.Sequence[str]]] = None,
+    ):
+        self.phoneme_to_id = phoneme_to_id
+        self.phoneme_map: typing.Mapping[str, typing.Sequence[str]] = (
+            phoneme_map or phonemes_config.phoneme_map or {}
+        )
+
+        self.punctuation_map: typing.Optional[typing.Mapping[str, str]] = None
+        if phonemes_config.simple_punctuation:
+            self.punctuation_map = (
+                PUNCTUATION_MAP
+                if phonemes_config.punctuation_map is None
+                else phonemes_config.punctuation_map
+            )
+
+        self.separate: typing.Optional[typing.Collection[str]] = (
+            phonemes_config.separate or None
+        )
+        self.separate_graphemes = phonemes_config.separate_graphemes
+        self.separate_tones = phonemes_config.separate_tones
+        self.tone_before = phonemes_config.tone_before
+
+        # Blanks
+        self.blank_id: typing.Optional[int] = None
+        self.blank_word_id: typing.Optional[int] = None
+        if phonemes_config.blank:
+            self.blank_id = phoneme_to_id[phonemes_config.blank]
+            self.blank_word_id = self.blank_id
+
+        if phonemes_config.blank_word:
+            self.blank_word_id = phoneme_to_id[phonemes_config.blank_word]
+
+        blank_between = phonemes_config.blank_between
+        self.blank_between_words = (self.blank_word_id is not None) and (
+            blank_between in {BlankBetween.WORDS, BlankBetween.TOKENS_AND_WORDS}
+        )
+        self.blank_between_tokens = (self.blank_id is not None) and (
+            blank_between in {BlankBetween.TOKENS, BlankBetween.TOKENS_AND_WORDS}
+        )
+        self.blank_at_start = phonemes_config.blank_at_start
+        self.blank_at_end = phonemes_config.blank_at_end
+
+        # Beginning/end of sentence
+        self.bos_ids: IDS_TYPE = tuple()
+        self.eos_ids: IDS_TYPE = tuple()
+        if phonemes_config.auto_bos_eos:
+            if phonemes_config.bos:
+                self.bos_ids = self._lookup_ids(phonemes_config.bos)
+
+            if phonemes_config.eos:
+                self.eos_ids = self._lookup_ids(phonemes_config.eos)
+
+        # phoneme -> ids
+        self._phoneme_ids: typing.Dict[str, IDS_TYPE] = {
+            phoneme: self._compile_phoneme(phoneme) for phoneme in phoneme_to_id
+        }
+        self._max_phonemes = len(self._phoneme_ids) + _MAX_MEMOIZED_PHONEMES
+
+    def encode(
+        self, word_phonemes: typing.Sequence[typing.Sequence[str]]
+    ) -> np.ndarray:
+        """Convert word phonemes into a flat array of int64 ids"""
+        ids: typing.List[int] = list(self.bos_ids)
+
+        if self.blank_at_start and (self.blank_id is not None):
+            ids.append(self.blank_id)
+
+        phoneme_ids = self._phoneme_ids
+        last_word_idx = len(word_phonemes) - 1
+        for word_idx, word in enumerate(word_phonemes):
+            word_ids: typing.List[int] = []
+            for phoneme in word:
+                maybe_ids = phoneme_ids.get(phoneme)
+                if maybe_ids is None:
+                    maybe_ids = self._compile_phoneme(phoneme)
+                    if len(phoneme_ids) < self._max_phonemes:
+                        phoneme_ids[phoneme] = maybe_ids
+
+                word_ids.extend(maybe_ids)
+
+            if not word_ids:
+                continue
+
+            is_last_word = word_idx == last_word_idx
+            if self.blank_between_words and ((not is_last_word) or self.blank_at_end):
+                assert self.blank_word_id is not None
+                word_ids.append(self.blank_word_id)
+
+            if self.blank_between_tokens:
+                # [p, blank, p, blank, ...]
+                for word_id in word_ids:
+                    ids.append(word_id)
+                    ids.append(typing.cast(int, self.blank_id))
+
+                if is_last_word and (not self.blank_at_end):
+                    # Drop last blank
+                    ids.pop()
+            else:
+                ids.extend(word_ids)
+
+        ids.extend(self.eos_ids)
+
+        return np.array(ids, dtype=np.int64)
+
+    # -------------------------------------------------------------------------
+
+    def _lookup_ids(self, phoneme: str) -> IDS_TYPE:
+        """Id of a phoneme as a tuple (empty if missing)"""
+        if not phoneme:
+            return tuple()
+
+        maybe_id = self.phoneme_to_id.get(phoneme)
+        if maybe_id is None:
+            return tuple()
+
+        return (maybe_id,)
+
+    def _compile_phoneme(self, phoneme: str) -> IDS_TYPE:
+        """Ids for a single phoneme after separation, simplification, and mapping"""
+        if self.separate_graphemes:
+            return tuple(
+                itertools.chain.from_iterable(
+                    self._compile_ids(codepoint)
+                    for codepoint in unicodedata.normalize("NFD", phoneme)
+                )
+            )
+
+        return self._compile_ids(phoneme)
+
+    def _compile_ids(self, phoneme: str) -> IDS_TYPE:
+        """Ids for a phoneme (or single codepoint with separate_graphemes)"""
+        ids: typing.List[int] = []
+        tone = ""
+
+        if self.separate_tones:
+            # Strip digits (tones) off the back of the phoneme
+            tone_chars = []
+            while phoneme and phoneme[-1].isdigit():
+                tone_chars.append(phoneme[-1])
+                phoneme = phoneme[:-1]
+
+            tone = "".join(reversed(tone_chars))
+
+            if tone and self.tone_before:
+                ids.extend(self._lookup_ids(tone))
+
+        if self.separate is None:
+            sub_phonemes = [phoneme]
+        else:
+            # Separate out stress, etc.
+            sub_phonemes = []
+            before_split = ""
+            for codepoint in phoneme:
+                if codepoint in self.separate:
+                    if before_split:
+                        sub_phonemes.append(before_split)
+                        before_split = ""
+
+                    sub_phonemes.append(codepoint)
+                else:
+                    before_split += codepoint
+
+            if before_split:
+                sub_phonemes.append(before_split)
+
+        for sub_phoneme in sub_phonemes:
+            if not sub_phoneme:
+                continue
+
+            if self.punctuation_map:
+                sub_phoneme = self.punctuation_map.get(sub_phoneme, sub_phoneme)
+
+            to_phonemes = self.phoneme_map.get(sub_phoneme)
+            if to_phonemes:
+                # Mapped to one or more phonemes
+                for to_phoneme in to_phonemes:
+                    ids.extend(self._lookup_ids(to_phoneme))
+            else:
+                ids.extend(self._lookup_ids(sub_phoneme))
+
+        if tone and (not self.tone_before):
+            ids.extend(self._lookup_ids(tone))
+
+        return tuple(ids)
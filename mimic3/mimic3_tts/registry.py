@@ -0,0 +1,141 @@
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""Loaded voices shared between threads"""
+import logging
+import threading
+import typing
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .voice import Mimic3Voice
+
+_LOGGER = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+
+
+@dataclass
+class _KeyLock:
+    """Lock for a voice key while threads are finding or loading it"""
+
+    lock: threading.RLock = field(default_factory=threading.RLock)
+    """Reentrant, since a voice key may also be its own canonical key"""
+
+    num_users: int = 0
+    """Number of threads holding or waiting on the lock"""
+
+
+class VoiceRegistry:
+    """Thread-safe map from voice keys (and aliases) to loaded voices.
+
+    Each voice is loaded at most once, even when several threads ask for it at
+    the same time. Different voices can load in parallel. Looking up a voice
+    that's already loaded doesn't take a lock.
+    """
+
+    def __init__(self):
+        # voice key or alias -> loaded voice
+        self._voices: typing.Dict[str, Mimic3Voice] = {}
+
+        # voice key or alias -> lock held while finding/loading.
+        # Only present while a load is in progress.
+        self._key_locks: typing.Dict[str, _KeyLock] = {}
+        self._lock = threading.Lock()
+
+        self._num_loads = 0
+
+    @property
+    def num_loads(self) -> int:
+        """Number of voices loaded from disk"""
+        return self._num_loads
+
+    def get(self, voice_key: str) -> typing.Optional[Mimic3Voice]:
+        """Get a loaded voice by key or alias without loading"""
+        return self._voices.get(voice_key)
+
+    def get_or_load(
+        self,
+        voice_key: str,
+        find_voice: typing.Callable[[str], Path],
+        load_voice: typing.Callable[[Path], Mimic3Voice],
+    ) -> Mimic3Voice:
+        """Get a loaded voice, or find and load it.
+
+        find_voice returns the model directory for a voice key or alias (and may
+        download the voice). load_voice loads a voice from its model directory.
+        Voices are stored under <language>/<name> of the model directory as well
+        as voice_key.
+        """
+        voice = self._voices.get(voice_key)
+        if voice is not None:
+            return voice
+
+        with self._key_lock(voice_key):
+            voice = self._voices.get(voice_key)
+            if voice is not None:
+                # Loaded by another thread
+                return voice
+
+            model_dir = find_voice(voice_key)
+            canonical_key = f"{model_dir.parent.name}/{model_dir.name}"
+
+            # Alias locks are always taken before canonical key locks
+            with self._key_lock(canonical_key):
+                voice = self._voices.get(canonical_key)
+                if voice is None:
+                    voice = load_voice(model_dir)
+
+                    with self._lock:
+                        self._voices[canonical_key] = voice
+                        self._num_loads += 1
+
+            with self._lock:
+                self._voices[voice_key] = voice
+
+        return voice
+
+    def close(self):
+        """Stop all loaded voice models"""
+        with self._lock:
+            voices = set(self._voices.values())
+            self._voices.clear()
+            self._key_locks.clear()
+
+        for voice in voices:
+            voice.close()
+
+    @contextmanager
+    def _key_lock(self, voice_key: str) -> typing.Iterator[None]:
+        """Hold the lock for a voice key, removing it when no longer used"""
+        with self._lock:
+            key_lock = self._key_locks.get(voice_key)
+            if key_lock is None:
+                key_lock = _KeyLock()
+                self._key_locks[voice_key] = key_lock
+
+            key_lock.num_users += 1
+
+        try:
+            with key_lock.lock:
+                yield
+        finally:
+            with self._lock:
+                key_lock.num_users -= 1
+                if (key_lock.num_users < 1) and (
+                    self._key_locks.get(voice_key) is key_lock
+                ):
+                    self._key_locks.pop(voice_key)
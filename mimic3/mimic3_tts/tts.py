@@ -14,13 +14,16 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 """Implementation of OpenTTS for Mimic 3"""
-import audioop
+import functools
 import itertools
 import logging
 import re
+import threading
 import typing
-from copy import deepcopy
-from dataclasses import dataclass, field
+import weakref
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 
 from gruut_ipa import IPA
@@ -38,9 +41,12 @@ from opentts_abc import (
     Word,
 )
 
-from ._resources import _VOICES
-from .config import TrainingConfig
+from ._resources import get_voices_info
+from .audio import postprocess_audio
+from .cache import CacheStats, LRUCache
+from .catalog import VoiceCatalog, get_catalog_path
 from .const import (
+    DEFAULT_CACHE_DIR,
     DEFAULT_LANGUAGE,
     DEFAULT_RATE,
     DEFAULT_VOICE,
@@ -49,8 +55,9 @@ from .const import (
     DEFAULT_VOLUME,
 )
 from .download import VoiceFile, download_voice
-from .utils import WILDCARD, wildcard_to_regex
-from .voice import SPEAKER_TYPE, BreakType, Mimic3Voice
+from .registry import VoiceRegistry
+from .utils import WILDCARD, split_sentences, wildcard_to_regex
+from .voice import SPEAKER_TYPE, BreakType, Mimic3Voice, PhonemizerStats
 
 _DIR = Path(__file__).parent
 
@@ -100,7 +107,7 @@ class Mimic3Settings:
     """Language of text (use voice language if None)"""
 
     sample_rate: int = 22050
-    """Sample rate of silence from add_break() in Hertz"""
+    """Sample rate of silence from add_break() in Hertz (output_sample_rate takes precedence)"""
 
     voices_download_dir: typing.Union[str, Path] = DEFAULT_VOICES_DOWNLOAD_DIR
     """Directory to download voices to"""
@@ -114,6 +121,18 @@ class Mimic3Settings:
     share_onnx_models_between_threads: bool = True
     """If True, Onnx models are shared between threads"""
 
+    backend: str = "subprocess"
+    """Inference backend for voice models (subprocess or onnx)"""
+
+    onnx_intra_op_threads: int = 1
+    """Number of threads onnxruntime uses within an operator (onnx backend)"""
+
+    onnx_inter_op_threads: int = 1
+    """Number of threads onnxruntime uses across operators (onnx backend)"""
+
+    onnx_enable_mem_arena: bool = False
+    """If True, onnxruntime keeps a CPU memory arena between runs (faster, uses more memory)"""
+
     volume: float = DEFAULT_VOLUME
     """Voice volume in [0, 100]"""
 
@@ -123,12 +142,126 @@ class Mimic3Settings:
     use_deterministic_compute: bool = False
     """Force onnxruntime to use deterministic compute mode. For fully deterministic synthesis, also set noise_scale and noise_w to 0."""
 
+    stream_model_audio: bool = True
+    """If True, model audio is returned over a pipe instead of a temporary WAV file (when supported)"""
+
+    pipeline_depth: int = 4
+    """Maximum number of sentences submitted to a voice model before the first is returned (1 = no pipelining)"""
+
+    workers_per_voice: int = 1
+    """Number of model processes (or onnx inference threads) for each loaded voice"""
+
+    max_total_workers: typing.Optional[int] = None
+    """Maximum number of model processes across all voices (None = number of CPUs)"""
+
+    model_timeout: typing.Optional[float] = 30.0
+    """Seconds without progress before a model process is restarted (None = never)"""
+
+    model_retries: int = 1
+    """Number of times a request is resent after its model process fails"""
+
+    sentence_audio_cache_bytes: int = 16 * 1024 * 1024
+    """Bytes of sentence audio cached by voice, speaker, phoneme ids, and scales (0 = disabled). Shared by all instances in a process. Repeated sentences will sound identical even with noise."""
+
+    phonemes_cache_size: int = 1024
+    """Number of texts whose phonemes are cached by phonemizer and language (0 = disabled). Shared by all instances in a process."""
+
+    phonemes_cache_path: typing.Optional[typing.Union[str, Path]] = None
+    """JSON file where cached phonemes are loaded from and saved to on shutdown (None = not persisted)"""
+
+    phonemize_threads: int = 0
+    """If > 0, text is split into sentences up front and phonemized by this many threads while earlier sentences are synthesized (good for long documents)"""
+
+    words_cache_size: int = 4096
+    """Number of pronunciations of SSML words and say-as elements that are cached by phonemizer and language (0 = disabled). Shared by all instances in a process."""
+
+    voices_catalog_dir: typing.Optional[typing.Union[str, Path]] = DEFAULT_CACHE_DIR
+    """Directory where the index of installed voices is saved between runs (None = not saved)"""
+
+    voices_check_seconds: float = 5.0
+    """Minimum seconds between checks of the voices directories for added, removed, or changed voices"""
+
+    fade_in_ms: float = 0.0
+    """Milliseconds of fade in at the start of each synthesized sentence (0 = disabled)"""
+
+    fade_out_ms: float = 0.0
+    """Milliseconds of fade out at the end of each synthesized sentence (0 = disabled)"""
+
+    output_sample_rate: typing.Optional[int] = None
+    """Resample synthesized audio and silence to this rate in Hertz (None = use voice sample rate)"""
+
+    def snapshot(self) -> "Mimic3SettingsSnapshot":
+        """Immutable copy of the settings used for synthesis.
+
+        Snapshots are interned, so equal settings give the same object and can
+        be compared by identity.
+        """
+        return Mimic3SettingsSnapshot.intern(
+            (
+                self.voice,
+                self.speaker,
+                self.length_scale,
+                self.noise_scale,
+                self.noise_w,
+                self.sample_rate,
+                self.volume,
+                self.rate,
+                self.fade_in_ms,
+                self.fade_out_ms,
+                self.output_sample_rate,
+            )
+        )
+
+
+@dataclass(frozen=True)
+class Mimic3SettingsSnapshot:
+    """Settings used to synthesize audio at the time text or tokens were spoken.
+
+    Create with Mimic3Settings.snapshot().
+    """
+
+    voice: typing.Optional[str]
+    speaker: typing.Optional[SPEAKER_TYPE]
+    length_scale: typing.Optional[float]
+    noise_scale: typing.Optional[float]
+    noise_w: typing.Optional[float]
+    sample_rate: int
+    volume: float
+    rate: float
+    fade_in_ms: float
+    fade_out_ms: float
+    output_sample_rate: typing.Optional[int]
+
+    @property
+    def silence_sample_rate(self) -> int:
+        """Sample rate of silence from breaks"""
+        return self.output_sample_rate or self.sample_rate
+
+    # (field values) -> snapshot, for snapshots that are still in use
+    _INTERNED: typing.ClassVar[
+        "weakref.WeakValueDictionary[typing.Tuple, Mimic3SettingsSnapshot]"
+    ] = weakref.WeakValueDictionary()
+    _INTERNED_LOCK: typing.ClassVar[threading.Lock] = threading.Lock()
+
+    @staticmethod
+    def intern(values: typing.Tuple) -> "Mimic3SettingsSnapshot":
+        """Get the shared snapshot with these field values (in order)"""
+        snapshot = Mimic3SettingsSnapshot._INTERNED.get(values)
+        if snapshot is None:
+            with Mimic3SettingsSnapshot._INTERNED_LOCK:
+                snapshot = Mimic3SettingsSnapshot._INTERNED.get(values)
+                if snapshot is None:
+                    snapshot = Mimic3SettingsSnapshot(*values)
+                    Mimic3SettingsSnapshot._INTERNED[values] = snapshot
+
+        return snapshot
+
 
 @dataclass
 class Mimic3Phonemes:
     """Pending task to synthesize audio from phonemes with specific settings"""
 
-    current_settings: Mimic3Settings
+    current_settings: Mimic3SettingsSnapshot
     """Settings used to synthesize audio"""
 
     phonemes: typing.List[typing.List[str]] = field(default_factory=list)
@@ -138,6 +271,28 @@ class Mimic3Phonemes:
     """True if this is the end of a full utterance"""
 
 
+@dataclass
+class _PendingText:
+    """Text that will be phonemized in end_utterance"""
+
+    results: typing.Iterable[typing.Union[BaseResult, Mimic3Phonemes]]
+    """Phonemes and silence for each sentence (lazy)"""
+
+
+@dataclass
+class _PendingAudio:
+    """Sentence audio that is being synthesized by a voice model"""
+
+    future: "Future[bytes]"
+    """Raw audio from voice model"""
+
+    sample_rate: int
+    """Sample rate of voice model"""
+
+    settings: Mimic3SettingsSnapshot
+    """Settings used to synthesize audio"""
+
+
 class VoiceNotFoundError(Exception):
     """Raised if a voice cannot be found"""
 
@@ -151,11 +306,54 @@ class VoiceNotFoundError(Exception):
 class Mimic3TextToSpeechSystem(TextToSpeechSystem):
     """Convert text to speech using Mimic 3"""
 
-    def __init__(self, settings: Mimic3Settings):
+    _SHARED_AUDIO_CACHE: typing.Optional[LRUCache[typing.Hashable, bytes]] = None
+    _SHARED_AUDIO_CACHE_LOCK = threading.Lock()
+
+    _VOICE_CATALOGS: typing.Dict[typing.Hashable, VoiceCatalog] = {}
+    _VOICE_CATALOGS_LOCK = threading.Lock()
+
+    def __init__(
+        self,
+        settings: Mimic3Settings,
+        voice_registry: typing.Optional[VoiceRegistry] = None,
+    ):
+        """Create a text to speech system.
+
+        Loaded voices are shared with other instances given the same
+        voice_registry. Without one, voices are private to this instance and
+        are stopped by shutdown().
+        """
         self.settings = settings
 
-        self._results: typing.List[typing.Union[BaseResult, Mimic3Phonemes]] = []
+        self._audio_cache: typing.Optional[LRUCache[typing.Hashable, bytes]] = None
+        if settings.sentence_audio_cache_bytes > 0:
+            self._audio_cache = Mimic3TextToSpeechSystem._get_shared_audio_cache(
+                settings.sentence_audio_cache_bytes
+            )
+
+        if settings.phonemes_cache_size > 0:
+            Mimic3Voice.configure_phonemes_cache(
+                settings.phonemes_cache_size, cache_path=settings.phonemes_cache_path
+            )
+
+        if settings.words_cache_size > 0:
+            Mimic3Voice.configure_words_cache(settings.words_cache_size)
+
+        self._results: typing.List[
+            typing.Union[BaseResult, Mimic3Phonemes, _PendingText]
+        ] = []
+
+        self._owns_voice_registry = voice_registry is None
+        self._voice_registry = voice_registry or VoiceRegistry()
+
+        # Voices resolved by this instance (and its contexts), checked before the
+        # registry so repeated lookups don't take a lock.
         self._loaded_voices: typing.Dict[str, Mimic3Voice] = {}
+        self._loaded_voices_lock = threading.RLock()
+        self._phonemize_executor: typing.Optional[ThreadPoolExecutor] = None
+
+        # Instance that created this one with create_context
+        self._parent: typing.Optional[Mimic3TextToSpeechSystem] = None
 
     @staticmethod
     def get_default_voices_directories() -> typing.List[Path]:
@@ -173,115 +371,7 @@ class Mimic3TextToSpeechSystem(TextToSpeechSystem):
 
     def get_voices(self) -> typing.Iterable[Voice]:
         """Returns an iterable of all available voices"""
-        voices_dirs: typing.Iterable[
-            typing.Union[str, Path]
-        ] = Mimic3TextToSpeechSystem.get_default_voices_directories()
-
-        if self.settings.voices_directories is not None:
-            voices_dirs = itertools.chain(self.settings.voices_directories, voices_dirs)
-
-        known_voices = set(_VOICES.keys())
-
-        # voices/<language>/<voice>/
-        for voices_dir in voices_dirs:
-            voices_dir = Path(voices_dir)
-
-            if not voices_dir.is_dir() or voices_dir.name.startswith("."):
-                _LOGGER.debug("Skipping voice directory %s", voices_dir)
-                continue
-
-            _LOGGER.debug("Searching %s for voices", voices_dir)
-
-            for lang_dir in voices_dir.iterdir():
-                if not lang_dir.is_dir() or lang_dir.name.startswith("."):
-                    continue
-
-                for voice_dir in lang_dir.iterdir():
-                    if not voice_dir.is_dir() or voice_dir.name.startswith("."):
-                        continue
-
-                    config_path = voice_dir / "config.json"
-                    if not config_path.is_file():
-                        continue
-
-                    _LOGGER.debug("Voice found in %s", voice_dir)
-                    voice_lang = lang_dir.name
-
-                    # Load config
-                    _LOGGER.debug("Loading config from %s", config_path)
-
-                    with open(config_path, "r", encoding="utf-8") as config_file:
-                        config = TrainingConfig.load(config_file)
-
-                    properties: typing.Dict[str, typing.Any] = {
-                        "length_scale": config.inference.length_scale,
-                        "noise_scale": config.inference.noise_scale,
-                        "noise_w": config.inference.noise_w,
-                    }
-
-                    # Load speaker names
-                    voice_name = voice_dir.name
-                    speakers: typing.Optional[typing.Sequence[str]] = None
-
-                    speakers_path = voice_dir / "speakers.txt"
-                    if speakers_path.is_file():
-                        speakers = []
-                        with open(
-                            speakers_path, "r", encoding="utf-8"
-                        ) as speakers_file:
-                            for line in speakers_file:
-                                line = line.strip()
-                                if line:
-                                    speakers.append(line)
-
-                    # Load aliases
-                    aliases: typing.Optional[typing.Set[str]] = None
-                    aliases_path = voice_dir / "ALIASES"
-                    if aliases_path.is_file():
-                        aliases = set()
-
-                        with open(aliases_path, "r", encoding="utf-8") as aliases_file:
-                            for line in aliases_file:
-                                line = line.strip()
-                                if line:
-                                    aliases.add(line)
-
-                    voice_key = f"{voice_lang}/{voice_name}"
-
-                    yield Voice(
-                        key=voice_key,
-                        name=voice_name,
-                        language=voice_lang,
-                        description="",
-                        speakers=speakers,
-                        location=str(voice_dir.absolute()),
-                        properties=properties,
-                        aliases=aliases,
-                    )
-
-                    known_voices.discard(voice_key)
-
-        # Yield voices that haven't yet been downloaded
-        for voice_key in known_voices:
-            voice_lang, voice_name = voice_key.split("/", maxsplit=1)
-            voice_info = _VOICES.get(voice_key, {})
-            speakers = voice_info.get("speakers", [])
-            properties = voice_info.get("properties", {})
-
-            yield Voice(
-                key=voice_key,
-                name=voice_name,
-                language=voice_lang,
-                description="",
-                speakers=speakers,
-                location=str.format(
-                    self.settings.voices_url_format or DEFAULT_VOICES_URL_FORMAT,
-                    lang=voice_lang,
-                    name=voice_name,
-                    key=voice_key,
-                ),
-                properties=properties,
-            )
+        return self._get_voice_catalog().voices()
 
     def preload_voice(self, voice_key: str):
         """Ensure voice(s) are loaded in memory before synthesis.
@@ -294,7 +384,7 @@ class Mimic3TextToSpeechSystem(TextToSpeechSystem):
             key_or_pattern = wildcard_to_regex(voice_key, wildcard=WILDCARD)
             if isinstance(key_or_pattern, re.Pattern):
                 # Wildcards
-                for maybe_key in _VOICES.keys():
+                for maybe_key in get_voices_info().keys():
                     if key_or_pattern.match(maybe_key):
                         voice_keys.append(maybe_key)
 
@@ -309,6 +399,31 @@ class Mimic3TextToSpeechSystem(TextToSpeechSystem):
         for key_to_load in voice_keys:
             self._get_or_load_voice(key_to_load)
 
+    def create_context(
+        self, voice: typing.Optional[str] = None, **settings_changes
+    ) -> "Mimic3TextToSpeechSystem":
+        """Create a system for a single request with its own settings.
+
+        Settings are copied from this instance with settings_changes applied,
+        and voice (with optional #speaker) is loaded before returning. Loaded
+        voices, caches, and phonemization threads are shared with this
+        instance, so contexts are cheap to create and don't need shutdown().
+        """
+        context = Mimic3TextToSpeechSystem(
+            replace(self.settings, **settings_changes),
+            voice_registry=self._voice_registry,
+        )
+        context._parent = self._parent or self
+        context._loaded_voices = self._loaded_voices
+
+        if voice is not None:
+            context.voice = voice
+
+        # Fail early if voice doesn't exist
+        context._get_or_load_voice(context.voice)
+
+        return context
+
     # -------------------------------------------------------------------------
 
     @property
@@ -372,6 +487,68 @@ class Mimic3TextToSpeechSystem(TextToSpeechSystem):
         if append_text and (not text.endswith(append_text)):
             text += append_text
 
+        if self.settings.phonemize_threads > 0:
+            # Sentences are phonemized on worker threads starting now, and
+            # consumed in order by end_utterance.
+            results = self._phonemize_sentences(
+                voice,
+                text,
+                text_language=text_language,
+                settings=self.settings.snapshot(),
+            )
+        else:
+            # Text is phonemized lazily in end_utterance, so the next sentence
+            # is being phonemized while the voice model synthesizes the
+            # previous one.
+            results = self._text_to_results(
+                voice,
+                text,
+                text_language=text_language,
+                settings=self.settings.snapshot(),
+            )
+
+        self._results.append(_PendingText(results=results))
+
+    def _phonemize_sentences(
+        self,
+        voice: Mimic3Voice,
+        text: str,
+        text_language: typing.Optional[str],
+        settings: Mimic3SettingsSnapshot,
+    ) -> typing.Iterable[typing.Union[BaseResult, Mimic3Phonemes]]:
+        """Split text into sentences and start phonemizing them in parallel"""
+        # Contexts use the threads of the instance that created them
+        owner = self._parent or self
+        with owner._loaded_voices_lock:
+            if owner._phonemize_executor is None:
+                owner._phonemize_executor = ThreadPoolExecutor(
+                    max_workers=self.settings.phonemize_threads,
+                    thread_name_prefix="mimic3_phonemize",
+                )
+
+            executor = owner._phonemize_executor
+
+        futures = [
+            executor.submit(
+                lambda sentence: list(
+                    self._text_to_results(voice, sentence, text_language, settings)
+                ),
+                sentence,
+            )
+            for sentence in split_sentences(text)
+        ]
+
+        return itertools.chain.from_iterable(future.result() for future in futures)
+
+    def _text_to_results(
+        self,
+        voice: Mimic3Voice,
+        text: str,
+        text_language: typing.Optional[str],
+        settings: Mimic3SettingsSnapshot,
+    ) -> typing.Iterable[typing.Union[BaseResult, Mimic3Phonemes]]:
+        """Phonemize text into sentences, with optional silence between them"""
+
         # Automatic silence after major/minor breaks (optional)
         minor_break_ms = voice.config.inference.minor_break_ms
         major_break_ms = voice.config.inference.major_break_ms
@@ -394,21 +571,19 @@ class Mimic3TextToSpeechSystem(TextToSpeechSystem):
                 or add_minor_silence
             )
 
-            self._results.append(
-                Mimic3Phonemes(
-                    current_settings=deepcopy(self.settings),
-                    phonemes=sent_phonemes,
-                    is_utterance=is_utterance,
-                )
+            yield Mimic3Phonemes(
+                current_settings=settings,
+                phonemes=sent_phonemes,
+                is_utterance=is_utterance,
             )
 
             # Add silence if using manual break intervals
             if add_major_silence:
                 assert major_break_ms is not None
-                self.add_break(major_break_ms)
+                yield self._make_silence(major_break_ms, settings.silence_sample_rate)
             elif add_minor_silence:
                 assert minor_break_ms is not None
-                self.add_break(minor_break_ms)
+                yield self._make_silence(minor_break_ms, settings.silence_sample_rate)
 
     # pylint: disable=arguments-differ
     def speak_tokens(
@@ -443,46 +618,123 @@ class Mimic3TextToSpeechSystem(TextToSpeechSystem):
         if token_phonemes:
             self._results.append(
                 Mimic3Phonemes(
-                    current_settings=deepcopy(self.settings),
+                    current_settings=self.settings.snapshot(),
                     phonemes=token_phonemes,
                     is_utterance=False,
                 )
             )
 
     def add_break(self, time_ms: int):
+        self._results.append(
+            self._make_silence(time_ms, self.settings.snapshot().silence_sample_rate)
+        )
+
+    @staticmethod
+    def _make_silence(time_ms: int, sample_rate: int) -> AudioResult:
         # Generate silence (16-bit mono at sample rate)
-        num_samples = int((time_ms / 1000.0) * self.settings.sample_rate)
+        num_samples = int((time_ms / 1000.0) * sample_rate)
         audio_bytes = bytes(num_samples * 2)
 
-        self._results.append(
-            AudioResult(
-                sample_rate_hz=self.settings.sample_rate,
-                audio_bytes=audio_bytes,
-                # 16-bit mono
-                sample_width_bytes=2,
-                num_channels=1,
-            )
+        return AudioResult(
+            sample_rate_hz=sample_rate,
+            audio_bytes=audio_bytes,
+            # 16-bit mono
+            sample_width_bytes=2,
+            num_channels=1,
         )
 
     def set_mark(self, name: str):
         self._results.append(MarkResult(name=name))
 
     def end_utterance(self) -> typing.Iterable[BaseResult]:
-        last_settings: typing.Optional[Mimic3Settings] = None
+        # Sentences are submitted to the voice model ahead of the one being
+        # returned, so synthesis overlaps with the caller consuming results.
+        pipeline_depth = max(1, self.settings.pipeline_depth)
+        pending: "typing.Deque[typing.Union[BaseResult, _PendingAudio]]" = deque()
+
+        for result in self._submit_results():
+            pending.append(result)
+
+            while pending and (
+                (len(pending) >= pipeline_depth)
+                or (not isinstance(pending[0], _PendingAudio))
+                or pending[0].future.done()
+            ):
+                yield self._finish_result(pending.popleft())
+
+        while pending:
+            yield self._finish_result(pending.popleft())
+
+    @staticmethod
+    def get_cache_stats() -> typing.Dict[str, CacheStats]:
+        """Statistics for caches shared by all instances in this process"""
+        cache_stats: typing.Dict[str, CacheStats] = {}
+        audio_cache = Mimic3TextToSpeechSystem._SHARED_AUDIO_CACHE
+        if audio_cache is not None:
+            cache_stats["sentence_audio"] = audio_cache.stats
+
+        cache_stats["phonemes"] = Mimic3Voice.get_phonemes_cache_stats()
+        cache_stats["words"] = Mimic3Voice.get_words_cache_stats()
+
+        return cache_stats
+
+    @staticmethod
+    def get_phonemizer_stats() -> typing.List[PhonemizerStats]:
+        """Cache hits and phonemization time for each phonemizer used"""
+        return Mimic3Voice.get_phonemizer_stats()
+
+    def shutdown(self):
+        """Stop all loaded voice models and save cached phonemes (if enabled).
+
+        Voices in a registry passed to the constructor are left running.
+        """
+        if self._parent is not None:
+            # Context shares everything with its parent
+            self._results.clear()
+            return
+
+        with self._loaded_voices_lock:
+            if self._owns_voice_registry:
+                self._voice_registry.close()
+
+            self._loaded_voices.clear()
+
+            if self._phonemize_executor is not None:
+                self._phonemize_executor.shutdown(wait=False)
+                self._phonemize_executor = None
+
+        if (self.settings.phonemes_cache_size > 0) and (
+            self.settings.phonemes_cache_path is not None
+        ):
+            try:
+                Mimic3Voice.save_phonemes_cache(self.settings.phonemes_cache_path)
+            except Exception:
+                _LOGGER.exception(
+                    "Failed to save phonemes cache to %s",
+                    self.settings.phonemes_cache_path,
+                )
+
+    # -------------------------------------------------------------------------
+
+    def _submit_results(
+        self,
+    ) -> typing.Iterable[typing.Union[BaseResult, _PendingAudio]]:
+        """Submit pending phonemes for synthesis in utterance order"""
+        last_settings: typing.Optional[Mimic3SettingsSnapshot] = None
         sent_phonemes: PHONEMES_LIST_TYPE = []
 
-        for result in self._results:
+        for result in self._iter_results():
             if isinstance(result, Mimic3Phonemes):
                 if result.is_utterance:
                     # Utterance boundary
                     if (
                         sent_phonemes
                         and (last_settings is not None)
-                        and (result.current_settings != last_settings)
+                        and (result.current_settings is not last_settings)
                     ):
                         # Not compatible with existing utterance.
                         # Need to speak previous utterance first.
-                        yield self._speak_sentence_phonemes(
+                        yield self._submit_sentence_phonemes(
                             sent_phonemes, settings=last_settings
                         )
                         sent_phonemes.clear()
@@ -490,7 +742,7 @@ class Mimic3TextToSpeechSystem(TextToSpeechSystem):
                     # Current utterance
                     sent_phonemes.extend(result.phonemes)
                     if sent_phonemes:
-                        yield self._speak_sentence_phonemes(
+                        yield self._submit_sentence_phonemes(
                             sent_phonemes, settings=last_settings
                         )
                         sent_phonemes.clear()
@@ -501,7 +753,7 @@ class Mimic3TextToSpeechSystem(TextToSpeechSystem):
                 last_settings = result.current_settings
             else:
                 if sent_phonemes:
-                    yield self._speak_sentence_phonemes(
+                    yield self._submit_sentence_phonemes(
                         sent_phonemes, settings=last_settings
                     )
                     sent_phonemes.clear()
@@ -509,39 +761,132 @@ class Mimic3TextToSpeechSystem(TextToSpeechSystem):
                 yield result
 
         if sent_phonemes:
-            yield self._speak_sentence_phonemes(sent_phonemes, settings=last_settings)
+            yield self._submit_sentence_phonemes(sent_phonemes, settings=last_settings)
             sent_phonemes.clear()
 
         self._results.clear()
 
-    # -------------------------------------------------------------------------
+    def _iter_results(
+        self,
+    ) -> typing.Iterable[typing.Union[BaseResult, Mimic3Phonemes]]:
+        """Iterate over results, phonemizing pending text along the way"""
+        for result in self._results:
+            if isinstance(result, _PendingText):
+                yield from result.results
+            else:
+                yield result
 
     def _speak_sentence_phonemes(
         self,
         sent_phonemes,
-        settings: typing.Optional[Mimic3Settings] = None,
+        settings: typing.Optional[Mimic3SettingsSnapshot] = None,
     ) -> AudioResult:
         """Synthesize audio from phonemes using given setings"""
-        settings = settings or self.settings
+        return self._finish_audio(
+            self._submit_sentence_phonemes(sent_phonemes, settings=settings)
+        )
+
+    def _submit_sentence_phonemes(
+        self,
+        sent_phonemes,
+        settings: typing.Optional[Mimic3SettingsSnapshot] = None,
+    ) -> _PendingAudio:
+        """Start synthesizing audio from phonemes using given settings"""
+        settings = settings or self.settings.snapshot()
         voice = self._get_or_load_voice(settings.voice or self.voice)
         sent_phoneme_ids = voice.phonemes_to_ids(sent_phonemes)
 
         _LOGGER.debug("phonemes=%s, ids=%s", sent_phonemes, sent_phoneme_ids)
 
-        audio_bytes = voice.ids_to_audio(
-            sent_phoneme_ids,
-            speaker=settings.speaker,
-            length_scale=settings.length_scale,
-            noise_scale=settings.noise_scale,
-            noise_w=settings.noise_w,
-            rate=settings.rate,
+        audio_cache = self._audio_cache
+        cache_key: typing.Optional[typing.Hashable] = None
+        future: "typing.Optional[Future[bytes]]" = None
+
+        if audio_cache is not None:
+            cache_key = (
+                settings.voice or self.voice,
+                settings.speaker,
+                sent_phoneme_ids.tobytes(),
+                settings.length_scale,
+                settings.noise_scale,
+                settings.noise_w,
+                settings.rate,
+            )
+
+            cached_audio = audio_cache.get(cache_key)
+            if cached_audio is not None:
+                _LOGGER.debug("Using cached audio for phoneme ids")
+                future = Future()
+                future.set_result(cached_audio)
+
+        if future is None:
+            future = voice.submit_ids(
+                sent_phoneme_ids,
+                speaker=settings.speaker,
+                length_scale=settings.length_scale,
+                noise_scale=settings.noise_scale,
+                noise_w=settings.noise_w,
+                rate=settings.rate,
+            )
+
+            if (audio_cache is not None) and (cache_key is not None):
+                future.add_done_callback(
+                    functools.partial(self._cache_audio, audio_cache, cache_key)
+                )
+
+        return _PendingAudio(
+            future=future,
+            sample_rate=voice.config.audio.sample_rate,
+            settings=settings,
         )
 
-        if settings.volume != DEFAULT_VOLUME:
-            audio_bytes = audioop.mul(audio_bytes, 2, settings.volume / 100.0)
+    @staticmethod
+    def _cache_audio(
+        audio_cache: LRUCache[typing.Hashable, bytes],
+        cache_key: typing.Hashable,
+        future: "Future[bytes]",
+    ):
+        """Store audio from voice model in cache, if it was synthesized"""
+        if (not future.cancelled()) and (future.exception() is None):
+            audio_cache.put(cache_key, future.result())
+
+    @staticmethod
+    def _get_shared_audio_cache(max_bytes: int) -> LRUCache[typing.Hashable, bytes]:
+        """Get or create the sentence audio cache shared by all instances"""
+        with Mimic3TextToSpeechSystem._SHARED_AUDIO_CACHE_LOCK:
+            audio_cache = Mimic3TextToSpeechSystem._SHARED_AUDIO_CACHE
+            if audio_cache is None:
+                audio_cache = LRUCache(max_bytes, get_size=len)
+                Mimic3TextToSpeechSystem._SHARED_AUDIO_CACHE = audio_cache
+            else:
+                # Largest requested size wins
+                audio_cache.max_size = max(audio_cache.max_size, max_bytes)
+
+            return audio_cache
+
+    def _finish_result(
+        self, result: typing.Union[BaseResult, _PendingAudio]
+    ) -> BaseResult:
+        """Wait for audio if result is still being synthesized"""
+        if isinstance(result, _PendingAudio):
+            return self._finish_audio(result)
+
+        return result
+
+    def _finish_audio(self, pending: _PendingAudio) -> AudioResult:
+        """Wait for synthesized audio and apply post-processing"""
+        settings = pending.settings
+        audio_bytes, sample_rate = postprocess_audio(
+            pending.future.result(),
+            pending.sample_rate,
+            gain=settings.volume / 100.0,
+            fade_in_ms=settings.fade_in_ms,
+            fade_out_ms=settings.fade_out_ms,
+            output_sample_rate=settings.output_sample_rate,
+        )
 
         return AudioResult(
-            sample_rate_hz=voice.config.audio.sample_rate,
+            sample_rate_hz=sample_rate,
             audio_bytes=audio_bytes,
             # 16-bit mono
             sample_width_bytes=2,
@@ -550,41 +895,35 @@ class Mimic3TextToSpeechSystem(TextToSpeechSystem):
 
     def _get_or_load_voice(self, voice_key: str) -> Mimic3Voice:
         """Get a loaded voice or load from the file system"""
-        existing_voice = self._loaded_voices.get(voice_key)
-        if existing_voice is not None:
-            return existing_voice
-
-        # Look up as substring of known voice
-        model_dir: typing.Optional[Path] = None
-        for maybe_voice in self.get_voices():
-            if (voice_key == maybe_voice.key) or (
-                maybe_voice.aliases and (voice_key in maybe_voice.aliases)
-            ):
-                maybe_model_dir = Path(maybe_voice.location)
-
-                if (not maybe_model_dir.is_dir()) and (not self.settings.no_download):
-                    # Download voice
-                    maybe_model_dir = self._download_voice(voice_key)
+        voice = self._loaded_voices.get(voice_key)
+        if voice is None:
+            voice = self._voice_registry.get_or_load(
+                voice_key, self._find_voice, self._load_voice
+            )
+            self._loaded_voices[voice_key] = voice
 
-                if maybe_model_dir.is_dir():
-                    # Voice found
-                    model_dir = maybe_model_dir
-                    break
+        return voice
 
-        if model_dir is None:
-            raise VoiceNotFoundError(voice_key)
+    def _find_voice(self, voice_key: str) -> Path:
+        """Model directory of a voice by key or alias (downloads if needed)"""
+        catalog = self._get_voice_catalog()
+        maybe_voice = catalog.find(voice_key)
+        if maybe_voice is not None:
+            maybe_model_dir = Path(maybe_voice.location)
 
-        voice_lang = model_dir.parent.name
-        voice_name = model_dir.name
-        canonical_key = f"{voice_lang}/{voice_name}"
+            if (not maybe_model_dir.is_dir()) and (not self.settings.no_download):
+                # Download voice
+                maybe_model_dir = self._download_voice(maybe_voice.key)
+                catalog.invalidate()
 
-        existing_voice = self._loaded_voices.get(canonical_key)
-        if existing_voice is not None:
-            # Alias
-            self._loaded_voices[voice_key] = existing_voice
+            if maybe_model_dir.is_dir():
+                # Voice found
+                return maybe_model_dir
 
-            return existing_voice
+        raise VoiceNotFoundError(voice_key)
 
+    def _load_voice(self, model_dir: Path) -> Mimic3Voice:
+        """Load a voice from its model directory"""
         # https://onnxruntime.ai/docs/execution-providers/
         providers = None
         if self.settings.use_cuda:
@@ -595,20 +934,53 @@ class Mimic3TextToSpeechSystem(TextToSpeechSystem):
             providers=providers,
             share_models=self.settings.share_onnx_models_between_threads,
             use_deterministic_compute=self.settings.use_deterministic_compute,
+            backend=self.settings.backend,
+            intra_op_num_threads=self.settings.onnx_intra_op_threads,
+            inter_op_num_threads=self.settings.onnx_inter_op_threads,
+            enable_mem_arena=self.settings.onnx_enable_mem_arena,
+            stream_audio=self.settings.stream_model_audio,
+            num_workers=self.settings.workers_per_voice,
+            max_total_workers=self.settings.max_total_workers,
+            request_timeout=self.settings.model_timeout,
+            max_retries=self.settings.model_retries,
         )
 
         _LOGGER.info("Loaded voice from %s", model_dir)
 
-        # Add to cache
-        self._loaded_voices[voice_key] = voice
-        self._loaded_voices[canonical_key] = voice
-
         return voice
 
+    def _get_voice_catalog(self) -> VoiceCatalog:
+        """Get the shared catalog for this instance's voices directories"""
+        voices_dirs: typing.List[Path] = []
+        if self.settings.voices_directories is not None:
+            voices_dirs.extend(Path(d) for d in self.settings.voices_directories)
+
+        voices_dirs.extend(Mimic3TextToSpeechSystem.get_default_voices_directories())
+
+        catalog_key = (tuple(voices_dirs), self.settings.voices_url_format)
+        with Mimic3TextToSpeechSystem._VOICE_CATALOGS_LOCK:
+            catalog = Mimic3TextToSpeechSystem._VOICE_CATALOGS.get(catalog_key)
+            if catalog is None:
+                cache_path: typing.Optional[Path] = None
+                if self.settings.voices_catalog_dir is not None:
+                    cache_path = get_catalog_path(
+                        self.settings.voices_catalog_dir, voices_dirs
+                    )
+
+                catalog = VoiceCatalog(
+                    voices_dirs,
+                    voices_url_format=self.settings.voices_url_format,
+                    cache_path=cache_path,
+                    check_seconds=self.settings.voices_check_seconds,
+                )
+                Mimic3TextToSpeechSystem._VOICE_CATALOGS[catalog_key] = catalog
+
+        return catalog
+
     def _download_voice(self, voice_key: str) -> Path:
         """Downloads a voice by key"""
         voice_lang, voice_name = voice_key.split("/", maxsplit=1)
-        voice_info = _VOICES[voice_key]
+        voice_info = get_voices_info()[voice_key]
         voice_url = str.format(
             self.settings.voices_url_format or DEFAULT_VOICES_URL_FORMAT,
             key=voice_key,
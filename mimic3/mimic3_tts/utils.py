@@ -24,6 +24,12 @@ import numpy as np
 # Wildcard character for voice keys (e.g., en_US/*)
 WILDCARD = "*"
 
+# End of sentence punctuation (with closing quotes/brackets) or a blank line
+_SENTENCE_BOUNDARY = re.compile(r"([.!?…。！？।]+[\"'”’»)\]]*)\s+|\n\s*\n")
+
+# Short capitalized words that are usually abbreviations (Dr., St., J.)
+_ABBREVIATION = re.compile(r"(?:^|\s)[A-Z][a-z]{0,2}\.$")
+
 # Language code to native/English language name
 LANG_NAMES = {
     "bn": ("বাংলা", "Bengali"),
@@ -279,3 +285,36 @@ def file_sha256_sum(fp: typing.BinaryIO, block_bytes: int = 4096) -> str:
 def to_codepoints(s: str) -> typing.List[str]:
     """Split string into a list of codepoints"""
     return list(unicodedata.normalize("NFC", s))
+
+
+def split_sentences(text: str) -> typing.List[str]:
+    """Split text into sentences at end punctuation and blank lines.
+
+    Errs on the side of not splitting, since phonemizers still split sentences
+    themselves: within a paragraph, text is not split before a lowercase letter
+    or after a short capitalized word ending in a period (e.g., "Dr. Smith").
+    """
+    sentences: typing.List[str] = []
+    start_idx = 0
+
+    for match in _SENTENCE_BOUNDARY.finditer(text):
+        end_idx = match.end()
+        is_paragraph = match.group(0).count("\n") > 1
+        if not is_paragraph:
+            if (end_idx < len(text)) and text[end_idx].islower():
+                continue
+
+            if _ABBREVIATION.search(text[start_idx : match.end(1)]):
+                continue
+
+        sentence = text[start_idx:end_idx].strip()
+        if sentence:
+            sentences.append(sentence)
+
+        start_idx = end_idx
+
+    sentence = text[start_idx:].strip()
+    if sentence:
+        sentences.append(sentence)
+
+    return sentences
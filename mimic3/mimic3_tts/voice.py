@@ -14,32 +14,45 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 import csv
-import io
+import dataclasses
+import hashlib
 import json
 import logging
-import platform
-import subprocess
-import threading
+import os
 import tempfile
+import threading
 import time
 import typing
-import wave
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import Future
+from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 from xml.sax.saxutils import escape as xmlescape
 
-import epitran
-import espeak_phonemizer
-import gruut
 import numpy as np
-import onnxruntime
 import phonemes2ids
 from gruut_ipa import IPA
 
-from .config import Phonemizer, TrainingConfig
+from .cache import CacheStats, LRUCache
+from .config import Phonemizer, TrainingConfig, VoiceConfig
 from .const import DEFAULT_RATE
-from .utils import audio_float_to_int16, to_codepoints
+from .backend import (
+    PROVIDERS_TYPE,
+    InferenceBackend,
+    InferenceBackendType,
+    ModelPoolMetrics,
+    OnnxBackend,
+)
+from .model_process import ModelProcessPool
+from .phoneme_ids import PhonemeIdEncoder
+from .utils import to_codepoints
+
+if typing.TYPE_CHECKING:
+    # Phonemizers and onnxruntime are imported only when a voice needs them
+    import epitran
+    import espeak_phonemizer
+    import onnxruntime
 
 # -----------------------------------------------------------------------------
 
@@ -64,37 +77,158 @@ SPEAKER_MAP_TYPE = typing.Dict[SPEAKER_NAME_TYPE, SPEAKER_ID_TYPE]
 
 DEFAULT_LANGUAGE = "en_US"
 
+# (phonemizer, phoneme settings hash, language, normalized text)
+PHONEMES_CACHE_KEY_TYPE = typing.Tuple[str, str, str, str]
+
+# ((words, break type), ...) with words as tuples so they can't be modified
+CACHED_PHONEMES_TYPE = typing.Tuple[
+    typing.Tuple[typing.Tuple[typing.Tuple[PHONEME_TYPE, ...], ...], BreakType], ...
+]
+
 _LOGGER = logging.getLogger(__name__)
 
 
 # -----------------------------------------------------------------------------
 
 
+@dataclass
+class PhonemizerStats:
+    """Counters for text_to_phonemes of one phonemizer"""
+
+    phonemizer: str
+    """Name of phonemizer (e.g., gruut)"""
+
+    hits: int = 0
+    """Number of texts whose phonemes were cached"""
+
+    misses: int = 0
+    """Number of texts that had to be phonemized"""
+
+    phonemize_seconds: float = 0.0
+    """Total time spent phonemizing texts that were not cached"""
+
+    @property
+    def mean_phonemize_ms(self) -> float:
+        """Average time to phonemize a text that was not cached"""
+        return (1000 * self.phonemize_seconds / self.misses) if self.misses > 0 else 0.0
+
+
 class Mimic3Voice(metaclass=ABCMeta):
-    """Base class for Mimic 3 voice implementations"""
+    """Base class for Mimic 3 voice implementations.
+
+    Results of text_to_phonemes are memoized in a cache shared by all voices
+    with the same phonemizer and phoneme settings (see configure_phonemes_cache).
+    """
+
+    PHONEMIZER = ""
+    """Name of phonemizer for caching and statistics (empty = not cached)"""
+
+    # Disabled until configured
+    _PHONEMES_CACHE: "LRUCache[PHONEMES_CACHE_KEY_TYPE, CACHED_PHONEMES_TYPE]" = (
+        LRUCache(0)
+    )
+    _PHONEMES_CACHE_LOCK = threading.Lock()
 
-    _SHARED_MODELS: typing.Dict[str, onnxruntime.InferenceSession] = {}
-    _SHARED_MODELS_LOCK = threading.Lock()
+    # Pronunciations from word_to_phonemes and say_as_to_phonemes
+    _WORDS_CACHE: "LRUCache[typing.Hashable, typing.Tuple]" = LRUCache(0)
+    _PHONEMES_CACHE_LOADED_PATHS: typing.Set[Path] = set()
+    _PHONEMIZER_STATS: typing.Dict[str, PhonemizerStats] = {}
 
     def __init__(
         self,
-        config: TrainingConfig,
-        model_proc: subprocess.Popen,
+        config: typing.Union[VoiceConfig, TrainingConfig],
+        model: InferenceBackend,
         phoneme_to_id: typing.Dict[PHONEME_TYPE, int],
         phoneme_map: typing.Optional[PHONEME_MAP_TYPE] = None,
         speaker_map: typing.Optional[SPEAKER_MAP_TYPE] = None,
+        phoneme_encoder: typing.Optional[PhonemeIdEncoder] = None,
     ):
         self.config = config
-        self.model_proc = model_proc
+        self.model = model
         self.phoneme_to_id = phoneme_to_id
         self.phoneme_map = phoneme_map
         self.speaker_map = speaker_map
 
-    @abstractmethod
+        if phoneme_encoder is None:
+            phoneme_encoder = PhonemeIdEncoder(
+                phoneme_to_id, config.phonemes, phoneme_map=phoneme_map
+            )
+
+        self.phoneme_encoder = phoneme_encoder
+
+        # Phonemizer output also depends on these settings
+        phonemizer_settings = (
+            config.phonemes.word_separator,
+            config.phonemes.minor_break,
+            config.phonemes.major_break,
+            config.phonemes.break_phonemes_into_codepoints,
+        )
+        self._phonemes_hash = hashlib.md5(
+            repr(phonemizer_settings).encode("utf-8")
+        ).hexdigest()
+
     def text_to_phonemes(
         self, text: str, text_language: typing.Optional[str] = None
     ) -> TEXT_TO_PHONEMES_TYPE:
-        """Convert text into phonemes"""
+        """Convert text into phonemes.
+
+        Sentences are yielded as soon as they're phonemized. Once all of them
+        have been, they're cached by phonemizer, language, and text (with
+        whitespace normalized).
+        """
+        text_language = text_language or self.config.text_language or DEFAULT_LANGUAGE
+
+        if not self.PHONEMIZER:
+            yield from self._text_to_phonemes(text, text_language)
+            return
+
+        phonemes_cache = Mimic3Voice._PHONEMES_CACHE
+        cache_key = (
+            self.PHONEMIZER,
+            self._phonemes_hash,
+            text_language,
+            " ".join(text.split()),
+        )
+        stats = Mimic3Voice._get_phonemizer_stats(self.PHONEMIZER)
+
+        cached_phonemes = phonemes_cache.get(cache_key)
+        if cached_phonemes is not None:
+            with Mimic3Voice._PHONEMES_CACHE_LOCK:
+                stats.hits += 1
+
+            for cached_sent_phonemes, break_type in cached_phonemes:
+                yield [list(word) for word in cached_sent_phonemes], break_type
+
+            return
+
+        with Mimic3Voice._PHONEMES_CACHE_LOCK:
+            stats.misses += 1
+
+        new_phonemes = []
+        phonemes_iter = iter(self._text_to_phonemes(text, text_language))
+        while True:
+            start_time = time.perf_counter()
+            try:
+                sent_phonemes, break_type = next(phonemes_iter)
+            except StopIteration:
+                break
+            finally:
+                with Mimic3Voice._PHONEMES_CACHE_LOCK:
+                    stats.phonemize_seconds += time.perf_counter() - start_time
+
+            if phonemes_cache.max_size > 0:
+                new_phonemes.append(
+                    (tuple(tuple(word) for word in sent_phonemes), break_type)
+                )
+
+            yield sent_phonemes, break_type
+
+        if phonemes_cache.max_size > 0:
+            phonemes_cache.put(cache_key, tuple(new_phonemes))
+
+    @abstractmethod
+    def _text_to_phonemes(self, text: str, text_language: str) -> TEXT_TO_PHONEMES_TYPE:
+        """Convert text into phonemes (not cached)"""
 
     def word_to_phonemes(
         self,
@@ -102,7 +236,76 @@ class Mimic3Voice(metaclass=ABCMeta):
         word_role: typing.Optional[str] = None,
         text_language: typing.Optional[str] = None,
     ) -> typing.List[PHONEME_TYPE]:
-        """Convert a single word (with optional role) into phonemes"""
+        """Convert a single word (with optional role) into phonemes.
+
+        Pronunciations are cached by phonemizer, language, word, and role.
+        """
+        text_language = text_language or self.config.text_language or DEFAULT_LANGUAGE
+
+        if not self.PHONEMIZER:
+            return self._word_to_phonemes(word_text, word_role, text_language)
+
+        cache_key = (
+            "word",
+            self.PHONEMIZER,
+            self._phonemes_hash,
+            text_language,
+            word_text,
+            word_role or "",
+        )
+        cached_phonemes = Mimic3Voice._WORDS_CACHE.get(cache_key)
+        if cached_phonemes is None:
+            cached_phonemes = tuple(
+                self._word_to_phonemes(word_text, word_role, text_language)
+            )
+            Mimic3Voice._WORDS_CACHE.put(cache_key, cached_phonemes)
+
+        return list(cached_phonemes)
+
+    def say_as_to_phonemes(
+        self,
+        text: str,
+        interpret_as: str,
+        say_format: typing.Optional[str] = None,
+        text_language: typing.Optional[str] = None,
+    ) -> WORD_PHONEMES_TYPE:
+        """Speak a word or phrase with a specific interpretation/format.
+
+        Pronunciations are cached by phonemizer, language, interpretation,
+        format, and text.
+        """
+        text_language = text_language or self.config.text_language or DEFAULT_LANGUAGE
+
+        if not self.PHONEMIZER:
+            return self._say_as_to_phonemes(
+                text, interpret_as, say_format, text_language
+            )
+
+        cache_key = (
+            "say-as",
+            self.PHONEMIZER,
+            self._phonemes_hash,
+            text_language,
+            interpret_as,
+            say_format or "",
+            text,
+        )
+        cached_phonemes = Mimic3Voice._WORDS_CACHE.get(cache_key)
+        if cached_phonemes is None:
+            cached_phonemes = tuple(
+                tuple(word_phonemes)
+                for word_phonemes in self._say_as_to_phonemes(
+                    text, interpret_as, say_format, text_language
+                )
+            )
+            Mimic3Voice._WORDS_CACHE.put(cache_key, cached_phonemes)
+
+        return [list(word_phonemes) for word_phonemes in cached_phonemes]
+
+    def _word_to_phonemes(
+        self, word_text: str, word_role: typing.Optional[str], text_language: str
+    ) -> typing.List[PHONEME_TYPE]:
+        """Convert a single word into phonemes (not cached)"""
         word_phonemes = []
         for sent_phonemes, _break_type in self.text_to_phonemes(
             word_text, text_language=text_language
@@ -112,14 +315,14 @@ class Mimic3Voice(metaclass=ABCMeta):
 
         return word_phonemes
 
-    def say_as_to_phonemes(
+    def _say_as_to_phonemes(
         self,
         text: str,
         interpret_as: str,
-        say_format: typing.Optional[str] = None,
-        text_language: typing.Optional[str] = None,
+        say_format: typing.Optional[str],
+        text_language: str,
     ) -> WORD_PHONEMES_TYPE:
-        """Speak a word or phrase with a specific interpretation/format"""
+        """Convert a word or phrase with an interpretation into phonemes (not cached)"""
         word_phonemes = []
         for sent_phonemes, _break_type in self.text_to_phonemes(
             text, text_language=text_language
@@ -128,33 +331,9 @@ class Mimic3Voice(metaclass=ABCMeta):
 
         return word_phonemes
 
-    def phonemes_to_ids(
-        self, phonemes: WORD_PHONEMES_TYPE
-    ) -> typing.Sequence[PHONEME_ID_TYPE]:
+    def phonemes_to_ids(self, phonemes: WORD_PHONEMES_TYPE) -> np.ndarray:
         """Convert phonemes to ids for a voice model (see phonemes.txt)"""
-        phoneme_map = self.phoneme_map or self.config.phonemes.phoneme_map
-
-        return phonemes2ids.phonemes2ids(
-            word_phonemes=phonemes,
-            phoneme_to_id=self.phoneme_to_id,
-            pad=self.config.phonemes.pad,
-            bos=self.config.phonemes.bos,
-            eos=self.config.phonemes.eos,
-            auto_bos_eos=self.config.phonemes.auto_bos_eos,
-            blank=self.config.phonemes.blank,
-            blank_word=self.config.phonemes.blank_word,
-            blank_between=self.config.phonemes.blank_between,
-            blank_at_start=self.config.phonemes.blank_at_start,
-            blank_at_end=self.config.phonemes.blank_at_end,
-            simple_punctuation=self.config.phonemes.simple_punctuation,
-            punctuation_map=self.config.phonemes.punctuation_map,
-            separate=self.config.phonemes.separate,
-            separate_graphemes=self.config.phonemes.separate_graphemes,
-            separate_tones=self.config.phonemes.separate_tones,
-            tone_before=self.config.phonemes.tone_before,
-            phoneme_map=phoneme_map,
-            fail_on_missing=False,
-        )
+        return self.phoneme_encoder.encode(phonemes)
 
     def ids_to_audio(
         self,
@@ -168,6 +347,44 @@ class Mimic3Voice(metaclass=ABCMeta):
         rate: float = DEFAULT_RATE,
     ) -> bytes:
         """Synthesize audio from phoneme ids usng Onnx voice model (see generator.onnx)"""
+        start_time = time.perf_counter()
+        audio_bytes = self.submit_ids(
+            phoneme_ids,
+            speaker=speaker,
+            length_scale=length_scale,
+            noise_scale=noise_scale,
+            noise_w=noise_w,
+            rate=rate,
+        ).result()
+        end_time = time.perf_counter()
+
+        # Compute real-time factor
+        audio_duration_sec = len(audio_bytes) / self.config.audio.sample_rate
+        infer_sec = end_time - start_time
+        real_time_factor = (
+            infer_sec / audio_duration_sec if audio_duration_sec > 0 else 0.0
+        )
+
+        _LOGGER.debug("RTF: %s", real_time_factor)
+
+        return audio_bytes
+
+    def submit_ids(
+        self,
+        phoneme_ids: typing.Sequence[PHONEME_ID_TYPE],
+        speaker: typing.Optional[
+            typing.Union[SPEAKER_NAME_TYPE, SPEAKER_ID_TYPE]
+        ] = None,
+        length_scale: typing.Optional[float] = None,
+        noise_scale: typing.Optional[float] = None,
+        noise_w: typing.Optional[float] = None,
+        rate: float = DEFAULT_RATE,
+    ) -> "Future[bytes]":
+        """Send phoneme ids to the voice model without waiting for audio.
+
+        Several sentences may be submitted back-to-back. The future's result is
+        the same as ids_to_audio.
+        """
         if length_scale is None:
             length_scale = self.config.inference.length_scale
 
@@ -181,24 +398,6 @@ class Mimic3Voice(metaclass=ABCMeta):
         if noise_w is None:
             noise_w = self.config.inference.noise_w
 
-        # Create model inputs
-        # text_array = np.expand_dims(np.array(phoneme_ids, dtype=np.int64), 0)
-        # text_lengths_array = np.array([text_array.shape[1]], dtype=np.int64)
-        # scales_array = np.array(
-        #     [
-        #         noise_scale,
-        #         length_scale,
-        #         noise_w,
-        #     ],
-        #     dtype=np.float32,
-        # )
-
-        # inputs = {
-        #     "input": text_array,
-        #     "input_lengths": text_lengths_array,
-        #     "scales": scales_array,
-        # }
-
         speaker_id = 0
         if self.config.is_multispeaker:
             if isinstance(speaker, SPEAKER_NAME_TYPE):
@@ -219,9 +418,6 @@ class Mimic3Voice(metaclass=ABCMeta):
             elif speaker is not None:
                 speaker_id = speaker
 
-            # speaker_id_array = np.array([speaker_id], dtype=np.int64)
-            # inputs["sid"] = speaker_id_array
-
         _LOGGER.debug(
             "TTS settings: speaker-id=%s, length-scale=%s, noise-scale=%s, noise-w=%s",
             speaker_id,
@@ -230,63 +426,199 @@ class Mimic3Voice(metaclass=ABCMeta):
             noise_w,
         )
 
-        # Infer audio from phonemes
-        start_time = time.perf_counter()
-        with tempfile.NamedTemporaryFile(mode="wb+", suffix="*.wav") as output_file:
-            json.dump(
-                {
-                    "phoneme_ids": phoneme_ids,
-                    "speaker_id": speaker_id,
-                    "output_path": output_file.name,
-                    "mimic3": {
-                        "noise_scale": noise_scale,
-                        "length_scale": length_scale,
-                        "noise_w": noise_w,
-                    },
-                },
-                self.model_proc.stdin,
+        return self.model.submit(
+            phoneme_ids,
+            speaker_id=speaker_id,
+            noise_scale=noise_scale,
+            length_scale=length_scale,
+            noise_w=noise_w,
+        )
+
+    @property
+    def metrics(self) -> ModelPoolMetrics:
+        """Request counts and latency of the voice model"""
+        return self.model.metrics
+
+    def close(self):
+        """Stop the voice model"""
+        self.model.close()
+
+    @staticmethod
+    def configure_phonemes_cache(
+        max_entries: int, cache_path: typing.Optional[typing.Union[str, Path]] = None
+    ):
+        """Set the number of texts whose phonemes are cached (0 = disabled).
+
+        The cache is shared by all voices in this process, so the largest
+        requested size wins. If cache_path is a file saved with
+        save_phonemes_cache, its entries are loaded the first time it's given.
+        """
+        phonemes_cache = Mimic3Voice._PHONEMES_CACHE
+        with Mimic3Voice._PHONEMES_CACHE_LOCK:
+            phonemes_cache.max_size = max(phonemes_cache.max_size, max_entries)
+
+            if cache_path is None:
+                return
+
+            cache_path = Path(cache_path).absolute()
+            if cache_path in Mimic3Voice._PHONEMES_CACHE_LOADED_PATHS:
+                return
+
+            Mimic3Voice._PHONEMES_CACHE_LOADED_PATHS.add(cache_path)
+
+        if not cache_path.is_file():
+            return
+
+        try:
+            with open(cache_path, "r", encoding="utf-8") as cache_file:
+                cache_entries = json.load(cache_file)
+
+            for cache_entry in cache_entries:
+                cache_key = typing.cast(
+                    PHONEMES_CACHE_KEY_TYPE, tuple(cache_entry["key"])
+                )
+                phonemes_cache.put(
+                    cache_key,
+                    tuple(
+                        (
+                            tuple(tuple(word) for word in sent_phonemes),
+                            BreakType(break_type),
+                        )
+                        for sent_phonemes, break_type in cache_entry["phonemes"]
+                    ),
+                )
+
+            _LOGGER.debug(
+                "Loaded %s phonemes cache entries from %s",
+                len(cache_entries),
+                cache_path,
             )
-            print("", file=self.model_proc.stdin, flush=True)
-            self.model_proc.stdout.readline()
-            wav_bytes = Path(output_file.name).read_bytes()
-            with io.BytesIO(wav_bytes) as wav_io:
-                with wave.open(wav_io, "rb") as wav_file:
-                    audio_bytes = wav_file.readframes(wav_file.getnframes())
+        except Exception:
+            _LOGGER.exception("Failed to load phonemes cache from %s", cache_path)
 
-        end_time = time.perf_counter()
+    @staticmethod
+    def configure_words_cache(max_entries: int):
+        """Set the number of word and say-as pronunciations cached (0 = disabled).
 
-        # Compute real-time factor
-        audio_duration_sec = len(audio_bytes) / self.config.audio.sample_rate
-        infer_sec = end_time - start_time
-        real_time_factor = (
-            infer_sec / audio_duration_sec if audio_duration_sec > 0 else 0.0
+        The cache is shared by all voices in this process, so the largest
+        requested size wins.
+        """
+        words_cache = Mimic3Voice._WORDS_CACHE
+        with Mimic3Voice._PHONEMES_CACHE_LOCK:
+            words_cache.max_size = max(words_cache.max_size, max_entries)
+
+    @staticmethod
+    def save_phonemes_cache(cache_path: typing.Union[str, Path]):
+        """Write cached phonemes to a JSON file (see configure_phonemes_cache)"""
+        cache_path = Path(cache_path)
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        cache_entries = [
+            {
+                "key": list(cache_key),
+                "phonemes": [
+                    [[list(word) for word in sent_phonemes], break_type.value]
+                    for sent_phonemes, break_type in cached_phonemes
+                ],
+            }
+            for cache_key, cached_phonemes in Mimic3Voice._PHONEMES_CACHE.items()
+        ]
+
+        # Write atomically
+        temp_fd, temp_path = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(temp_fd, "w", encoding="utf-8") as temp_file:
+                json.dump(cache_entries, temp_file, ensure_ascii=False)
+
+            os.replace(temp_path, cache_path)
+        except Exception:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+
+            raise
+
+        _LOGGER.debug(
+            "Saved %s phonemes cache entries to %s", len(cache_entries), cache_path
         )
 
-        _LOGGER.debug("RTF: %s", real_time_factor)
+    @staticmethod
+    def get_phonemizer_stats() -> typing.List[PhonemizerStats]:
+        """Snapshot of text_to_phonemes counters for each phonemizer used"""
+        with Mimic3Voice._PHONEMES_CACHE_LOCK:
+            return [
+                dataclasses.replace(stats)
+                for stats in Mimic3Voice._PHONEMIZER_STATS.values()
+            ]
 
-        return audio_bytes
+    @staticmethod
+    def get_phonemes_cache_stats() -> CacheStats:
+        """Hit, miss, and eviction counts of the text_to_phonemes cache"""
+        return Mimic3Voice._PHONEMES_CACHE.stats
+
+    @staticmethod
+    def get_words_cache_stats() -> CacheStats:
+        """Hit, miss, and eviction counts of the word and say-as cache"""
+        return Mimic3Voice._WORDS_CACHE.stats
+
+    @staticmethod
+    def _get_phonemizer_stats(phonemizer: str) -> PhonemizerStats:
+        with Mimic3Voice._PHONEMES_CACHE_LOCK:
+            stats = Mimic3Voice._PHONEMIZER_STATS.get(phonemizer)
+            if stats is None:
+                stats = PhonemizerStats(phonemizer=phonemizer)
+                Mimic3Voice._PHONEMIZER_STATS[phonemizer] = stats
+
+            return stats
 
     @staticmethod
     def load_from_directory(
         voice_dir: typing.Union[str, Path],
-        session_options: typing.Optional[onnxruntime.SessionOptions] = None,
-        providers: typing.Optional[
-            typing.Sequence[
-                typing.Union[str, typing.Tuple[str, typing.Dict[str, typing.Any]]]
-            ]
-        ] = None,
+        session_options: typing.Optional["onnxruntime.SessionOptions"] = None,
+        providers: typing.Optional[PROVIDERS_TYPE] = None,
         share_models: bool = True,
         use_deterministic_compute: bool = False,
+        backend: typing.Union[
+            str, InferenceBackendType
+        ] = InferenceBackendType.SUBPROCESS,
+        intra_op_num_threads: int = 1,
+        inter_op_num_threads: int = 1,
+        enable_mem_arena: bool = False,
+        stream_audio: bool = True,
+        binary_requests: bool = True,
+        num_workers: int = 1,
+        max_total_workers: typing.Optional[int] = None,
+        request_timeout: typing.Optional[float] = 30.0,
+        max_retries: int = 1,
     ) -> "Mimic3Voice":
-        """Load a Mimic 3 voice from a directory"""
+        """Load a Mimic 3 voice from a directory.
+
+        The voice model runs on the given backend (see InferenceBackendType).
+
+        With the onnx backend, the model is loaded in this process and shared
+        between voices if share_models is True. intra_op_num_threads,
+        inter_op_num_threads, and enable_mem_arena configure the onnxruntime
+        session, and num_workers requests are run at a time.
+
+        With the subprocess backend, if stream_audio is True and the model program supports it, audio is
+        returned over a pipe instead of through a temporary WAV file.
+
+        If binary_requests is True and the model program supports it, phoneme
+        ids are sent as binary frames instead of JSON (implies stream_audio).
+
+        num_workers model processes are started for the voice, limited by
+        max_total_workers across all loaded voices (default: number of CPUs).
+        A model process that makes no progress for request_timeout seconds is
+        restarted, and its requests are retried up to max_retries times.
+        """
         voice_dir = Path(voice_dir)
         _LOGGER.debug("Loading voice from %s", voice_dir)
 
         config_path = voice_dir / "config.json"
         _LOGGER.debug("Loading config from %s", config_path)
 
-        with open(config_path, "r", encoding="utf-8") as config_file:
-            config = TrainingConfig.load(config_file)
+        config = VoiceConfig.load_path(config_path)
 
         # phoneme -> id
         phoneme_ids_path = voice_dir / "phonemes.txt"
@@ -296,38 +628,31 @@ class Mimic3Voice(metaclass=ABCMeta):
 
         generator_path = voice_dir / "generator.onnx"
 
-        # HACK: Hard-coded path
-        model_proc = subprocess.Popen(
-            ["/opt/mycroft/bin/mimic3", str(generator_path.absolute())],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            universal_newlines=True,
-        )
-        # onnx_model: typing.Optional[onnxruntime.InferenceSession] = None
-
-        # if share_models:
-        #     with Mimic3Voice._SHARED_MODELS_LOCK:
-        #         model_key = str(generator_path.absolute())
-        #         onnx_model = Mimic3Voice._SHARED_MODELS.get(model_key)
-
-        #         if onnx_model is None:
-        #             onnx_model = Mimic3Voice._load_model(
-        #                 generator_path,
-        #                 session_options=session_options,
-        #                 providers=providers,
-        #                 use_deterministic_compute=use_deterministic_compute,
-        #             )
-
-        #             Mimic3Voice._SHARED_MODELS[model_key] = onnx_model
-        #         else:
-        #             _LOGGER.debug("Using shared Onnx model (%s)", model_key)
-        # else:
-        #     onnx_model = Mimic3Voice._load_model(
-        #         generator_path,
-        #         session_options=session_options,
-        #         providers=providers,
-        #         use_deterministic_compute=use_deterministic_compute,
-        #     )
+        model: InferenceBackend
+        backend = InferenceBackendType(backend)
+        if backend == InferenceBackendType.ONNX:
+            model = OnnxBackend(
+                generator_path,
+                is_multispeaker=config.is_multispeaker,
+                num_threads=num_workers,
+                session_options=session_options,
+                providers=providers,
+                share_models=share_models,
+                use_deterministic_compute=use_deterministic_compute,
+                intra_op_num_threads=intra_op_num_threads,
+                inter_op_num_threads=inter_op_num_threads,
+                enable_mem_arena=enable_mem_arena,
+            )
+        else:
+            model = ModelProcessPool(
+                generator_path,
+                num_workers=num_workers,
+                max_total_workers=max_total_workers,
+                stream_audio=stream_audio,
+                binary_requests=binary_requests,
+                request_timeout=request_timeout,
+                max_retries=max_retries,
+            )
 
         # phoneme -> phoneme, phoneme, ...
         phoneme_map: typing.Optional[PHONEME_MAP_TYPE] = None
@@ -351,14 +676,20 @@ class Mimic3Voice(metaclass=ABCMeta):
                     for alias in row[2:]:
                         speaker_map[alias] = speaker_id
 
+        # Resolve phoneme/punctuation maps, blanks, etc. once for the voice
+        phoneme_encoder = PhonemeIdEncoder(
+            phoneme_to_id, config.phonemes, phoneme_map=phoneme_map
+        )
+
         if config.phonemizer == Phonemizer.GRUUT:
             # Phonemes from gruut: https://github.com/rhasspy/gruut/
             return GruutVoice(
                 config=config,
-                model_proc=model_proc,
+                model=model,
                 phoneme_to_id=phoneme_to_id,
                 phoneme_map=phoneme_map,
                 speaker_map=speaker_map,
+                phoneme_encoder=phoneme_encoder,
             )
 
         if config.phonemizer == Phonemizer.ESPEAK:
@@ -378,73 +709,37 @@ class Mimic3Voice(metaclass=ABCMeta):
 
             return voice_class(
                 config=config,
-                model_proc=model_proc,
+                model=model,
                 phoneme_to_id=phoneme_to_id,
                 phoneme_map=phoneme_map,
                 speaker_map=speaker_map,
+                phoneme_encoder=phoneme_encoder,
             )
 
         if config.phonemizer == Phonemizer.SYMBOLS:
             # Phonemes are characters from an alphabet
             return SymbolsVoice(
                 config=config,
-                model_proc=model_proc,
+                model=model,
                 phoneme_to_id=phoneme_to_id,
                 phoneme_map=phoneme_map,
                 speaker_map=speaker_map,
+                phoneme_encoder=phoneme_encoder,
             )
 
         if config.phonemizer == Phonemizer.EPITRAN:
             # Phonemes are from epitran: https://github.com/dmort27/epitran/
             return EpitranVoice(
                 config=config,
-                model_proc=model_proc,
+                model=model,
                 phoneme_to_id=phoneme_to_id,
                 phoneme_map=phoneme_map,
                 speaker_map=speaker_map,
+                phoneme_encoder=phoneme_encoder,
             )
 
         raise ValueError(f"Unsupported phonemizer: {config.phonemizer}")
 
-    # @staticmethod
-    # def _load_model(
-    #     generator_path: Path,
-    #     session_options: typing.Optional[onnxruntime.SessionOptions] = None,
-    #     providers: typing.Optional[
-    #         typing.Sequence[
-    #             typing.Union[str, typing.Tuple[str, typing.Dict[str, typing.Any]]]
-    #         ]
-    #     ] = None,
-    #     use_deterministic_compute: bool = False,
-    # ) -> onnxruntime.InferenceSession:
-    #     _LOGGER.debug("Loading model from %s", generator_path)
-
-    #     # Load onnx model
-    #     if session_options is None:
-    #         session_options = onnxruntime.SessionOptions()
-
-    #         if platform.machine() == "armv7l":
-    #             # Enabling optimizations on 32-bit ARM crashes
-    #             session_options.graph_optimization_level = (
-    #                 onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
-    #             )
-
-    #     session_options.use_deterministic_compute = use_deterministic_compute
-
-    #     # Keep memory usage lower
-    #     session_options.enable_cpu_mem_arena = False
-    #     session_options.enable_mem_pattern = False
-    #     session_options.enable_mem_reuse = False
-    #     session_options.enable_profiling = False
-    #     session_options.inter_op_num_threads = 1
-    #     session_options.intra_op_num_threads = 1
-
-    #     onnx_model = onnxruntime.InferenceSession(
-    #         str(generator_path), sess_options=session_options, providers=providers
-    #     )
-
-    #     return onnx_model
-
 
 # -----------------------------------------------------------------------------
 
@@ -452,29 +747,31 @@ class Mimic3Voice(metaclass=ABCMeta):
 class GruutVoice(Mimic3Voice):
     """Voice whose phonemes come from gruut (https://github.com/rhasspy/gruut/)"""
 
-    def text_to_phonemes(
-        self, text: str, text_language: typing.Optional[str] = None
-    ) -> TEXT_TO_PHONEMES_TYPE:
-        text_language = text_language or self.config.text_language or DEFAULT_LANGUAGE
-        for sentence in gruut.sentences(text, lang=text_language):
+    PHONEMIZER = "gruut"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Imported when the first gruut voice is loaded
+        import gruut
+
+        self._sentences = gruut.sentences
+
+    def _text_to_phonemes(self, text: str, text_language: str) -> TEXT_TO_PHONEMES_TYPE:
+        for sentence in self._sentences(text, lang=text_language):
             sent_phonemes = [w.phonemes for w in sentence if w.phonemes]
             if sent_phonemes:
                 yield sent_phonemes, BreakType.UTTERANCE
 
-    def word_to_phonemes(
-        self,
-        word_text: str,
-        word_role: typing.Optional[str] = None,
-        text_language: typing.Optional[str] = None,
+    def _word_to_phonemes(
+        self, word_text: str, word_role: typing.Optional[str], text_language: str
     ) -> typing.List[PHONEME_TYPE]:
-        text_language = text_language or self.config.text_language or DEFAULT_LANGUAGE
-
         word_role = xmlescape(word_role) if word_role else ""
         word_text = xmlescape(word_text)
 
         sentence = next(
             iter(
-                gruut.sentences(
+                self._sentences(
                     f'<w role="{word_role}">{word_text}</w>',
                     ssml=True,
                     lang=text_language,
@@ -486,20 +783,18 @@ class GruutVoice(Mimic3Voice):
 
         return sentence_word.phonemes
 
-    def say_as_to_phonemes(
+    def _say_as_to_phonemes(
         self,
         text: str,
         interpret_as: str,
-        say_format: typing.Optional[str] = None,
-        text_language: typing.Optional[str] = None,
+        say_format: typing.Optional[str],
+        text_language: str,
     ) -> WORD_PHONEMES_TYPE:
-        text_language = text_language or self.config.text_language or DEFAULT_LANGUAGE
-
         word_text = xmlescape(text)
         interpret_as = xmlescape(interpret_as)
         format_attr = f'format="{xmlescape(say_format)}"' if say_format else ""
 
-        sentences = gruut.sentences(
+        sentences = self._sentences(
             f'<say-as interpret-as="{interpret_as}" {format_attr}>{word_text}</say-as>',
             ssml=True,
             lang=text_language,
@@ -516,21 +811,63 @@ class GruutVoice(Mimic3Voice):
 # -----------------------------------------------------------------------------
 
 
+class SharedEspeakPhonemizer:
+    """Single eSpeak phonemizer shared by all threads and eSpeak voices.
+
+    libespeak-ng keeps a single voice and state for the whole process, so only
+    one text may be phonemized at a time and separate phonemizers would not be
+    independent. Access is serialized, and eSpeak's voice is only changed when
+    the language really changes (not for each EspeakVoice or thread).
+    """
+
+    def __init__(self):
+        self._phonemizer: "typing.Optional[espeak_phonemizer.Phonemizer]" = None
+        self._current_voice: typing.Optional[str] = None
+        self._num_voice_changes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def num_voice_changes(self) -> int:
+        """Number of times eSpeak has been switched to a different voice"""
+        with self._lock:
+            return self._num_voice_changes
+
+    def phonemize(self, text: str, voice: str, **phonemize_args) -> str:
+        """Phonemize text with an eSpeak voice (see Phonemizer.phonemize)"""
+        with self._lock:
+            if self._phonemizer is None:
+                import espeak_phonemizer
+
+                # Initializes libespeak-ng on first use
+                self._phonemizer = espeak_phonemizer.Phonemizer(default_voice=voice)
+
+            if self._current_voice != voice:
+                self._num_voice_changes += 1
+
+            phoneme_str = self._phonemizer.phonemize(
+                text, voice=voice, **phonemize_args
+            )
+            self._current_voice = voice
+
+        return phoneme_str
+
+
 class EspeakVoice(Mimic3Voice):
     """Voice whose phonemes come from eSpeak-NG (https://github.com/espeak-ng/espeak-ng)"""
 
+    PHONEMIZER = "espeak"
+
+    # libespeak-ng can only be used by one thread at a time
+    _SHARED_PHONEMIZER = SharedEspeakPhonemizer()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._phonemizer = espeak_phonemizer.Phonemizer()
+        self._phonemizer = EspeakVoice._SHARED_PHONEMIZER
 
-    def text_to_phonemes(
-        self, text: str, text_language: typing.Optional[str] = None
-    ) -> TEXT_TO_PHONEMES_TYPE:
+    def _text_to_phonemes(self, text: str, text_language: str) -> TEXT_TO_PHONEMES_TYPE:
         phoneme_separator = ""
         word_separator = self.config.phonemes.word_separator
 
-        text_language = text_language or self.config.text_language or DEFAULT_LANGUAGE
-
         voice = self._language_to_voice(text_language)
 
         phoneme_str = self._phonemizer.phonemize(
@@ -571,14 +908,10 @@ class EspeakVoice(Mimic3Voice):
             # No split
             yield all_word_phonemes, BreakType.UTTERANCE
 
-    def word_to_phonemes(
-        self,
-        word_text: str,
-        word_role: typing.Optional[str] = None,
-        text_language: typing.Optional[str] = None,
+    def _word_to_phonemes(
+        self, word_text: str, word_role: typing.Optional[str], text_language: str
     ) -> typing.List[PHONEME_TYPE]:
         phoneme_separator = ""
-        text_language = text_language or self.config.text_language or DEFAULT_LANGUAGE
 
         word_role = xmlescape(word_role) if word_role else ""
         word_text = xmlescape(word_text)
@@ -598,16 +931,15 @@ class EspeakVoice(Mimic3Voice):
 
         return word_phonemes
 
-    def say_as_to_phonemes(
+    def _say_as_to_phonemes(
         self,
         text: str,
         interpret_as: str,
-        say_format: typing.Optional[str] = None,
-        text_language: typing.Optional[str] = None,
+        say_format: typing.Optional[str],
+        text_language: str,
     ) -> WORD_PHONEMES_TYPE:
         phoneme_separator = ""
         word_separator = self.config.phonemes.word_separator
-        text_language = text_language or self.config.text_language or DEFAULT_LANGUAGE
 
         word_text = xmlescape(text)
         interpret_as = xmlescape(interpret_as)
@@ -640,6 +972,8 @@ class EspeakVoice(Mimic3Voice):
 class HazmEspeakVoice(EspeakVoice):
     """Persian espeak-ng voice that uses hazm (https://github.com/sobhe/hazm) for pre-processing"""
 
+    PHONEMIZER = "hazm_espeak"
+
     def __init__(self, *args, **kwargs):
         import gruut_lang_fa
         import hazm
@@ -655,13 +989,10 @@ class HazmEspeakVoice(EspeakVoice):
             model=str(gruut_lang_fa.get_lang_dir() / "pos" / "postagger.model")
         )
 
-    def text_to_phonemes(
-        self, text: str, text_language: typing.Optional[str] = None
-    ) -> TEXT_TO_PHONEMES_TYPE:
+    def _text_to_phonemes(self, text: str, text_language: str) -> TEXT_TO_PHONEMES_TYPE:
         phoneme_separator = ""
         word_separator = self.config.phonemes.word_separator
 
-        text_language = text_language or self.config.text_language or DEFAULT_LANGUAGE
         voice = self._language_to_voice(text_language)
 
         # Normalize with hazm
@@ -685,32 +1016,27 @@ class HazmEspeakVoice(EspeakVoice):
 
             yield sent_word_phonemes, BreakType.UTTERANCE
 
-    def word_to_phonemes(
-        self,
-        word_text: str,
-        word_role: typing.Optional[str] = None,
-        text_language: typing.Optional[str] = None,
+    def _word_to_phonemes(
+        self, word_text: str, word_role: typing.Optional[str], text_language: str
     ) -> typing.List[PHONEME_TYPE]:
         word_text = self._fix_words([word_text])[0]
 
-        return super().word_to_phonemes(
-            word_text, word_role=word_role, text_language=text_language
-        )
+        return super()._word_to_phonemes(word_text, word_role, text_language)
 
-    def say_as_to_phonemes(
+    def _say_as_to_phonemes(
         self,
         text: str,
         interpret_as: str,
-        say_format: typing.Optional[str] = None,
-        text_language: typing.Optional[str] = None,
+        say_format: typing.Optional[str],
+        text_language: str,
     ) -> WORD_PHONEMES_TYPE:
         sentences = self._preprocess_text(text)
         text = " ".join(
             " ".join(word_text for word_text in words) for words in sentences
         )
 
-        return super().say_as_to_phonemes(
-            text, interpret_as, say_format=say_format, text_language=text_language
+        return super()._say_as_to_phonemes(
+            text, interpret_as, say_format, text_language
         )
 
     def _preprocess_text(self, text: str) -> typing.List[typing.List[str]]:
@@ -746,9 +1072,7 @@ class HazmEspeakVoice(EspeakVoice):
 class SymbolsVoice(Mimic3Voice):
     """Voice whose phonemes are characters in an alphabet"""
 
-    def text_to_phonemes(
-        self, text: str, text_language: typing.Optional[str] = None
-    ) -> TEXT_TO_PHONEMES_TYPE:
+    def _text_to_phonemes(self, text: str, text_language: str) -> TEXT_TO_PHONEMES_TYPE:
         word_separator = self.config.phonemes.word_separator
         word_phonemes = [
             list(IPA.graphemes(wp_str)) for wp_str in text.split(word_separator)
@@ -762,18 +1086,21 @@ class SymbolsVoice(Mimic3Voice):
 class EpitranVoice(Mimic3Voice):
     """Voice whose phonemes come from epitran (https://github.com/dmort27/epitran/)"""
 
+    PHONEMIZER = "epitran"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._epis: typing.Dict[str, epitran.Epitran] = {}
 
-    def text_to_phonemes(
-        self, text: str, text_language: typing.Optional[str] = None
-    ) -> TEXT_TO_PHONEMES_TYPE:
-        text_language = text_language or self.config.text_language or DEFAULT_LANGUAGE
+        # Imported when the first epitran voice is loaded
+        import epitran
+
+        self._epitran_class = epitran.Epitran
+        self._epis: typing.Dict[str, "epitran.Epitran"] = {}
 
+    def _text_to_phonemes(self, text: str, text_language: str) -> TEXT_TO_PHONEMES_TYPE:
         epi = self._epis.get(text_language)
         if epi is None:
-            epi = epitran.Epitran(text_language)
+            epi = self._epitran_class(text_language)
             self._epis[text_language] = epi
 
         phoneme_str = epi.transliterate(text)
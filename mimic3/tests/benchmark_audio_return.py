@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Compares model audio returned through temporary WAV files vs. over a pipe,
+with JSON or binary requests.
+"""
+import argparse
+import logging
+import statistics
+import time
+import typing
+from pathlib import Path
+
+from mimic3_tts import DEFAULT_VOICE, Mimic3Settings, Mimic3TextToSpeechSystem
+from mimic3_tts.model_process import (
+    MODEL_PROGRAM,
+    ModelCapability,
+    get_model_capabilities,
+)
+from mimic3_tts.voice import Mimic3Voice
+
+# Short utterances are where the file round-trip hurts the most
+_CORPUS = [
+    "Hello.",
+    "Sorry, I didn't catch that.",
+    "It is 5 o'clock.",
+    "The timer is done.",
+    "Here is the weather for today.",
+    "A rainbow is a meteorological phenomenon that is caused by reflection, "
+    "refraction and dispersion of light in water droplets resulting in a "
+    "spectrum of light appearing in the sky.",
+]
+
+_LOGGER = logging.getLogger("benchmark_audio_return")
+
+# -----------------------------------------------------------------------------
+
+
+def benchmark(
+    voice: Mimic3Voice,
+    all_phoneme_ids: typing.Sequence[typing.Sequence[int]],
+    repeat: int,
+) -> typing.List[float]:
+    """Time ids_to_audio for each sentence in the corpus"""
+    times: typing.List[float] = []
+
+    # Warm up
+    voice.ids_to_audio(all_phoneme_ids[0])
+
+    for _ in range(repeat):
+        for phoneme_ids in all_phoneme_ids:
+            start_time = time.perf_counter()
+            voice.ids_to_audio(phoneme_ids)
+            times.append(time.perf_counter() - start_time)
+
+    return times
+
+
+def main():
+    """Time both audio return paths on a fixed corpus"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--voice", default=DEFAULT_VOICE, help="Voice key")
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Number of passes over the corpus"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    capabilities = get_model_capabilities(MODEL_PROGRAM)
+    if ModelCapability.PCM_RESPONSE not in capabilities:
+        parser.error(f"{MODEL_PROGRAM} does not support {ModelCapability.PCM_RESPONSE}")
+
+    tts = Mimic3TextToSpeechSystem(Mimic3Settings())
+    voice_dir: typing.Optional[Path] = None
+    for maybe_voice in tts.get_voices():
+        if maybe_voice.key == args.voice:
+            voice_dir = Path(maybe_voice.location)
+            break
+
+    if (voice_dir is None) or (not voice_dir.is_dir()):
+        parser.error(f"Voice is not downloaded: {args.voice}")
+
+    modes = [("file", False, False), ("pipe", True, False)]
+    if ModelCapability.BINARY_REQUEST in capabilities:
+        modes.append(("binary", True, True))
+
+    for mode_name, stream_audio, binary_requests in modes:
+        voice = Mimic3Voice.load_from_directory(
+            voice_dir, stream_audio=stream_audio, binary_requests=binary_requests
+        )
+        all_phoneme_ids = [
+            voice.phonemes_to_ids(sent_phonemes)
+            for text in _CORPUS
+            for sent_phonemes, _break_type in voice.text_to_phonemes(text)
+        ]
+
+        times = benchmark(voice, all_phoneme_ids, args.repeat)
+        voice.close()
+
+        times_ms = sorted(t * 1000 for t in times)
+        print(
+            mode_name,
+            f"mean={statistics.mean(times_ms):.2f}ms",
+            f"median={statistics.median(times_ms):.2f}ms",
+            f"p90={times_ms[int(0.9 * (len(times_ms) - 1))]:.2f}ms",
+            sep="\t",
+        )
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
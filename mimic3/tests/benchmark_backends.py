@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Compares inference backends by real-time factor, memory usage (RSS), and
+latency to the first audio of a multi-sentence utterance.
+
+Each backend is run in a fresh process so memory usage is not shared.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import statistics
+import time
+import typing
+from pathlib import Path
+
+from mimic3_tts import (
+    DEFAULT_VOICE,
+    AudioResult,
+    Mimic3Settings,
+    Mimic3TextToSpeechSystem,
+)
+
+_TEXT = (
+    "Here is the weather for today. "
+    "It will be sunny in the morning, with clouds rolling in after noon. "
+    "Expect a high of twenty degrees, and a low of twelve."
+)
+
+_LOGGER = logging.getLogger("benchmark_backends")
+
+# -----------------------------------------------------------------------------
+
+
+def get_rss_kb(pid: typing.Union[int, str] = "self") -> int:
+    """Resident set size of a process from /proc (Linux only)"""
+    status_path = Path("/proc") / str(pid) / "status"
+    for line in status_path.read_text(encoding="utf-8").splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1])
+
+    return 0
+
+
+def get_child_pids() -> typing.List[int]:
+    """Process ids of model programs started by this process"""
+    children_path = Path("/proc") / str(os.getpid()) / "task"
+    child_pids: typing.List[int] = []
+    for task_dir in children_path.iterdir():
+        children_file = task_dir / "children"
+        if children_file.is_file():
+            child_pids.extend(
+                int(pid) for pid in children_file.read_text(encoding="utf-8").split()
+            )
+
+    return child_pids
+
+
+def run_backend(
+    backend: str, voice: str, repeat: int, num_workers: int
+) -> typing.Dict[str, float]:
+    """Synthesize text repeatedly with one backend and collect statistics"""
+    tts = Mimic3TextToSpeechSystem(
+        Mimic3Settings(
+            voice=voice,
+            backend=backend,
+            workers_per_voice=num_workers,
+            no_download=True,
+        )
+    )
+
+    first_audio_times: typing.List[float] = []
+    total_seconds = 0.0
+    total_audio_seconds = 0.0
+
+    with tts:
+        # Load voice and warm up
+        load_start_time = time.perf_counter()
+        tts.text_to_wav("Hello.")
+        load_seconds = time.perf_counter() - load_start_time
+
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            first_audio_time: typing.Optional[float] = None
+
+            tts.begin_utterance()
+            tts.speak_text(_TEXT)
+            for result in tts.end_utterance():
+                if isinstance(result, AudioResult):
+                    if first_audio_time is None:
+                        first_audio_time = time.perf_counter() - start_time
+
+                    total_audio_seconds += len(result.audio_bytes) / (
+                        result.sample_rate_hz * result.sample_width_bytes
+                    )
+
+            total_seconds += time.perf_counter() - start_time
+            if first_audio_time is not None:
+                first_audio_times.append(first_audio_time)
+
+        # Include model programs for the subprocess backend
+        rss_kb = get_rss_kb() + sum(get_rss_kb(pid) for pid in get_child_pids())
+
+    real_time_factor = (
+        total_seconds / total_audio_seconds if total_audio_seconds > 0 else 0.0
+    )
+
+    return {
+        "load_seconds": load_seconds,
+        "rtf": real_time_factor,
+        "rss_mb": rss_kb / 1024,
+        "first_audio_ms": 1000 * statistics.median(first_audio_times),
+    }
+
+
+def main():
+    """Compare inference backends on the same voice"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--voice", default=DEFAULT_VOICE, help="Voice key")
+    parser.add_argument(
+        "--backend",
+        action="append",
+        choices=("subprocess", "onnx"),
+        help="Backend to test (default: all)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Workers per voice (default: 1)"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Number of times to speak text"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    context = multiprocessing.get_context("spawn")
+    for backend in args.backend or ["subprocess", "onnx"]:
+        with context.Pool(1) as pool:
+            stats = pool.apply(
+                run_backend, (backend, args.voice, args.repeat, args.workers)
+            )
+
+        print(
+            backend,
+            f"load={stats['load_seconds']:.2f}s",
+            f"rtf={stats['rtf']:.3f}",
+            f"rss={stats['rss_mb']:.1f}MB",
+            f"first_audio={stats['first_audio_ms']:.1f}ms",
+            sep="\t",
+        )
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Measures how long it takes a running Mimic 3 web server to render many
+sentences with one /api/tts request per sentence vs. a single /api/tts/batch
+request.
+
+Start the server first (python3 -m mimic3_http --num-threads <N>).
+"""
+import argparse
+import json
+import time
+import typing
+import urllib.parse
+import urllib.request
+
+_SENTENCES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "It will be sunny in the morning.",
+    "Clouds will roll in after noon.",
+    "Expect a high of twenty degrees.",
+    "The low tonight will be twelve degrees.",
+    "There is a chance of rain tomorrow.",
+    "Winds will be light and variable.",
+    "The sun sets at eight fifteen.",
+    "The moon is almost full.",
+    "Have a wonderful day.",
+]
+
+# -----------------------------------------------------------------------------
+
+
+def render_one_by_one(url: str, texts: typing.List[str]) -> float:
+    """Returns seconds to render texts with one request each"""
+    start_time = time.perf_counter()
+    for text in texts:
+        query = {"text": text, "noCache": "true"}
+        request_url = f"{url}/api/tts?{urllib.parse.urlencode(query)}"
+        with urllib.request.urlopen(request_url) as response:
+            response.read()
+
+    return time.perf_counter() - start_time
+
+
+def render_batch(url: str, texts: typing.List[str]) -> typing.Tuple[float, float]:
+    """Returns seconds to first result and total seconds for a batch request"""
+    request = urllib.request.Request(
+        f"{url}/api/tts/batch?noCache=true",
+        data=json.dumps(texts).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+
+    start_time = time.perf_counter()
+    first_result_time = 0.0
+    num_results = 0
+    with urllib.request.urlopen(request) as response:
+        for line in response:
+            result = json.loads(line)
+            assert "error" not in result, result["error"]
+
+            if num_results == 0:
+                first_result_time = time.perf_counter() - start_time
+
+            num_results += 1
+
+    assert num_results == len(texts), f"Expected {len(texts)}, got {num_results}"
+
+    return first_result_time, time.perf_counter() - start_time
+
+
+def main():
+    """Compare one request per sentence against a batch"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--url", default="http://localhost:59125", help="URL of Mimic 3 web server"
+    )
+    parser.add_argument(
+        "--sentences", type=int, default=50, help="Number of sentences to render"
+    )
+    args = parser.parse_args()
+
+    texts = [
+        f"{_SENTENCES[i % len(_SENTENCES)]} Number {i}." for i in range(args.sentences)
+    ]
+
+    # Warm up
+    render_one_by_one(args.url, texts[:1])
+
+    one_by_one_sec = render_one_by_one(args.url, texts)
+    first_result_sec, batch_sec = render_batch(args.url, texts)
+
+    print("one-by-one", f"total={1000 * one_by_one_sec:.1f}ms", sep="\t")
+    print(
+        "batch",
+        f"first={1000 * first_result_sec:.1f}ms",
+        f"total={1000 * batch_sec:.1f}ms",
+        f"speedup={one_by_one_sec / batch_sec:.2f}x",
+        sep="\t",
+    )
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Compares how long it takes to load voice configs with TrainingConfig.load
+(full decode) and VoiceConfig (inference-only view), and checks that both give
+the same values for inference.
+
+Also times listing voices at startup: with no caches, with parsed configs
+cached in memory, and with the voice catalog cached on disk.
+"""
+import argparse
+import statistics
+import tempfile
+import time
+import typing
+from pathlib import Path
+
+from mimic3_tts import Mimic3TextToSpeechSystem
+from mimic3_tts import config as config_module
+from mimic3_tts.catalog import VoiceCatalog
+from mimic3_tts.config import TrainingConfig, VoiceConfig
+
+# -----------------------------------------------------------------------------
+
+
+def find_configs(voices_dirs: typing.Iterable[Path]) -> typing.List[Path]:
+    """Paths of config.json for all installed voices (<lang>/<voice>)"""
+    return [
+        config_path
+        for voices_dir in voices_dirs
+        if voices_dir.is_dir()
+        for config_path in sorted(voices_dir.glob("*/*/config.json"))
+    ]
+
+
+def check_equivalent(config_path: Path):
+    """Assert that inference values match between full and fast loading"""
+    with open(config_path, "r", encoding="utf-8") as config_file:
+        full_config = TrainingConfig.load(config_file)
+
+    with open(config_path, "r", encoding="utf-8") as config_file:
+        fast_config = VoiceConfig.load(config_file)
+
+    for attr_name in (
+        "audio",
+        "phonemes",
+        "inference",
+        "text_language",
+        "phonemizer",
+        "is_multispeaker",
+    ):
+        full_value = getattr(full_config, attr_name)
+        fast_value = getattr(fast_config, attr_name)
+        assert (
+            full_value == fast_value
+        ), f"{config_path} {attr_name}: {fast_value} != {full_value}"
+
+
+def median_ms(func: typing.Callable[[], typing.Any], repeat: int) -> float:
+    """Median milliseconds to call func"""
+    times: typing.List[float] = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start_time)
+
+    return 1000 * statistics.median(times)
+
+
+def main():
+    """Check equivalence and time config loading"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--voices-dir",
+        action="append",
+        help="Directory with voices (<lang>/<voice>). Default: standard locations",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=20, help="Number of times each is timed"
+    )
+    args = parser.parse_args()
+
+    if args.voices_dir:
+        voices_dirs = [Path(d) for d in args.voices_dir]
+    else:
+        voices_dirs = Mimic3TextToSpeechSystem.get_default_voices_directories()
+
+    config_paths = find_configs(voices_dirs)
+    if not config_paths:
+        parser.error("No voices are installed")
+
+    # Equivalence
+    for config_path in config_paths:
+        check_equivalent(config_path)
+
+    print(f"equivalent for {len(config_paths)} voice(s)")
+
+    # Loading configs
+    def load_full():
+        for config_path in config_paths:
+            with open(config_path, "r", encoding="utf-8") as config_file:
+                TrainingConfig.load(config_file)
+
+    def load_fast():
+        for config_path in config_paths:
+            with open(config_path, "r", encoding="utf-8") as config_file:
+                VoiceConfig.load(config_file)
+
+    def load_cached():
+        for config_path in config_paths:
+            VoiceConfig.load_path(config_path)
+
+    full_ms = median_ms(load_full, args.repeat)
+    fast_ms = median_ms(load_fast, args.repeat)
+    load_cached()
+    cached_ms = median_ms(load_cached, args.repeat)
+
+    print("TrainingConfig", f"{full_ms:.2f}ms", sep="\t")
+    print(
+        "VoiceConfig", f"{fast_ms:.2f}ms", f"speedup={full_ms / fast_ms:.2f}x", sep="\t"
+    )
+    print(
+        "VoiceConfig (cached)",
+        f"{cached_ms:.2f}ms",
+        f"speedup={full_ms / cached_ms:.2f}x",
+        sep="\t",
+    )
+
+    # Listing voices at startup
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_path = Path(temp_dir) / "voices.json"
+
+        def list_cold():
+            config_module._VOICE_CONFIG_CACHE.clear()
+            VoiceCatalog(voices_dirs).voices()
+
+        def list_warm_configs():
+            VoiceCatalog(voices_dirs).voices()
+
+        def list_warm_catalog():
+            config_module._VOICE_CONFIG_CACHE.clear()
+            VoiceCatalog(voices_dirs, cache_path=cache_path).voices()
+
+        # Write catalog to disk
+        VoiceCatalog(voices_dirs, cache_path=cache_path).voices()
+
+        cold_ms = median_ms(list_cold, args.repeat)
+        warm_configs_ms = median_ms(list_warm_configs, args.repeat)
+        warm_catalog_ms = median_ms(list_warm_catalog, args.repeat)
+
+    print("list voices (cold)", f"{cold_ms:.2f}ms", sep="\t")
+    print("list voices (configs cached)", f"{warm_configs_ms:.2f}ms", sep="\t")
+    print("list voices (catalog on disk)", f"{warm_catalog_ms:.2f}ms", sep="\t")
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Measures how long it takes to start up the Mimic 3 packages.
+
+Each module is imported in a fresh Python process with -X importtime. The
+median cumulative import time and wall time are printed, along with the
+slowest imports underneath each module.
+
+With --ready, the time until voices can be listed (settings created and the
+voice catalog built) is measured as well.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import typing
+from pathlib import Path
+
+_DIR = Path(__file__).parent
+_PROJECT_DIR = _DIR.parent
+
+_DEFAULT_MODULES = ["mimic3_tts", "mimic3_tts.__main__", "mimic3_http.app"]
+
+_READY_CODE = (
+    "from mimic3_tts import Mimic3Settings, Mimic3TextToSpeechSystem; "
+    "list(Mimic3TextToSpeechSystem(Mimic3Settings()).get_voices())"
+)
+
+# -----------------------------------------------------------------------------
+
+
+def run_python(
+    code: str,
+) -> typing.Tuple[float, typing.Dict[str, typing.Tuple[int, int]]]:
+    """Run code with -X importtime.
+
+    Returns wall time in seconds and module -> (self, cumulative) microseconds.
+    """
+    env = dict(os.environ)
+    python_path = [str(_PROJECT_DIR)]
+    if env.get("PYTHONPATH"):
+        python_path.append(env["PYTHONPATH"])
+
+    env["PYTHONPATH"] = os.pathsep.join(python_path)
+
+    start_time = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    wall_sec = time.perf_counter() - start_time
+
+    # import time: self [us] | cumulative | imported package
+    import_times: typing.Dict[str, typing.Tuple[int, int]] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3:
+            continue
+
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            # Header
+            continue
+
+        import_times[parts[2].strip()] = (self_us, cumulative_us)
+
+    return wall_sec, import_times
+
+
+def main():
+    """Measure import times in fresh processes"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "module", nargs="*", help=f"Modules to import (default: {_DEFAULT_MODULES})"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Number of processes per module"
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="Number of slowest imports to show"
+    )
+    parser.add_argument(
+        "--ready",
+        action="store_true",
+        help="Also time until voices can be listed",
+    )
+    args = parser.parse_args()
+
+    modules = args.module or _DEFAULT_MODULES
+
+    for module in modules:
+        wall_times: typing.List[float] = []
+        import_times: typing.List[float] = []
+        last_times: typing.Dict[str, typing.Tuple[int, int]] = {}
+        for _ in range(args.repeat):
+            wall_sec, last_times = run_python(f"import {module}")
+            wall_times.append(wall_sec)
+            import_times.append(last_times.get(module, (0, 0))[1] / 1000)
+
+        print(
+            module,
+            f"import={statistics.median(import_times):.0f}ms",
+            f"wall={1000 * statistics.median(wall_times):.0f}ms",
+            sep="\t",
+        )
+
+        # Slowest third-party imports (by cumulative time) from the last run
+        slowest = sorted(
+            (
+                (cumulative_us, name)
+                for name, (_self_us, cumulative_us) in last_times.items()
+                if name.split(".")[0] not in {"mimic3_tts", "mimic3_http"}
+            ),
+            reverse=True,
+        )
+        for cumulative_us, name in slowest[: args.top]:
+            print("", name, f"{cumulative_us / 1000:.0f}ms", sep="\t")
+
+    if args.ready:
+        ready_times = [run_python(_READY_CODE)[0] for _ in range(args.repeat)]
+        print("ready", f"wall={1000 * statistics.median(ready_times):.0f}ms", sep="\t")
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Checks that PhonemeIdEncoder gives the same ids as phonemes2ids, and compares
+how long each takes to convert a voice's phonemes to ids.
+
+Equivalence is also checked for variations of the voice's phoneme settings
+(blanks between tokens, separated stress/tones/graphemes, etc.).
+"""
+import argparse
+import dataclasses
+import statistics
+import time
+import typing
+from pathlib import Path
+
+import phonemes2ids
+
+from mimic3_tts import DEFAULT_VOICE, Mimic3Settings, Mimic3TextToSpeechSystem
+from mimic3_tts.config import PhonemesConfig
+from mimic3_tts.phoneme_ids import PhonemeIdEncoder
+from mimic3_tts.voice import WORD_PHONEMES_TYPE, Mimic3Voice
+
+_CORPUS = [
+    "Hello.",
+    "Sorry, I didn't catch that.",
+    "It is 5 o'clock; the timer is done!",
+    "Here is the weather for today: sunny, with a high of 20 degrees.",
+    "A rainbow is a meteorological phenomenon that is caused by reflection, "
+    "refraction and dispersion of light in water droplets resulting in a "
+    "spectrum of light appearing in the sky.",
+]
+
+# Changes to phoneme settings that must give the same ids either way
+_VARIATIONS: typing.List[typing.Dict[str, typing.Any]] = [
+    {},
+    {"blank_between": "tokens"},
+    {"blank_between": "tokens_and_words", "blank_at_end": False},
+    {"blank_at_start": False, "blank_at_end": False},
+    {"separate": ["ˈ", "ˌ"]},
+    {"separate_graphemes": True},
+    {"separate_tones": True, "tone_before": True},
+    {"simple_punctuation": False},
+    {"punctuation_map": {}},
+    {"auto_bos_eos": True, "bos": "^", "eos": "$"},
+]
+
+# -----------------------------------------------------------------------------
+
+
+def phonemes2ids_original(
+    phoneme_to_id: typing.Dict[str, int],
+    phonemes_config: PhonemesConfig,
+    phonemes: WORD_PHONEMES_TYPE,
+    phoneme_map=None,
+) -> typing.List[int]:
+    """Conversion to ids as it was done before PhonemeIdEncoder"""
+    return phonemes2ids.phonemes2ids(
+        word_phonemes=phonemes,
+        phoneme_to_id=phoneme_to_id,
+        pad=phonemes_config.pad,
+        bos=phonemes_config.bos,
+        eos=phonemes_config.eos,
+        auto_bos_eos=phonemes_config.auto_bos_eos,
+        blank=phonemes_config.blank,
+        blank_word=phonemes_config.blank_word,
+        blank_between=phonemes_config.blank_between,
+        blank_at_start=phonemes_config.blank_at_start,
+        blank_at_end=phonemes_config.blank_at_end,
+        simple_punctuation=phonemes_config.simple_punctuation,
+        punctuation_map=phonemes_config.punctuation_map,
+        separate=phonemes_config.separate,
+        separate_graphemes=phonemes_config.separate_graphemes,
+        separate_tones=phonemes_config.separate_tones,
+        tone_before=phonemes_config.tone_before,
+        phoneme_map=phoneme_map or phonemes_config.phoneme_map,
+        fail_on_missing=False,
+    )
+
+
+def time_per_sentence(
+    convert: typing.Callable[[WORD_PHONEMES_TYPE], typing.Any],
+    all_phonemes: typing.Sequence[WORD_PHONEMES_TYPE],
+    repeat: int,
+) -> float:
+    """Median microseconds to convert one sentence"""
+    times: typing.List[float] = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for phonemes in all_phonemes:
+            convert(phonemes)
+
+        times.append((time.perf_counter() - start_time) / len(all_phonemes))
+
+    return 1e6 * statistics.median(times)
+
+
+def main():
+    """Check equivalence and time both conversions"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--voice", default=DEFAULT_VOICE, help="Voice key")
+    parser.add_argument(
+        "--repeat", type=int, default=1000, help="Number of passes over the corpus"
+    )
+    args = parser.parse_args()
+
+    tts = Mimic3TextToSpeechSystem(Mimic3Settings())
+    voice_dir: typing.Optional[Path] = None
+    for maybe_voice in tts.get_voices():
+        if maybe_voice.key == args.voice:
+            voice_dir = Path(maybe_voice.location)
+            break
+
+    if (voice_dir is None) or (not voice_dir.is_dir()):
+        parser.error(f"Voice is not downloaded: {args.voice}")
+
+    voice = Mimic3Voice.load_from_directory(voice_dir)
+    all_phonemes = [
+        sent_phonemes
+        for text in _CORPUS
+        for sent_phonemes, _break_type in voice.text_to_phonemes(text)
+    ]
+    voice.close()
+
+    # Equivalence
+    phoneme_to_id = voice.phoneme_to_id
+    for variation in _VARIATIONS:
+        phonemes_config = dataclasses.replace(voice.config.phonemes, **variation)
+        encoder = PhonemeIdEncoder(
+            phoneme_to_id, phonemes_config, phoneme_map=voice.phoneme_map
+        )
+        for phonemes in all_phonemes:
+            expected_ids = phonemes2ids_original(
+                phoneme_to_id, phonemes_config, phonemes, phoneme_map=voice.phoneme_map
+            )
+            actual_ids = encoder.encode(phonemes).tolist()
+            assert (
+                actual_ids == expected_ids
+            ), f"{variation}: {phonemes} -> {actual_ids} != {expected_ids}"
+
+    print(f"equivalent for {len(_VARIATIONS)} variation(s)")
+
+    # Speed
+    original_us = time_per_sentence(
+        lambda p: phonemes2ids_original(
+            phoneme_to_id, voice.config.phonemes, p, phoneme_map=voice.phoneme_map
+        ),
+        all_phonemes,
+        args.repeat,
+    )
+    encoder_us = time_per_sentence(voice.phonemes_to_ids, all_phonemes, args.repeat)
+
+    print("phonemes2ids", f"{original_us:.1f}us/sentence", sep="\t")
+    print(
+        "encoder",
+        f"{encoder_us:.1f}us/sentence",
+        f"speedup={original_us / encoder_us:.2f}x",
+        sep="\t",
+    )
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Measures synthesis throughput of a multi-paragraph document with and without
+pipelining sentences to the voice model, with one or more model processes.
+"""
+import argparse
+import logging
+import time
+import typing
+
+from mimic3_tts import (
+    DEFAULT_VOICE,
+    AudioResult,
+    Mimic3Settings,
+    Mimic3TextToSpeechSystem,
+)
+
+_DOCUMENT = """
+A rainbow is a meteorological phenomenon that is caused by reflection,
+refraction and dispersion of light in water droplets resulting in a spectrum of
+light appearing in the sky. It takes the form of a multicoloured circular arc.
+Rainbows caused by sunlight always appear in the section of sky directly
+opposite the Sun.
+
+Rainbows can be full circles. However, the observer normally sees only an arc
+formed by illuminated droplets above the ground, and centered on a line from
+the Sun to the observer's eye.
+
+In a primary rainbow, the arc shows red on the outer part and violet on the
+inner side. This rainbow is caused by light being refracted when entering a
+droplet of water, then reflected inside on the back of the droplet and
+refracted again when leaving it.
+
+In a double rainbow, a second arc is seen outside the primary arc, and has the
+order of its colours reversed, with red on the inner side of the arc. This is
+caused by the light being reflected twice on the inside of the droplet before
+leaving it.
+"""
+
+_LOGGER = logging.getLogger("benchmark_pipelining")
+
+# -----------------------------------------------------------------------------
+
+
+def synthesize(
+    tts: Mimic3TextToSpeechSystem, text: str
+) -> typing.Tuple[float, float, int]:
+    """Returns wall time, seconds of audio, and number of audio results"""
+    audio_seconds = 0.0
+    num_results = 0
+
+    start_time = time.perf_counter()
+    tts.begin_utterance()
+    tts.speak_text(text)
+    for result in tts.end_utterance():
+        if isinstance(result, AudioResult):
+            num_results += 1
+            audio_seconds += len(result.audio_bytes) / (
+                result.sample_rate_hz * result.sample_width_bytes
+            )
+
+    return time.perf_counter() - start_time, audio_seconds, num_results
+
+
+def run(args: argparse.Namespace, depth: int, num_workers: int):
+    """Speak the document repeatedly and print throughput"""
+    tts = Mimic3TextToSpeechSystem(
+        Mimic3Settings(
+            voice=args.voice,
+            pipeline_depth=depth,
+            workers_per_voice=num_workers,
+            max_total_workers=num_workers,
+            no_download=args.no_download,
+        )
+    )
+
+    with tts:
+        # Load voice and warm up
+        tts.text_to_wav("Hello.")
+
+        total_seconds = 0.0
+        total_audio_seconds = 0.0
+        total_results = 0
+        for _ in range(args.repeat):
+            wall_seconds, audio_seconds, num_results = synthesize(tts, _DOCUMENT)
+            total_seconds += wall_seconds
+            total_audio_seconds += audio_seconds
+            total_results += num_results
+
+    print(
+        f"workers={num_workers}",
+        f"depth={depth}",
+        f"time={total_seconds / args.repeat:.2f}s",
+        f"sentences/sec={total_results / total_seconds:.2f}",
+        f"audio/sec={total_audio_seconds / total_seconds:.2f}",
+        sep="\t",
+    )
+
+
+
+def main():
+    """Compare document throughput at different pipeline depths and worker counts"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--voice", default=DEFAULT_VOICE, help="Voice key")
+    parser.add_argument(
+        "--depth",
+        type=int,
+        action="append",
+        help="Pipeline depth to test (default: 1 and 4)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        action="append",
+        help="Number of model processes per voice to test (default: 1)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Number of times to speak document"
+    )
+    parser.add_argument(
+        "--no-download", action="store_true", help="Don't download voices"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    for num_workers in args.workers or [1]:
+        for depth in args.depth or [1, 4]:
+            run(args, depth, num_workers)
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
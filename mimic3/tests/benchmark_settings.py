@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Measures the cost of capturing settings for each spoken fragment.
+
+Compares deepcopy of Mimic3Settings (what used to be stored with each
+fragment) against Mimic3Settings.snapshot, then times an SSML document with
+hundreds of <w> elements. The document is spoken once to fill the word and
+sentence audio caches, so later passes mostly measure per-token overhead.
+"""
+import argparse
+import copy
+import statistics
+import time
+import timeit
+import typing
+
+from mimic3_tts import DEFAULT_VOICE, Mimic3Settings, Mimic3TextToSpeechSystem
+from opentts_abc import AudioResult
+from opentts_abc.ssml import SSMLSpeaker
+
+_WORDS = [
+    "the",
+    "quick",
+    "brown",
+    "fox",
+    "jumps",
+    "over",
+    "a",
+    "lazy",
+    "dog",
+    "today",
+]
+
+# -----------------------------------------------------------------------------
+
+
+def make_ssml(num_words: int, words_per_sentence: int) -> str:
+    """SSML document with num_words <w> elements, split into sentences"""
+    sentences: typing.List[str] = []
+    for sent_start in range(0, num_words, words_per_sentence):
+        num_sent_words = min(words_per_sentence, num_words - sent_start)
+        word_elems = "".join(
+            f"<w>{_WORDS[(sent_start + i) % len(_WORDS)]}</w>"
+            for i in range(num_sent_words)
+        )
+
+        if (len(sentences) % 2) == 1:
+            # Change settings in every other sentence
+            word_elems = f'<prosody volume="80">{word_elems}</prosody>'
+
+        sentences.append(f"<s>{word_elems}</s>")
+
+    return "<speak>" + "".join(sentences) + "</speak>"
+
+
+def main():
+    """Time settings snapshots and SSML with many <w> elements"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--voice", default=DEFAULT_VOICE, help="Voice key")
+    parser.add_argument(
+        "--words", type=int, default=500, help="Number of <w> elements in document"
+    )
+    parser.add_argument(
+        "--words-per-sentence",
+        type=int,
+        default=10,
+        help="Number of <w> elements in each <s>",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Number of times document is spoken"
+    )
+    args = parser.parse_args()
+
+    settings = Mimic3Settings(voice=args.voice)
+
+    # Capturing settings
+    number = 10000
+    deepcopy_us = 1e6 * timeit.timeit(lambda: copy.deepcopy(settings), number=number)
+
+    # Pending results keep their snapshot (and its interned entry) alive
+    pending_snapshot = settings.snapshot()
+    snapshot_us = 1e6 * timeit.timeit(settings.snapshot, number=number)
+    assert settings.snapshot() is pending_snapshot
+
+    print("deepcopy", f"{deepcopy_us / number:.2f}us", sep="\t")
+    print(
+        "snapshot",
+        f"{snapshot_us / number:.2f}us",
+        f"speedup={deepcopy_us / snapshot_us:.1f}x",
+        sep="\t",
+    )
+
+    # SSML document
+    ssml = make_ssml(args.words, args.words_per_sentence)
+    tts = Mimic3TextToSpeechSystem(settings)
+    tts.preload_voice(args.voice)
+
+    try:
+        times: typing.List[float] = []
+        num_audio = 0
+        for _ in range(1 + args.repeat):
+            start_time = time.perf_counter()
+            results = list(SSMLSpeaker(tts).speak(ssml))
+            times.append(time.perf_counter() - start_time)
+            num_audio = sum(1 for r in results if isinstance(r, AudioResult))
+
+        # First pass fills caches
+        warm_ms = 1000 * statistics.median(times[1:])
+        print(
+            "ssml",
+            f"words={args.words}",
+            f"audio_results={num_audio}",
+            f"cold={1000 * times[0]:.1f}ms",
+            f"warm={warm_ms:.1f}ms",
+            f"per_word={1000 * warm_ms / args.words:.1f}us",
+            sep="\t",
+        )
+    finally:
+        tts.shutdown()
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
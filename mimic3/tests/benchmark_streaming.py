@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# Copyright 2022 Mycroft AI Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Measures time-to-first-byte and total time of /api/tts on a running Mimic 3
+web server, with and without streaming, for one sentence vs. ten.
+
+Start the server first (python3 -m mimic3_http).
+"""
+import argparse
+import statistics
+import time
+import typing
+import urllib.parse
+import urllib.request
+
+_SENTENCES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "It will be sunny in the morning.",
+    "Clouds will roll in after noon.",
+    "Expect a high of twenty degrees.",
+    "The low tonight will be twelve degrees.",
+    "There is a chance of rain tomorrow.",
+    "Winds will be light and variable.",
+    "The sun sets at eight fifteen.",
+    "The moon is almost full.",
+    "Have a wonderful day.",
+]
+
+# -----------------------------------------------------------------------------
+
+
+def fetch(url: str, text: str, stream: str) -> typing.Tuple[float, float, int]:
+    """Returns seconds to first byte of audio, total seconds, and number of bytes"""
+    query = {"text": text, "noCache": "true"}
+    if stream:
+        query["stream"] = stream
+
+    request_url = f"{url}/api/tts?{urllib.parse.urlencode(query)}"
+
+    start_time = time.perf_counter()
+    with urllib.request.urlopen(request_url) as response:
+        # Skip WAV header, since it may be sent before any audio
+        header_size = 0 if stream == "pcm" else 44
+        num_bytes = len(response.read(header_size + 1))
+        first_byte_time = time.perf_counter() - start_time
+
+        while True:
+            chunk = response.read(4096)
+            if not chunk:
+                break
+
+            num_bytes += len(chunk)
+
+    return first_byte_time, time.perf_counter() - start_time, num_bytes
+
+
+def main():
+    """Compare time-to-first-byte for short and long texts"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--url", default="http://localhost:59125", help="URL of Mimic 3 web server"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Number of requests per test"
+    )
+    args = parser.parse_args()
+
+    # Warm up
+    fetch(args.url, _SENTENCES[0], "")
+
+    for num_sentences in (1, len(_SENTENCES)):
+        text = " ".join(_SENTENCES[:num_sentences])
+        for stream in ("", "wav", "pcm"):
+            first_byte_times: typing.List[float] = []
+            total_times: typing.List[float] = []
+            for _ in range(args.repeat):
+                first_byte_time, total_time, _num_bytes = fetch(args.url, text, stream)
+                first_byte_times.append(first_byte_time)
+                total_times.append(total_time)
+
+            print(
+                f"sentences={num_sentences}",
+                f"stream={stream or 'off'}",
+                f"ttfb={1000 * statistics.median(first_byte_times):.1f}ms",
+                f"total={1000 * statistics.median(total_times):.1f}ms",
+                sep="\t",
+            )
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()